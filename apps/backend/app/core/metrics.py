@@ -0,0 +1,382 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A small registry of counters, gauges and histograms, rendered by GET /metrics.
+No client library or external service is needed. Values are per process:
+with several workers each one reports its own.
+
+The same SQL hooks also count statements per request (see track_queries()),
+reported in X-Query-Count / X-Query-Time-Ms headers when DEBUG_QUERY_HEADERS is set.
+"""
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Base class: a named metric family with fixed label names."""
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float]]:
+        """(suffix, label values, value) tuples for rendering."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, value in self.samples():
+            names = self.labelnames
+            if suffix == "_bucket":
+                # The last label value is the bucket bound
+                names = names + ("le",)
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set."""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "_total", key, value
+
+
+class Gauge(Metric):
+    """Value that goes up and down per label set."""
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", key, value
+
+
+class CallbackGauge(Metric):
+    """Gauge whose values are read at scrape time from `collect()`: {label values: value}."""
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 collect: Callable[[], Dict[LabelValues, float]]):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self):
+        for key, value in sorted(self.collect().items()):
+            yield "", key, value
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets per label set."""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (+Inf last)..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, amount: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, amount)
+        with self._lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * (len(self.buckets) + 2)
+            values[index] += 1
+            values[-1] += amount
+
+    def count(self, **labels: str) -> int:
+        values = self._values.get(self._key(labels))
+        return sum(values[:-1]) if values else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(values)) for key, values in self._values.items())
+        for key, values in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                yield "_bucket", key + (_format_value(bound),), cumulative
+            yield "_sum", key, values[-1]
+            yield "_count", key, cumulative
+
+
+class Registry:
+    """Ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _pool_gauge(key: str) -> Callable[[], Dict[LabelValues, float]]:
+    def collect():
+        from app.db import pool_status
+        return {(engine,): status[key] for engine, status in pool_status().items()}
+    return collect
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests", "HTTP requests by route template and status code", ("method", "route", "status")))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")))
+HTTP_IN_PROGRESS = REGISTRY.register(Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ("method",)))
+
+DB_POOL_SIZE = REGISTRY.register(CallbackGauge(
+    "db_pool_size", "Configured connection pool size", ("engine",), _pool_gauge("size")))
+DB_POOL_CHECKED_OUT = REGISTRY.register(CallbackGauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ("engine",), _pool_gauge("checked_out")))
+DB_POOL_OVERFLOW = REGISTRY.register(CallbackGauge(
+    "db_pool_overflow", "Connections open beyond the pool size (negative: unused pool slots)", ("engine",),
+    _pool_gauge("overflow")))
+DB_QUERIES = REGISTRY.register(Counter(
+    "db_queries", "SQL statements executed by statement type", ("statement",)))
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time by statement type", ("statement",),
+    buckets=QUERY_BUCKETS))
+DB_QUERY_ERRORS = REGISTRY.register(Counter(
+    "db_query_errors", "SQL statements that raised, by statement type (also in db_queries)", ("statement",)))
+
+RECIPE_SPINS = REGISTRY.register(Counter(
+    "recipe_spins", "Recipes returned by /api/recipes/random by meal type", ("meal_type",)))
+SPIN_BUFFER_DROPPED = REGISTRY.register(Counter(
+    "spin_buffer_dropped", "Queued spins dropped because the write-behind buffer was full while flushes failed"))
+RECIPE_MATCH_FALLBACKS = REGISTRY.register(Counter(
+    "recipe_match_fallbacks",
+    "Spins without a match within the extra-ingredient limit, served by the closest-match fallback",
+    ("matcher", "meal_type")))
+
+
+@dataclass
+class QueryStats:
+    """SQL statements run and time spent in the database by one request."""
+    count: int = 0
+    seconds: float = 0.0
+    statements: List[str] = field(default_factory=list)
+
+
+# Stats of the request being handled; shared with the threadpool/greenlet running its endpoint
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements run in this context (and threads started from it)."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _statement_type(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(conn, statement)
+
+
+def _handle_error(context):
+    # A failed statement gets no after_cursor_execute; without this its start time would stay on the
+    # pooled connection for good
+    if context.connection is not None and context.statement is not None:
+        if _record_query(context.connection, context.statement):
+            DB_QUERY_ERRORS.inc(statement=_statement_type(context.statement))
+
+
+def _record_query(conn, statement: str) -> bool:
+    """Count and time the statement started last on `conn`; False if none was started."""
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return False
+    elapsed = time.perf_counter() - starts.pop()
+    statement_type = _statement_type(statement)
+    DB_QUERIES.inc(statement=statement_type)
+    DB_QUERY_DURATION.observe(elapsed, statement=statement_type)
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements.append(statement)
+    return True
+
+
+def install_query_metrics():
+    """Count and time the SQL statements of every engine, sync and async (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests.
+
+    Requests are labelled with the matched route template (e.g.
+    /api/recipes/{recipe_id}) so IDs do not create new series; requests that
+    match no route are labelled "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[Callable, str] = {}
+
+    def route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._routes.get(endpoint)
+        if template is None:
+            self._routes = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+            template = self._routes.get(endpoint, "unmatched")
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status: Optional[int] = None
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            route = self.route_template(scope)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status or 500))
+            HTTP_IN_PROGRESS.dec(method=method)
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware adding X-Query-Count and X-Query-Time-Ms response headers.
+
+    Only active while `enabled()` returns true (DEBUG_QUERY_HEADERS); counts the
+    statements run before the response starts.
+    """
+
+    def __init__(self, app, enabled: Callable[[], bool]):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled():
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_headers(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-query-count", str(stats.count).encode()),
+                        (b"x-query-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,136 @@
+"""Response encoding: orjson by default, msgpack when the client asks for it.
+
+APIResponse is the app's default response class. It renders with orjson,
+or with msgpack when the route is a NegotiatedRoute and the request's Accept
+header prefers application/msgpack. The route stores the negotiated media type
+in a context variable, so endpoints and the response class need no access to
+the request.
+
+FastAPI validates an endpoint's return value against its response_model
+and walks it with jsonable_encoder before encoding, which made every
+hand-built response model get validated twice. Endpoints that answer from
+database rows now return ``APIResponse(payload)``, where payload is a plain
+dict shaped like the response model (see recipe_fields). FastAPI passes a
+returned Response through untouched, so these rows are never validated.
+model_construct would also skip validation and is somewhat faster than
+building validated models, but creating a pydantic object per row still
+costs several times more than the plain dicts, which beat both; see
+benchmarks/bench_serialization.py. response_model stays on these routes
+for the OpenAPI schema.
+"""
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
+import msgpack
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack"}
+# Accept entries that JSON satisfies; msgpack is only served when named explicitly
+_JSON_MEDIA_RANGES = {JSON_MEDIA_TYPE, "application/*", "*/*"}
+
+_response_media_type: ContextVar[str] = ContextVar("response_media_type", default=JSON_MEDIA_TYPE)
+
+
+def _quality(parameters: List[str]) -> float:
+    for parameter in parameters:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return min(max(float(value), 0.0), 1.0)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Response media type for an Accept header.
+
+    msgpack when the client names it with a q-value above 0 and at least as
+    high as the best entry JSON would satisfy; JSON otherwise, including when
+    nothing is acceptable (the error responses are JSON too).
+    """
+    msgpack_quality = json_quality = 0.0
+    for item in (accept or "").split(","):
+        media_type, *parameters = item.split(";")
+        media_type = media_type.strip().lower()
+        if media_type in _MSGPACK_MEDIA_TYPES:
+            msgpack_quality = max(msgpack_quality, _quality(parameters))
+        elif media_type in _JSON_MEDIA_RANGES:
+            json_quality = max(json_quality, _quality(parameters))
+    if msgpack_quality > 0 and msgpack_quality >= json_quality:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def _to_builtin(value: Any) -> Any:
+    # orjson and msgpack call this for types they cannot encode themselves
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (datetime, date)):
+        # msgpack has no date type; same ISO format as the JSON responses
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode(content: Any, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Encode models, dicts and lists as JSON or msgpack."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(content, default=_to_builtin)
+    return orjson.dumps(content, default=_to_builtin, option=orjson.OPT_NON_STR_KEYS)
+
+
+class APIResponse(Response):
+    """Response rendered with orjson, or msgpack if the request negotiated it."""
+
+    media_type = JSON_MEDIA_TYPE
+
+    def __init__(self, content: Any = None, status_code: int = 200, headers: Optional[Dict[str, str]] = None,
+                 media_type: Optional[str] = None, background=None):
+        super().__init__(content, status_code, headers, media_type or _response_media_type.get(), background)
+
+    def render(self, content: Any) -> bytes:
+        return encode(content, self.media_type)
+
+
+class NegotiatedRoute(APIRoute):
+    """Route that picks the APIResponse media type from the Accept header."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            token = _response_media_type.set(negotiate(request.headers.get("accept")))
+            try:
+                response = await handler(request)
+            finally:
+                _response_media_type.reset(token)
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return negotiated_handler
+
+
+def ingredient_fields(ingredient) -> Dict[str, Any]:
+    """IngredientResponse fields of an Ingredient row."""
+    return {"id": ingredient.id, "name": ingredient.name, "normalized": ingredient.normalized}
+
+
+def recipe_fields(recipe) -> Dict[str, Any]:
+    """RecipeResponse fields of a Recipe row."""
+    return {
+        "id": recipe.id,
+        "title": recipe.title,
+        "source": recipe.source,
+        "url": recipe.url,
+        "meal_type": recipe.meal_type,
+        "time_minutes": recipe.time_minutes,
+        "image_url": recipe.image_url,
+        "tags": recipe.tags,
+        "steps_excerpt": recipe.steps_excerpt,
+    }
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 import os
 
@@ -7,7 +8,46 @@ class Settings(BaseSettings):
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./data/amciuday.db")
     db_path: str = "./data/amciuday.db"  # Fallback for SQLite
     seed_json: str = "./recipes_expanded.json"
+    seed_ndjson: str = "./recipes_expanded.ndjson"  # plain or .gz, for /api/import/seed/stream
+    seed_import_chunk_size: int = 1000  # recipes per import transaction
+    seed_max_line_bytes: int = 1024 * 1024
+    seed_max_rejected_reported: int = 100
     log_level: str = "INFO"
+    db_check_schema: bool = True  # create missing tables/indexes and migrate on startup; off if deploys migrate
+    
+    # Preferences are per user, identified by the X-User-Id header
+    default_user_id: str = "default"  # used when the header is missing
+    
+    # Async database path: async def endpoints on aiosqlite/asyncpg
+    db_async: bool = False
+    async_database_url: Optional[str] = None  # default: DATABASE_URL with the async driver
+    
+    # Connection pool settings (one engine per process)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # seconds before a connection is replaced
+    db_pool_pre_ping: bool = True
+    
+    # Recipe matching: "bitset" (in-memory index), "sparse" (numpy/scipy CSR matrix),
+    # "sql" (GROUP BY/anti-join in the database, no index in memory)
+    # or "python" (per-recipe loops, kept for comparison)
+    recipe_matcher: str = "bitset"
+    recipe_index_ttl_seconds: int = 300  # 0 = rebuild only on explicit invalidation
+    
+    # Spin history writes: "sync" (commit before responding) or "buffered" (write-behind)
+    spin_history_write_mode: str = "sync"
+    spin_buffer_max_records: int = 50  # flush as soon as this many spins are queued
+    spin_buffer_flush_interval_seconds: float = 1.0  # ...or after this long
+    spin_buffer_max_pending: int = 10000  # spins kept while flushes fail; the oldest are dropped beyond this
+    
+    # Spin history retention: older spins are rolled up into daily counts, 0 = keep forever
+    history_retention_days: int = 0
+    history_retention_interval_seconds: int = 24 * 60 * 60
+    
+    # GET /metrics (Prometheus text format) and the request/query instrumentation behind it
+    metrics_enabled: bool = True
+    debug_query_headers: bool = False  # X-Query-Count / X-Query-Time-Ms on every response
     
     # API settings
     api_host: str = "0.0.0.0"
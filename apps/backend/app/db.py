@@ -1,9 +1,43 @@
 import os
+from typing import Callable, Dict, Optional, TypeVar
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.util.concurrency import await_only, in_greenlet
 from sqlmodel import SQLModel, create_engine, Session
 from app.core.settings import settings
 
+T = TypeVar("T")
 
-def get_engine():
+# One engine (and connection pool) per process, created on first use.
+_engine: Optional[Engine] = None
+_async_engine = None
+
+# Async drivers used when DB_ASYNC is enabled
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def _pool_options(database_url: str) -> dict:
+    """Connection pool options taken from settings."""
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    # In-memory SQLite uses a single-connection pool that takes no sizing options
+    if ":memory:" not in database_url:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+
+def create_db_engine() -> Engine:
     """Create database engine with PostgreSQL for production or SQLite for development."""
     database_url = settings.database_url
     
@@ -11,7 +45,8 @@ def get_engine():
         # PostgreSQL configuration for production
         engine = create_engine(
             database_url,
-            echo=settings.log_level == "DEBUG"
+            echo=settings.log_level == "DEBUG",
+            **_pool_options(database_url)
         )
     else:
         # SQLite configuration for development
@@ -19,24 +54,133 @@ def get_engine():
         engine = create_engine(
             database_url,
             connect_args={"check_same_thread": False},
-            echo=settings.log_level == "DEBUG"
+            echo=settings.log_level == "DEBUG",
+            **_pool_options(database_url)
         )
     
     return engine
 
 
-def create_db_and_tables(engine):
-    """Create all database tables."""
-    SQLModel.metadata.create_all(engine)
+def get_engine() -> Engine:
+    """Get the process-wide database engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine()
+    return _engine
+
+
+def dispose_engine() -> None:
+    """Close all pooled connections and drop the process-wide engine."""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+
+
+def pool_status() -> Dict[str, Dict[str, int]]:
+    """Size, checked-out and overflow connections of each open engine's pool."""
+    engines = {"sync": _engine, "async": _async_engine.sync_engine if _async_engine is not None else None}
+    status = {}
+    for name, engine in engines.items():
+        pool = engine.pool if engine is not None else None
+        # Only queue pools are sized (in-memory SQLite uses a single connection)
+        if pool is None or not hasattr(pool, "checkedout"):
+            continue
+        status[name] = {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+    return status
+
+
+def dialect_insert(dialect: str):
+    """INSERT construct with ON CONFLICT support for the dialect (sqlite or postgresql).
+    
+    Imported on first use so the unused dialect is never loaded.
+    """
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+
+def get_async_database_url() -> str:
+    """Database URL with its driver swapped for the async one."""
+    if settings.async_database_url:
+        return settings.async_database_url
+    scheme, rest = settings.database_url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(backend, scheme)}://{rest}"
+
+
+def get_async_engine():
+    """Get the process-wide async engine, creating it on first use."""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        
+        database_url = get_async_database_url()
+        if database_url.startswith("sqlite"):
+            os.makedirs(os.path.dirname(settings.db_path), exist_ok=True)
+        _async_engine = create_async_engine(
+            database_url,
+            echo=settings.log_level == "DEBUG",
+            **_pool_options(database_url)
+        )
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Close all pooled async connections and drop the async engine."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+def create_db_and_tables(bind):
+    """Create missing tables and indexes (bind may be an engine or a connection).
+    
+    The schema is read once with an inspector, so an up-to-date database costs
+    one query per table instead of one per table and index.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    tables = SQLModel.metadata.sorted_tables
+    missing_tables = [table for table in tables if table.name not in existing_tables]
+    if missing_tables:
+        SQLModel.metadata.create_all(bind, tables=missing_tables, checkfirst=False)
+    create_missing_indexes(bind, inspector, [table for table in tables if table.name in existing_tables])
+
+
+def create_missing_indexes(bind, inspector, tables):
+    """Create indexes added to models after their tables already existed."""
+    for table in tables:
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind)
 
 
 def get_session():
     """Get database session dependency."""
-    engine = get_engine()
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
 
 
-# Initialize database on import
-engine = get_engine()
-create_db_and_tables(engine)
\ No newline at end of file
+def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Call `func`, in a worker thread when called from an endpoint body on the event loop.
+    
+    Under DB_ASYNC, endpoint bodies run on the event loop thread through
+    AsyncSession.run_sync (see async_router); CPU-bound steps such as index
+    builds and matching go through here so they do not stall other requests.
+    """
+    if in_greenlet():
+        return await_only(run_in_threadpool(func, *args, **kwargs))
+    return func(*args, **kwargs)
+
+
+async def get_async_session():
+    """Get async database session dependency (DB_ASYNC mode)."""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    
+    async with AsyncSession(get_async_engine()) as session:
+        yield session
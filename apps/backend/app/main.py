@@ -1,7 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.routers import recipes, ingredients, history, seed
-from app.db import create_db_and_tables, get_engine
+from app.db import create_db_and_tables, get_engine, dispose_engine, get_async_engine, dispose_async_engine
+from app.core import metrics
+from app.core.serialization import APIResponse
+from app.core.settings import settings
+from app.services.history_retention import retention_loop
+from app.services.preferences import migrate_legacy_preferences
+from app.services.recipe_search import create_search_index
+from app.services.spin_buffer import start_spin_buffer, stop_spin_buffer
+import asyncio
 import logging
 
 # Configure logging
@@ -11,7 +20,9 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Amciu Day API",
     description="API for the Amciu Day recipe spinning app",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson, or msgpack for clients sending Accept: application/msgpack
+    default_response_class=APIResponse
 )
 
 # Add CORS middleware for frontend
@@ -23,20 +34,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(recipes.router)
-app.include_router(ingredients.router)
-app.include_router(history.router)
-app.include_router(seed.router)
+# Request and SQL metrics for GET /metrics
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.install_query_metrics()
+
+# Per-request SQL statement count/time headers, checked per request so tests can toggle it
+if settings.metrics_enabled or settings.debug_query_headers:
+    app.add_middleware(metrics.QueryStatsMiddleware, enabled=lambda: settings.debug_query_headers)
+    metrics.install_query_metrics()
+
+# Include routers (async def endpoints on the async engine when DB_ASYNC is set)
+for module in (recipes, ingredients, history, seed):
+    if settings.db_async:
+        from app.routers.async_router import build_async_router
+        app.include_router(build_async_router(module.router))
+    else:
+        app.include_router(module.router)
+
+
+def prepare_database(connection):
+    """Create missing tables and indexes and migrate legacy data, in one transaction."""
+    create_db_and_tables(connection)
+    create_search_index(connection)
+    moved = migrate_legacy_preferences(connection)
+    if moved:
+        logger.info(f"Migrated {moved} legacy preferences to user '{settings.default_user_id}'")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup."""
     logger.info("Starting Amciu Day API...")
-    engine = get_engine()
-    create_db_and_tables(engine)
-    logger.info("Database initialized")
+    if not settings.db_check_schema:
+        logger.info("Schema check skipped (DB_CHECK_SCHEMA=false)")
+    elif settings.db_async:
+        async with get_async_engine().begin() as connection:
+            await connection.run_sync(prepare_database)
+        logger.info("Database initialized")
+    else:
+        with get_engine().begin() as connection:
+            prepare_database(connection)
+        logger.info("Database initialized")
+    
+    start_spin_buffer()
+    
+    if settings.history_retention_days > 0:
+        app.state.retention_task = asyncio.create_task(retention_loop())
+        logger.info(f"History retention enabled: keeping {settings.history_retention_days} days")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background jobs and release pooled database connections on shutdown."""
+    retention_task = getattr(app.state, "retention_task", None)
+    if retention_task:
+        retention_task.cancel()
+    stop_spin_buffer()
+    dispose_engine()
+    await dispose_async_engine()
+    logger.info("Database connections closed")
 
 
 @app.get("/")
@@ -46,4 +103,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint():
+        """Metrics of this process in the Prometheus text exposition format."""
+        return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
\ No newline at end of file
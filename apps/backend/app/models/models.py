@@ -1,6 +1,6 @@
 from typing import List, Optional
-from sqlmodel import SQLModel, Field, Relationship, JSON, Column
-from datetime import datetime
+from sqlmodel import SQLModel, Field, Relationship, JSON, Column, Index
+from datetime import date, datetime
 
 
 class Ingredient(SQLModel, table=True):
@@ -15,7 +15,7 @@ class Recipe(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(index=True)
     source: str
-    url: str
+    url: str = Field(index=True)
     meal_type: str = Field(index=True)
     time_minutes: Optional[int] = None
     image_url: Optional[str] = None
@@ -37,16 +37,49 @@ class RecipeIngredient(SQLModel, table=True):
 
 
 class Preferences(SQLModel, table=True):
+    """Legacy single-user preferences; migrated into the tables below on startup."""
     id: int = Field(default=1, primary_key=True)
     liked_ids: List[int] = Field(default_factory=list, sa_column=Column(JSON))
     banned_ids: List[int] = Field(default_factory=list, sa_column=Column(JSON))
 
 
+class LikedIngredient(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_likedingredient_ingredient_id_user_id", "ingredient_id", "user_id"),
+    )
+    
+    user_id: str = Field(primary_key=True, max_length=64)
+    ingredient_id: int = Field(foreign_key="ingredient.id", primary_key=True)
+
+
+class BannedIngredient(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_bannedingredient_ingredient_id_user_id", "ingredient_id", "user_id"),
+    )
+    
+    user_id: str = Field(primary_key=True, max_length=64)
+    ingredient_id: int = Field(foreign_key="ingredient.id", primary_key=True)
+
+
 class SpinHistory(SQLModel, table=True):
+    __table_args__ = (
+        # Keyset pagination on (spun_at, id), with and without a meal filter
+        Index("ix_spinhistory_spun_at_id", "spun_at", "id"),
+        Index("ix_spinhistory_meal_type_spun_at_id", "meal_type", "spun_at", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     recipe_id: int = Field(foreign_key="recipe.id")
     meal_type: str = Field(index=True)
     allow_one_extra: bool
     spun_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     
-    recipe: Recipe = Relationship(back_populates="spin_history")
\ No newline at end of file
+    recipe: Recipe = Relationship(back_populates="spin_history")
+
+
+class SpinHistoryDaily(SQLModel, table=True):
+    """Per-day, per-recipe spin counts rolled up from expired SpinHistory rows."""
+    day: date = Field(primary_key=True)
+    recipe_id: int = Field(foreign_key="recipe.id", primary_key=True)
+    meal_type: str = Field(primary_key=True)
+    spin_count: int = 0
@@ -13,6 +13,10 @@ class IngredientResponse(BaseModel):
     normalized: str
 
 
+class IngredientSearchResult(IngredientResponse):
+    recipe_count: int
+
+
 class RecipeResponse(BaseModel):
     id: int
     title: str
@@ -36,6 +40,10 @@ class RecipeWithIngredients(RecipeResponse):
     ingredients: List[IngredientResponse]
 
 
+class RecipeBatchRequest(BaseModel):
+    ids: List[int]
+
+
 class SpinHistoryResponse(BaseModel):
     id: int
     recipe: RecipeResponse
@@ -44,6 +52,16 @@ class SpinHistoryResponse(BaseModel):
     spun_at: datetime
 
 
+class RecipeSearchPage(BaseModel):
+    items: List[RecipeResponse]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page
+
+
+class SpinHistoryPage(BaseModel):
+    items: List[SpinHistoryResponse]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page
+
+
 class SeedRecipe(BaseModel):
     title: str
     source: str
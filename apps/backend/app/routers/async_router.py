@@ -0,0 +1,62 @@
+"""Async variants of the API routers, used when DB_ASYNC is enabled.
+
+Each sync endpoint is re-registered as an ``async def`` that receives an
+AsyncSession (aiosqlite / asyncpg) and runs the endpoint body through
+``AsyncSession.run_sync``. The body keeps its plain Session API, but every
+query is awaited on the async driver inside the event loop instead of
+occupying a threadpool worker. Endpoints that are already async are kept as-is.
+
+The rest of the body also runs on the event loop thread, so CPU-bound steps
+(recipe and ingredient index builds, index matching, the spin buffer flush)
+are handed to worker threads with ``run_blocking``. Building the response
+dicts, which is cheap, stays on the loop.
+"""
+import functools
+import inspect
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+from app.db import get_async_session
+
+# add_api_route arguments that APIRoute keeps as attributes of the same name, so copies behave
+# and document exactly like the original routes
+ROUTE_OPTIONS = [
+    name for name in inspect.signature(APIRouter.add_api_route).parameters
+    if name not in ("self", "path", "endpoint", "route_class_override")
+]
+
+
+def make_async_endpoint(endpoint):
+    """Wrap a sync endpoint taking `session` into an async endpoint on an AsyncSession."""
+    @functools.wraps(endpoint)
+    async def async_endpoint(**kwargs):
+        async_session = kwargs.pop("session")
+        return await async_session.run_sync(
+            lambda sync_session: endpoint(session=sync_session, **kwargs)
+        )
+
+    signature = inspect.signature(endpoint)
+    parameters = [
+        parameter.replace(default=Depends(get_async_session), annotation=inspect.Parameter.empty)
+        if name == "session" else parameter
+        for name, parameter in signature.parameters.items()
+    ]
+    async_endpoint.__signature__ = signature.replace(parameters=parameters)
+    return async_endpoint
+
+
+def build_async_router(router: APIRouter) -> APIRouter:
+    """Copy of `router` whose database endpoints run on the async engine."""
+    async_router = APIRouter(route_class=router.route_class)
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+
+        endpoint = route.endpoint
+        if not inspect.iscoroutinefunction(endpoint) and "session" in inspect.signature(endpoint).parameters:
+            endpoint = make_async_endpoint(endpoint)
+
+        options = {option: getattr(route, option) for option in ROUTE_OPTIONS}
+        options["methods"] = list(route.methods)
+        async_router.add_api_route(route.path, endpoint, **options)
+    return async_router
@@ -1,23 +1,36 @@
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, tuple_
 from sqlmodel import Session, select
+from app.core.serialization import APIResponse, NegotiatedRoute, recipe_fields
 from app.db import get_session
 from app.models.models import SpinHistory, Recipe
-from app.models.schemas import SpinHistoryResponse, RecipeResponse
+from app.models.schemas import SpinHistoryPage
+from app.services.history_retention import apply_retention
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.services.spin_buffer import flush_spin_buffer
 
-router = APIRouter(prefix="/api/history", tags=["history"])
+router = APIRouter(prefix="/api/history", tags=["history"], route_class=NegotiatedRoute)
 
 
-@router.get("/", response_model=List[SpinHistoryResponse])
+@router.get("/", response_model=SpinHistoryPage)
 def get_spin_history(
     meal: Optional[str] = Query(None, description="Filter by meal type"),
     from_date: Optional[date] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     to_date: Optional[date] = Query(None, description="Filter to date (YYYY-MM-DD)"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum entries per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     session: Session = Depends(get_session)
 ):
-    """Get spin history with optional filters."""
-    statement = select(SpinHistory, Recipe).join(Recipe).order_by(SpinHistory.spun_at.desc())
+    """Get a page of spin history (newest first) with optional filters."""
+    flush_spin_buffer()
+    
+    statement = (
+        select(SpinHistory, Recipe)
+        .join(Recipe)
+        .order_by(SpinHistory.spun_at.desc(), SpinHistory.id.desc())
+    )
     
     # Apply meal filter
     if meal:
@@ -34,41 +47,75 @@ def get_spin_history(
         to_datetime = datetime.combine(to_date, datetime.max.time())
         statement = statement.where(SpinHistory.spun_at <= to_datetime)
     
-    results = session.exec(statement).all()
+    # Continue after the last entry of the previous page
+    if cursor:
+        try:
+            spun_at, history_id = decode_cursor(cursor, 2)
+            after = (datetime.fromisoformat(spun_at), int(history_id))
+        except (InvalidCursor, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        statement = statement.where(tuple_(SpinHistory.spun_at, SpinHistory.id) < tuple_(*after))
+    
+    # Fetch one extra row to know whether another page exists
+    results = session.exec(statement.limit(limit + 1)).all()
+    has_more = len(results) > limit
+    results = results[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last_entry = results[-1][0]
+        next_cursor = encode_cursor(last_entry.spun_at.isoformat(), last_entry.id)
     
-    return [
-        SpinHistoryResponse(
-            id=history.id,
-            recipe=RecipeResponse(
-                id=recipe.id,
-                title=recipe.title,
-                source=recipe.source,
-                url=recipe.url,
-                meal_type=recipe.meal_type,
-                time_minutes=recipe.time_minutes,
-                image_url=recipe.image_url,
-                tags=recipe.tags,
-                steps_excerpt=recipe.steps_excerpt
-            ),
-            meal_type=history.meal_type,
-            allow_one_extra=history.allow_one_extra,
-            spun_at=history.spun_at
-        )
+    # Database rows need no validation: SpinHistoryPage-shaped dicts are encoded directly
+    items = [
+        {
+            "id": history.id,
+            "recipe": recipe_fields(recipe),
+            "meal_type": history.meal_type,
+            "allow_one_extra": history.allow_one_extra,
+            "spun_at": history.spun_at
+        }
         for history, recipe in results
     ]
+    
+    return APIResponse({"items": items, "next_cursor": next_cursor})
 
 
 @router.delete("/")
-def clear_history(session: Session = Depends(get_session)):
-    """Clear all spin history."""
-    statement = select(SpinHistory)
-    history_entries = session.exec(statement).all()
+def clear_history(
+    from_date: Optional[date] = Query(None, description="Delete from date (YYYY-MM-DD)"),
+    to_date: Optional[date] = Query(None, description="Delete to date (YYYY-MM-DD)"),
+    session: Session = Depends(get_session)
+):
+    """Clear all spin history, or only the entries in a date range."""
+    flush_spin_buffer()
+    
+    statement = delete(SpinHistory)
+    
+    if from_date:
+        from_datetime = datetime.combine(from_date, datetime.min.time())
+        statement = statement.where(SpinHistory.spun_at >= from_datetime)
     
-    for entry in history_entries:
-        session.delete(entry)
+    if to_date:
+        to_datetime = datetime.combine(to_date, datetime.max.time())
+        statement = statement.where(SpinHistory.spun_at <= to_datetime)
     
+    result = session.exec(statement)
     session.commit()
-    return {"message": f"Cleared {len(history_entries)} history entries"}
+    return {"message": f"Cleared {result.rowcount} history entries"}
+
+
+@router.post("/retention")
+def run_history_retention(
+    days: Optional[int] = Query(None, ge=1, description="Keep this many days of raw spins (default: setting)"),
+    session: Session = Depends(get_session)
+):
+    """Roll spins older than the retention window into daily counts and delete them."""
+    result = apply_retention(session, days)
+    return {
+        "message": f"Rolled up {result['deleted']} history entries",
+        **result
+    }
 
 
 @router.delete("/{history_id}")
@@ -1,16 +1,20 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
+from app.core.serialization import APIResponse, NegotiatedRoute, ingredient_fields
 from app.db import get_session
-from app.models.models import Ingredient, Preferences
-from app.models.schemas import IngredientCreate, IngredientResponse
+from app.models.models import BannedIngredient, Ingredient, LikedIngredient
+from app.models.schemas import IngredientCreate, IngredientResponse, IngredientSearchResult
+from app.services.ingredient_search import MAX_LIMIT, get_ingredient_search_index, index_ingredient
 from app.services.normalization import normalize_ingredient
+from app.services.preferences import add_preference, get_preference_ingredients, get_user_id, remove_preference
 
-router = APIRouter(prefix="/api/ingredients", tags=["ingredients"])
+router = APIRouter(prefix="/api/ingredients", tags=["ingredients"], route_class=NegotiatedRoute)
 
 
 def get_or_create_ingredient(session: Session, name: str) -> Ingredient:
-    """Get existing ingredient or create new one."""
+    """Get existing ingredient or create new one (flushed; committed by the caller)."""
     normalized = normalize_ingredient(name)
     
     # Check if ingredient already exists
@@ -23,133 +27,93 @@ def get_or_create_ingredient(session: Session, name: str) -> Ingredient:
     # Create new ingredient
     ingredient = Ingredient(name=name, normalized=normalized)
     session.add(ingredient)
-    session.commit()
-    session.refresh(ingredient)
+    try:
+        session.flush()
+    except IntegrityError:
+        # Another request created it first
+        session.rollback()
+        return session.exec(statement).one()
     return ingredient
 
 
-def get_preferences(session: Session) -> Preferences:
-    """Get user preferences, create default if not exists."""
-    prefs = session.get(Preferences, 1)
-    if not prefs:
-        prefs = Preferences(id=1, liked_ids=[], banned_ids=[])
-        session.add(prefs)
-        session.commit()
-        session.refresh(prefs)
-    return prefs
+def to_response(ingredient: Ingredient) -> IngredientResponse:
+    return IngredientResponse(id=ingredient.id, name=ingredient.name, normalized=ingredient.normalized)
+
+
+@router.get("/search", response_model=List[IngredientSearchResult])
+def search_ingredients(
+    q: str = Query(..., min_length=1, max_length=64, description="Prefix of any word; diacritics optional"),
+    limit: int = Query(10, ge=1, le=MAX_LIMIT, description="Maximum results"),
+    session: Session = Depends(get_session)
+):
+    """Autocomplete ingredients, most used in recipes first."""
+    return APIResponse([
+        {"id": ingredient_id, "name": name, "normalized": normalized, "recipe_count": recipe_count}
+        for ingredient_id, name, normalized, recipe_count in get_ingredient_search_index(session).search(q, limit)
+    ])
 
 
 @router.get("/liked", response_model=List[IngredientResponse])
-def get_liked_ingredients(session: Session = Depends(get_session)):
+def get_liked_ingredients(
+    user_id: str = Depends(get_user_id),
+    session: Session = Depends(get_session)
+):
     """Get all liked ingredients."""
-    prefs = get_preferences(session)
-    
-    if not prefs.liked_ids:
-        return []
-    
-    statement = select(Ingredient).where(Ingredient.id.in_(prefs.liked_ids))
-    ingredients = session.exec(statement).all()
-    
-    return [
-        IngredientResponse(id=ing.id, name=ing.name, normalized=ing.normalized)
-        for ing in ingredients
-    ]
+    return APIResponse([ingredient_fields(ing) for ing in get_preference_ingredients(session, LikedIngredient, user_id)])
 
 
 @router.post("/liked", response_model=IngredientResponse)
 def add_liked_ingredient(
     ingredient_data: IngredientCreate,
+    user_id: str = Depends(get_user_id),
     session: Session = Depends(get_session)
 ):
     """Add ingredient to liked list."""
-    ingredient = get_or_create_ingredient(session, ingredient_data.name)
-    prefs = get_preferences(session)
-    
-    if ingredient.id not in prefs.liked_ids:
-        # Create new list to trigger SQLModel dirty tracking
-        prefs.liked_ids = prefs.liked_ids + [ingredient.id]
-        session.add(prefs)
-        session.commit()
-        session.refresh(prefs)
-    
-    return IngredientResponse(
-        id=ingredient.id,
-        name=ingredient.name,
-        normalized=ingredient.normalized
-    )
+    ingredient = to_response(get_or_create_ingredient(session, ingredient_data.name))
+    add_preference(session, LikedIngredient, user_id, ingredient.id)
+    index_ingredient(ingredient.id, ingredient.name, ingredient.normalized)
+    return ingredient
 
 
 @router.delete("/liked/{ingredient_id}")
 def remove_liked_ingredient(
     ingredient_id: int,
+    user_id: str = Depends(get_user_id),
     session: Session = Depends(get_session)
 ):
     """Remove ingredient from liked list."""
-    prefs = get_preferences(session)
-    
-    if ingredient_id in prefs.liked_ids:
-        # Create new list to trigger SQLModel dirty tracking
-        prefs.liked_ids = [id for id in prefs.liked_ids if id != ingredient_id]
-        session.add(prefs)
-        session.commit()
-        session.refresh(prefs)
-    
+    remove_preference(session, LikedIngredient, user_id, ingredient_id)
     return {"message": "Ingredient removed from liked list"}
 
 
 @router.get("/banned", response_model=List[IngredientResponse])
-def get_banned_ingredients(session: Session = Depends(get_session)):
+def get_banned_ingredients(
+    user_id: str = Depends(get_user_id),
+    session: Session = Depends(get_session)
+):
     """Get all banned ingredients."""
-    prefs = get_preferences(session)
-    
-    if not prefs.banned_ids:
-        return []
-    
-    statement = select(Ingredient).where(Ingredient.id.in_(prefs.banned_ids))
-    ingredients = session.exec(statement).all()
-    
-    return [
-        IngredientResponse(id=ing.id, name=ing.name, normalized=ing.normalized)
-        for ing in ingredients
-    ]
+    return APIResponse([ingredient_fields(ing) for ing in get_preference_ingredients(session, BannedIngredient, user_id)])
 
 
 @router.post("/banned", response_model=IngredientResponse)
 def add_banned_ingredient(
     ingredient_data: IngredientCreate,
+    user_id: str = Depends(get_user_id),
     session: Session = Depends(get_session)
 ):
     """Add ingredient to banned list."""
-    ingredient = get_or_create_ingredient(session, ingredient_data.name)
-    prefs = get_preferences(session)
-    
-    if ingredient.id not in prefs.banned_ids:
-        # Create new list to trigger SQLModel dirty tracking
-        prefs.banned_ids = prefs.banned_ids + [ingredient.id]
-        session.add(prefs)
-        session.commit()
-        session.refresh(prefs)
-    
-    return IngredientResponse(
-        id=ingredient.id,
-        name=ingredient.name,
-        normalized=ingredient.normalized
-    )
+    ingredient = to_response(get_or_create_ingredient(session, ingredient_data.name))
+    add_preference(session, BannedIngredient, user_id, ingredient.id)
+    index_ingredient(ingredient.id, ingredient.name, ingredient.normalized)
+    return ingredient
 
 
 @router.delete("/banned/{ingredient_id}")
 def remove_banned_ingredient(
     ingredient_id: int,
+    user_id: str = Depends(get_user_id),
     session: Session = Depends(get_session)
 ):
     """Remove ingredient from banned list."""
-    prefs = get_preferences(session)
-    
-    if ingredient_id in prefs.banned_ids:
-        # Create new list to trigger SQLModel dirty tracking
-        prefs.banned_ids = [id for id in prefs.banned_ids if id != ingredient_id]
-        session.add(prefs)
-        session.commit()
-        session.refresh(prefs)
-    
-    return {"message": "Ingredient removed from banned list"}
\ No newline at end of file
+    remove_preference(session, BannedIngredient, user_id, ingredient_id)
+    return {"message": "Ingredient removed from banned list"}
@@ -1,13 +1,50 @@
-from typing import Optional
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
+from sqlmodel import Session
+from app.core.metrics import RECIPE_SPINS
+from app.core.serialization import APIResponse, NegotiatedRoute, recipe_fields
 from app.db import get_session
-from app.models.models import Recipe, SpinHistory, RecipeIngredient, Ingredient
-from app.models.schemas import RecipeResponse, RecipeWithIngredients, RecipeMatchResponse
-from app.services.recipe_filter import get_best_matching_recipe, count_extra_ingredients, get_preferences, get_match_quality
-from datetime import datetime
+from app.models.schemas import RecipeWithIngredients, RecipeMatchResponse, RecipeBatchRequest, RecipeSearchPage
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.services.recipe_queries import MAX_BATCH_IDS, get_recipe_payloads
+from app.services.preferences import get_preferences, get_user_id
+from app.services.recipe_filter import get_best_matching_recipe, count_extra_ingredients, get_match_quality
+from app.services.recipe_search import search_recipes
+from app.services.spin_buffer import record_spin
 
-router = APIRouter(prefix="/api/recipes", tags=["recipes"])
+router = APIRouter(prefix="/api/recipes", tags=["recipes"], route_class=NegotiatedRoute)
+
+
+def parse_recipe_ids(values: List[str]) -> List[int]:
+    """Parse repeated and/or comma-separated recipe IDs."""
+    try:
+        recipe_ids = [int(value) for item in values for value in item.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Recipe IDs must be integers")
+    
+    if len(recipe_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} recipe IDs per request")
+    return recipe_ids
+
+
+@router.get("", response_model=List[RecipeWithIngredients])
+def get_recipes_batch(
+    ids: List[str] = Query(..., description="Recipe IDs, repeated (?ids=1&ids=2) or comma-separated (?ids=1,2)"),
+    session: Session = Depends(get_session)
+):
+    """Get many recipes with their ingredients in one round trip."""
+    return APIResponse(get_recipe_payloads(session, parse_recipe_ids(ids)))
+
+
+@router.post("/batch", response_model=List[RecipeWithIngredients])
+def post_recipes_batch(
+    request: RecipeBatchRequest,
+    session: Session = Depends(get_session)
+):
+    """Get many recipes with their ingredients (IDs in the request body)."""
+    if len(request.ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} recipe IDs per request")
+    return APIResponse(get_recipe_payloads(session, request.ids))
 
 
 @router.get("/random", response_model=RecipeMatchResponse)
@@ -15,48 +52,79 @@ def get_random_recipe_endpoint(
     meal: str = Query(..., description="Meal type: breakfast, lunch, snack, dinner"),
     allow_one_extra: bool = Query(False, description="Allow one ingredient not in liked list"),
     hide_recent: bool = Query(True, description="Hide recently spun recipes"),
+    user_id: str = Depends(get_user_id),
     session: Session = Depends(get_session)
 ):
     """Get the best matching recipe and add to spin history."""
     if meal not in ["breakfast", "lunch", "snack", "dinner"]:
         raise HTTPException(status_code=400, detail="Invalid meal type")
     
-    recipe = get_best_matching_recipe(session, meal, allow_one_extra, hide_recent)
+    # Loaded once: used for matching and for the match information below
+    prefs = get_preferences(session, user_id)
+    recipe = get_best_matching_recipe(session, meal, allow_one_extra, hide_recent, user_id, prefs)
     
     if not recipe:
         raise HTTPException(status_code=404, detail="No recipes found for this meal type")
     
     # Calculate match information
-    prefs = get_preferences(session)
     liked_ids = set(prefs.liked_ids)
     extra_count = count_extra_ingredients(recipe, liked_ids)
     total_ingredients = len(recipe.normalized_ingredient_ids) if recipe.normalized_ingredient_ids else 0
     match_quality = get_match_quality(extra_count, allow_one_extra)
     
-    # Add to spin history
-    history_entry = SpinHistory(
-        recipe_id=recipe.id,
-        meal_type=meal,
-        allow_one_extra=allow_one_extra,
-        spun_at=datetime.utcnow()
-    )
-    session.add(history_entry)
-    session.commit()
+    # Built before the spin is recorded: its commit would expire the recipe and reload it
+    response = {
+        **recipe_fields(recipe),
+        "extra_ingredients_count": extra_count,
+        "total_ingredients_count": total_ingredients,
+        "match_quality": match_quality
+    }
+    
+    # Add to spin history (queued when write-behind is enabled)
+    record_spin(session, recipe.id, meal, allow_one_extra)
+    RECIPE_SPINS.inc(meal_type=meal)
     
-    return RecipeMatchResponse(
-        id=recipe.id,
-        title=recipe.title,
-        source=recipe.source,
-        url=recipe.url,
-        meal_type=recipe.meal_type,
-        time_minutes=recipe.time_minutes,
-        image_url=recipe.image_url,
-        tags=recipe.tags,
-        steps_excerpt=recipe.steps_excerpt,
-        extra_ingredients_count=extra_count,
-        total_ingredients_count=total_ingredients,
-        match_quality=match_quality
-    )
+    return APIResponse(response)
+
+
+# Declared before /{recipe_id} so "search" is not taken for an ID
+@router.get("/search", response_model=RecipeSearchPage)
+def search_recipes_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in title, tags and steps"),
+    meal: Optional[str] = Query(None, description="Filter by meal type"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum recipes per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (stable while recipes are unchanged)"),
+    session: Session = Depends(get_session)
+):
+    """Full-text recipe search, best matches first.
+    
+    Cursors hold the last (score, id). Scores depend on the whole catalogue,
+    so after recipes are imported or edited a cursor from an earlier page can
+    repeat or skip results; start again from the first page.
+    """
+    if meal and meal not in ["breakfast", "lunch", "snack", "dinner"]:
+        raise HTTPException(status_code=400, detail="Invalid meal type")
+    
+    after = None
+    if cursor:
+        try:
+            score, recipe_id = decode_cursor(cursor, 2)
+            after = (float(score), int(recipe_id))
+        except (InvalidCursor, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Fetch one extra row to know whether another page exists
+    results = search_recipes(session, q, limit + 1, meal, after)
+    has_more = len(results) > limit
+    results = results[:limit]
+    
+    next_cursor = None
+    if has_more:
+        last_recipe, last_score = results[-1]
+        next_cursor = encode_cursor(last_score, last_recipe.id)
+    
+    items = [recipe_fields(recipe) for recipe, _ in results]
+    return APIResponse({"items": items, "next_cursor": next_cursor})
 
 
 @router.get("/{recipe_id}", response_model=RecipeWithIngredients)
@@ -65,36 +133,8 @@ def get_recipe_by_id(
     session: Session = Depends(get_session)
 ):
     """Get a specific recipe with its ingredients."""
-    recipe = session.get(Recipe, recipe_id)
-    if not recipe:
+    recipes = get_recipe_payloads(session, [recipe_id])
+    if not recipes:
         raise HTTPException(status_code=404, detail="Recipe not found")
     
-    # Get recipe ingredients
-    statement = (
-        select(RecipeIngredient, Ingredient)
-        .join(Ingredient)
-        .where(RecipeIngredient.recipe_id == recipe_id)
-    )
-    results = session.exec(statement).all()
-    
-    ingredients = [
-        {
-            "id": ingredient.id,
-            "name": ingredient.name,
-            "normalized": ingredient.normalized
-        }
-        for _, ingredient in results
-    ]
-    
-    return RecipeWithIngredients(
-        id=recipe.id,
-        title=recipe.title,
-        source=recipe.source,
-        url=recipe.url,
-        meal_type=recipe.meal_type,
-        time_minutes=recipe.time_minutes,
-        image_url=recipe.image_url,
-        tags=recipe.tags,
-        steps_excerpt=recipe.steps_excerpt,
-        ingredients=ingredients
-    )
\ No newline at end of file
+    return APIResponse(recipes[0])
@@ -1,34 +1,19 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlmodel import Session
+from app.core.serialization import NegotiatedRoute
 from app.db import get_session
-from app.models.models import Recipe, Ingredient, RecipeIngredient
 from app.models.schemas import SeedRecipe
-from app.services.normalization import normalize_ingredient
+from app.services.ndjson_import import NDJSONImporter, NDJSONLineReader, iter_file_lines
+from app.services.seed_import import import_recipes
 import json
 import os
+import zlib
 from app.core.settings import settings
 
-router = APIRouter(prefix="/api/import", tags=["seed"])
-
-
-def get_or_create_ingredient(session: Session, name: str) -> Ingredient:
-    """Get existing ingredient or create new one."""
-    normalized = normalize_ingredient(name)
-    
-    # Check if ingredient already exists
-    statement = select(Ingredient).where(Ingredient.normalized == normalized)
-    existing = session.exec(statement).first()
-    
-    if existing:
-        return existing
-    
-    # Create new ingredient
-    ingredient = Ingredient(name=name, normalized=normalized)
-    session.add(ingredient)
-    session.commit()
-    session.refresh(ingredient)
-    return ingredient
+router = APIRouter(prefix="/api/import", tags=["seed"], route_class=NegotiatedRoute)
 
 
 @router.post("/seed")
@@ -55,52 +40,54 @@ def import_seed_data(
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Failed to parse seed file: {str(e)}")
     
-    imported_count = 0
-    
-    for seed_recipe in recipes:
-        # Check if recipe already exists
-        statement = select(Recipe).where(Recipe.url == seed_recipe.url)
-        existing = session.exec(statement).first()
-        
-        if existing:
-            continue  # Skip existing recipes
-        
-        # Create ingredients and get their IDs
-        ingredient_ids = []
-        for ingredient_name in seed_recipe.ingredients:
-            ingredient = get_or_create_ingredient(session, ingredient_name)
-            ingredient_ids.append(ingredient.id)
-        
-        # Create recipe
-        recipe = Recipe(
-            title=seed_recipe.title,
-            source=seed_recipe.source,
-            url=seed_recipe.url,
-            meal_type=seed_recipe.meal_type,
-            time_minutes=seed_recipe.time_minutes,
-            image_url=seed_recipe.image_url,
-            tags=seed_recipe.tags,
-            steps_excerpt=seed_recipe.steps_excerpt,
-            normalized_ingredient_ids=ingredient_ids
-        )
-        session.add(recipe)
-        session.commit()
-        session.refresh(recipe)
-        
-        # Create recipe-ingredient relationships
-        for i, ingredient_name in enumerate(seed_recipe.ingredients):
-            ingredient = get_or_create_ingredient(session, ingredient_name)
-            recipe_ingredient = RecipeIngredient(
-                recipe_id=recipe.id,
-                ingredient_id=ingredient.id,
-                amount_text=ingredient_name  # Use original text as amount
-            )
-            session.add(recipe_ingredient)
-        
-        session.commit()
-        imported_count += 1
+    result = import_recipes(session, recipes)
     
     return {
-        "message": f"Successfully imported {imported_count} recipes",
-        "total_processed": len(recipes)
-    }
\ No newline at end of file
+        "message": f"Successfully imported {result['imported']} recipes",
+        "updated": result["updated"],
+        "total_processed": result["total_processed"]
+    }
+
+
+@router.post("/seed/stream")
+async def import_seed_stream(
+    request: Request,
+    batch_size: Optional[int] = Query(None, ge=1, le=10000, description="Recipes per import batch"),
+    session: Session = Depends(get_session)
+):
+    """Import seed recipes from an NDJSON (optionally gzip-compressed) body or file."""
+    importer = NDJSONImporter(session, batch_size)
+    reader = NDJSONLineReader()
+    received_body = False
+    
+    try:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            received_body = True
+            for line in reader.feed(chunk):
+                if importer.add(line):
+                    await run_in_threadpool(importer.flush)
+        for line in reader.close():
+            importer.add(line)
+    except (ValueError, zlib.error) as e:
+        return failed_import(importer, f"Failed to read NDJSON body: {str(e)}")
+    
+    if received_body:
+        return await run_in_threadpool(importer.finish)
+    
+    # If no body provided, stream the NDJSON seed file
+    if not os.path.exists(settings.seed_ndjson):
+        raise HTTPException(status_code=400, detail=f"Seed file not found: {settings.seed_ndjson}")
+    
+    try:
+        return await run_in_threadpool(importer.import_lines, iter_file_lines(settings.seed_ndjson))
+    except (ValueError, zlib.error) as e:
+        return failed_import(importer, f"Failed to read seed file: {str(e)}")
+
+
+def failed_import(importer: NDJSONImporter, error: str) -> JSONResponse:
+    """400 for unreadable input, with the report of any batches committed before the error."""
+    if not (importer.imported or importer.updated):
+        raise HTTPException(status_code=400, detail=error)
+    return JSONResponse(importer.abort(error), status_code=400)
@@ -0,0 +1,128 @@
+"""Spin history retention: roll old spins up into daily counts, then delete them."""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Date, cast, delete, func
+from sqlmodel import Session, select
+from app.core.settings import settings
+from app.db import dialect_insert, get_async_engine, get_engine
+from app.models.models import SpinHistory, SpinHistoryDaily
+
+logger = logging.getLogger(__name__)
+
+
+def _delete_expired(cutoff: datetime):
+    """DELETE of the spins older than `cutoff`, returning what the rollup needs."""
+    return (
+        delete(SpinHistory)
+        .where(SpinHistory.spun_at < cutoff)
+        .returning(SpinHistory.spun_at, SpinHistory.recipe_id, SpinHistory.meal_type)
+    )
+
+
+def _upsert_daily(dialect: str):
+    """INSERT into SpinHistoryDaily that adds to the counts of existing rows."""
+    statement = dialect_insert(dialect)(SpinHistoryDaily)
+    return statement.on_conflict_do_update(
+        index_elements=["day", "recipe_id", "meal_type"],
+        set_={"spin_count": SpinHistoryDaily.spin_count + statement.excluded.spin_count}
+    )
+
+
+def _postgres_rollup(cutoff: datetime):
+    """One statement whose DELETE ... RETURNING CTE feeds the grouped upsert.
+
+    Selects (daily rows written, spins deleted).
+    """
+    expired = _delete_expired(cutoff).cte("expired")
+    day = cast(expired.c.spun_at, Date)
+    counts = (
+        select(day.label("day"), expired.c.recipe_id, expired.c.meal_type, func.count().label("spin_count"))
+        .group_by(day, expired.c.recipe_id, expired.c.meal_type)
+        .cte("counts")
+    )
+    upsert = _upsert_daily("postgresql").from_select(["day", "recipe_id", "meal_type", "spin_count"], select(counts))
+    rolled = upsert.returning(SpinHistoryDaily.day).cte("rolled")
+    return select(
+        select(func.count()).select_from(rolled).scalar_subquery(),
+        select(func.coalesce(func.sum(counts.c.spin_count), 0)).scalar_subquery(),
+    )
+
+
+def _rollup_sqlite(session: Session, cutoff: datetime) -> Dict[str, int]:
+    # The DELETE takes SQLite's write lock before anything is counted
+    counts = Counter(
+        (spun_at.date(), recipe_id, meal_type)
+        for spun_at, recipe_id, meal_type in session.exec(_delete_expired(cutoff))
+    )
+    rows = [
+        {"day": spin_day, "recipe_id": recipe_id, "meal_type": meal_type, "spin_count": count}
+        for (spin_day, recipe_id, meal_type), count in counts.items()
+    ]
+    if rows:
+        session.exec(_upsert_daily("sqlite"), params=rows)
+    return {"rolled_up_rows": len(rows), "deleted": sum(counts.values())}
+
+
+def rollup_and_purge(session: Session, cutoff: datetime) -> Dict[str, int]:
+    """Roll spins older than `cutoff` into SpinHistoryDaily and delete them, in one transaction.
+
+    Only the rows this transaction's DELETE returned are counted. A job
+    running at the same time in another worker blocks on the same rows (or
+    on SQLite's write lock) until this one commits, then finds them gone, so
+    no spin is rolled up twice.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        rolled_up_rows, deleted = session.exec(_postgres_rollup(cutoff)).one()
+        result = {"rolled_up_rows": rolled_up_rows, "deleted": deleted}
+    else:
+        result = _rollup_sqlite(session, cutoff)
+    session.commit()
+    return result
+
+
+def apply_retention(session: Session, retention_days: Optional[int] = None) -> Dict[str, int]:
+    """Apply the retention policy, keeping the last `retention_days` days of raw spins."""
+    retention_days = retention_days if retention_days is not None else settings.history_retention_days
+    if retention_days <= 0:
+        return {"rolled_up_rows": 0, "deleted": 0}
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    return rollup_and_purge(session, cutoff)
+
+
+def run_retention_job() -> Dict[str, int]:
+    """Apply the retention policy with its own session."""
+    with Session(get_engine()) as session:
+        result = apply_retention(session)
+    logger.info("History retention: %(deleted)d spins rolled up into %(rolled_up_rows)d daily rows", result)
+    return result
+
+
+async def run_retention_job_async() -> Dict[str, int]:
+    """Apply the retention policy on the async engine (DB_ASYNC mode)."""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(get_async_engine()) as session:
+        result = await session.run_sync(apply_retention)
+    logger.info("History retention: %(deleted)d spins rolled up into %(rolled_up_rows)d daily rows", result)
+    return result
+
+
+async def retention_loop():
+    """Run the retention job every `history_retention_interval_seconds`.
+
+    With DB_ASYNC the job runs on the async engine, otherwise in a worker
+    thread, so the event loop is never blocked on the database.
+    """
+    while True:
+        try:
+            if settings.db_async:
+                await run_retention_job_async()
+            else:
+                await run_in_threadpool(run_retention_job)
+        except Exception:
+            logger.exception("History retention job failed")
+        await asyncio.sleep(settings.history_retention_interval_seconds)
@@ -0,0 +1,230 @@
+"""In-memory prefix index for ingredient autocomplete.
+
+Every word start of an ingredient's name and normalized form is folded
+(lowercase, Polish and other diacritics removed, so "zab" finds "ząbek
+czosnku") and kept in one sorted list of (key, ingredient_id) pairs, so the
+keys sharing a prefix are one contiguous run found by bisection. Matches are
+ranked by how many recipes use the ingredient. New ingredients and imported
+recipes update the index in place.
+"""
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlmodel import Session, select
+from app.core.settings import settings
+from app.db import run_blocking
+from app.models.models import Ingredient, RecipeIngredient
+from app.services.shared_build import SharedBuild
+
+# ł/Ł have no Unicode decomposition, so NFKD alone would keep them
+_FOLD_TABLE = str.maketrans({"ł": "l", "Ł": "l"})
+# Sorts after every folded key that starts with a given prefix
+_PREFIX_END = "\U0010ffff"
+MAX_LIMIT = 50
+# Keys per block with a precomputed top MAX_LIMIT; keys added since the last build wait in a small pending list
+BLOCK_SIZE = 256
+MAX_PENDING = 1024
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip diacritics and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text.translate(_FOLD_TABLE).lower())
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).split())
+
+
+def search_keys(*texts: str) -> List[str]:
+    """Folded keys for every word start of the texts ("ząbek czosnku" -> "zabek czosnku", "czosnku")."""
+    keys = []
+    for text in texts:
+        words = fold(text).split(" ")
+        keys.extend(" ".join(words[start:]) for start in range(len(words)))
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+class IngredientSearchIndex:
+    """Sorted (key, ingredient_id) pairs, cut into blocks that know their best ingredients.
+
+    A prefix matches a contiguous run of keys. Whole blocks inside the run
+    contribute their precomputed top ingredients; only the partial blocks at
+    its ends and the pending keys are scanned, so short, common prefixes cost
+    about the same as long ones. Writers hold a lock; readers do not and see
+    the structure before or after each change.
+    """
+
+    def __init__(self):
+        self.ingredients: Dict[int, Tuple[str, str]] = {}
+        self.recipe_counts: Dict[int, int] = {}
+        self.built_at = time.monotonic()
+        # (sorted entries, top ingredient IDs per block), replaced as a whole
+        self._blocks: Tuple[List[Tuple[str, int]], List[List[int]]] = ([], [])
+        self._pending: List[Tuple[str, int]] = []
+        self._rank_keys: Dict[int, Tuple[int, int, str]] = {}
+        self._blocks_stale = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(
+        cls,
+        ingredients: Iterable[Tuple[int, str, str]],
+        recipe_counts: Iterable[Tuple[int, int]] = ()
+    ) -> "IngredientSearchIndex":
+        """Build the index from (id, name, normalized) rows and (id, recipe count) rows."""
+        index = cls()
+        entries = []
+        for ingredient_id, name, normalized in ingredients:
+            index.ingredients[ingredient_id] = (name, normalized)
+            entries.extend((key, ingredient_id) for key in search_keys(name, normalized))
+        index.recipe_counts.update((ingredient_id, count) for ingredient_id, count in recipe_counts)
+        for ingredient_id in index.ingredients:
+            index._update_rank_key(ingredient_id)
+        entries.sort()
+        index._blocks = (entries, index._block_tops(entries))
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ingredients)
+
+    def _update_rank_key(self, ingredient_id: int):
+        # Most used first, then shorter, then alphabetical
+        name = self.ingredients[ingredient_id][0]
+        self._rank_keys[ingredient_id] = (-self.recipe_counts.get(ingredient_id, 0), len(name), name)
+
+    def _block_tops(self, entries: List[Tuple[str, int]]) -> List[List[int]]:
+        rank_key = self._rank_keys.__getitem__
+        return [
+            heapq.nsmallest(MAX_LIMIT, {ingredient_id for _, ingredient_id in entries[start:start + BLOCK_SIZE]},
+                            key=rank_key)
+            for start in range(0, len(entries), BLOCK_SIZE)
+        ]
+
+    def _rebuild_blocks(self):
+        # Caller holds the lock; blocks are published before pending is emptied
+        entries = sorted(self._blocks[0] + self._pending)
+        self._blocks = (entries, self._block_tops(entries))
+        self._pending = []
+        self._blocks_stale = False
+
+    def add(self, ingredient_id: int, name: str, normalized: str):
+        """Index a new ingredient; known IDs are ignored."""
+        with self._lock:
+            if ingredient_id in self.ingredients:
+                return
+            self.ingredients[ingredient_id] = (name, normalized)
+            self._update_rank_key(ingredient_id)
+            pending = sorted(self._pending + [(key, ingredient_id) for key in search_keys(name, normalized)])
+            self._pending = pending
+            if len(pending) > MAX_PENDING:
+                self._rebuild_blocks()
+
+    def add_recipe_counts(self, counts: Dict[int, int]):
+        """Add recipe usages per ingredient ID (after recipes are imported)."""
+        with self._lock:
+            for ingredient_id, count in counts.items():
+                if ingredient_id in self.ingredients:
+                    self.recipe_counts[ingredient_id] = self.recipe_counts.get(ingredient_id, 0) + count
+                    self._update_rank_key(ingredient_id)
+            # Block tops are recomputed on the next search
+            self._blocks_stale = True
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, str, str, int]]:
+        """Top `limit` (id, name, normalized, recipe_count) whose name or normalized form has a word starting with `query`."""
+        prefix = fold(query)
+        if not prefix:
+            return []
+        if self._blocks_stale:
+            with self._lock:
+                if self._blocks_stale:
+                    self._rebuild_blocks()
+
+        pending = self._pending
+        entries, block_tops = self._blocks
+        end_key = (prefix + _PREFIX_END,)
+        low = bisect.bisect_left(entries, (prefix,))
+        high = bisect.bisect_left(entries, end_key)
+        first_block = -(-low // BLOCK_SIZE)
+        last_block = high // BLOCK_SIZE
+        if first_block >= last_block:
+            scanned = entries[low:high]
+        else:
+            scanned = entries[low:first_block * BLOCK_SIZE] + entries[last_block * BLOCK_SIZE:high]
+        scanned += pending[bisect.bisect_left(pending, (prefix,)):bisect.bisect_left(pending, end_key)]
+        candidates = {ingredient_id for _, ingredient_id in scanned}
+        for top in block_tops[first_block:last_block]:
+            candidates.update(top[:limit])
+
+        ranked = heapq.nsmallest(limit, candidates, key=self._rank_keys.__getitem__)
+        return [(ingredient_id, *self.ingredients[ingredient_id], self.recipe_counts.get(ingredient_id, 0))
+                for ingredient_id in ranked]
+
+
+_index: Optional[IngredientSearchIndex] = None
+_builds: SharedBuild[IngredientSearchIndex] = SharedBuild()
+# Bumped on every invalidation so a build that started earlier is not published
+_generation = 0
+
+
+def build_ingredient_search_index(session: Session) -> IngredientSearchIndex:
+    """Build a fresh index from the ingredient table and recipe usage counts."""
+    counts = select(RecipeIngredient.ingredient_id, func.count()).group_by(RecipeIngredient.ingredient_id)
+    ingredients = session.exec(select(Ingredient.id, Ingredient.name, Ingredient.normalized)).all()
+    return run_blocking(IngredientSearchIndex.build, ingredients, session.exec(counts).all())
+
+
+def get_ingredient_search_index(session: Session) -> IngredientSearchIndex:
+    """Get the process-wide index, building it if missing or older than the recipe index TTL.
+
+    Like the recipe index, one build per generation is shared by every caller
+    that has no index to use meanwhile.
+    """
+    index = _index
+    if index is not None and not _is_expired(index):
+        return index
+
+    generation = _generation
+
+    def build() -> IngredientSearchIndex:
+        global _index
+        built = build_ingredient_search_index(session)
+        if generation == _generation:
+            _index = built
+        return built
+
+    return _builds.get(generation, build, stale=index)
+
+
+def index_ingredient(ingredient_id: int, name: str, normalized: str):
+    """Add a committed ingredient to the index, if one is built."""
+    index = _index
+    if index is not None:
+        index.add(ingredient_id, name, normalized)
+
+
+def index_imported_recipes(ingredients: Dict[int, Tuple[str, str]], recipe_counts: Dict[int, int]):
+    """Apply a committed import: ingredient ID -> (name, normalized) and new recipe usages per ID.
+
+    A build running concurrently may or may not have seen the import, so it
+    is not published; the next search rebuilds.
+    """
+    global _generation
+    _generation += 1
+    index = _index
+    if index is not None:
+        for ingredient_id, (name, normalized) in ingredients.items():
+            index.add(ingredient_id, name, normalized)
+        index.add_recipe_counts(recipe_counts)
+
+
+def invalidate_ingredient_search_index():
+    """Drop the index so the next search rebuilds it."""
+    global _index, _generation
+    _generation += 1
+    _index = None
+
+
+def _is_expired(index: IngredientSearchIndex) -> bool:
+    ttl = settings.recipe_index_ttl_seconds
+    return ttl > 0 and time.monotonic() - index.built_at > ttl
@@ -0,0 +1,188 @@
+"""Streaming recipe import from newline-delimited JSON (optionally gzip-compressed).
+
+Input is read incrementally, validated and imported in fixed-size batches, so
+memory use does not depend on the size of the dump.
+"""
+import json
+import logging
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlmodel import Session
+from app.core.settings import settings
+from app.models.schemas import SeedRecipe
+from app.services.recipe_index import invalidate_recipe_index
+from app.services.seed_import import import_chunk
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+FILE_READ_SIZE = 64 * 1024
+# Most decompressed bytes produced per step, so a small, highly compressed chunk cannot expand all at once
+DECOMPRESS_STEP = 64 * 1024
+
+
+class NDJSONLineReader:
+    """Split a byte stream into lines, transparently decompressing gzip input.
+
+    feed() and close() are generators: gzip input is inflated DECOMPRESS_STEP
+    bytes at a time and its lines are handed out before the next step, so
+    memory stays bounded however well the input compresses. Input made of
+    several gzip members, e.g. concatenated shards, is read member by member.
+    """
+
+    def __init__(self, max_line_bytes: Optional[int] = None):
+        self.max_line_bytes = max_line_bytes or settings.seed_max_line_bytes
+        self._head = b""
+        self._decompressor = None
+        self._detected = False
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        """Add raw bytes and yield the complete lines they finish."""
+        if not self._detected:
+            # Need two bytes to tell gzip from plain text
+            self._head += chunk
+            if len(self._head) < len(GZIP_MAGIC):
+                return
+            chunk, self._head = self._head, b""
+            self._detected = True
+            if chunk.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        if self._decompressor is None:
+            yield from self._split(chunk)
+            return
+        while chunk:
+            if self._decompressor.eof:
+                # Concatenated gzip members (cat *.ndjson.gz), possibly zero-padded like gzip allows
+                chunk = chunk.lstrip(b"\x00")
+                if not chunk:
+                    break
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            yield from self._split(self._decompressor.decompress(chunk, DECOMPRESS_STEP))
+            chunk = self._decompressor.unconsumed_tail or self._decompressor.unused_data
+
+    def close(self) -> Iterator[bytes]:
+        """Flush buffered input and yield the remaining lines."""
+        if not self._detected and self._head:
+            yield from self._split(self._head)
+        if self._decompressor is not None:
+            yield from self._split(self._decompressor.flush())
+        if self._buffer:
+            line, self._buffer = self._buffer, b""
+            yield line
+
+    def _split(self, data: bytes) -> List[bytes]:
+        *lines, self._buffer = (self._buffer + data).split(b"\n")
+        if len(self._buffer) > self.max_line_bytes or any(len(line) > self.max_line_bytes for line in lines):
+            raise ValueError(f"NDJSON line longer than {self.max_line_bytes} bytes")
+        return lines
+
+
+def iter_file_lines(path: str) -> Iterator[bytes]:
+    """Yield lines of a plain or gzip-compressed NDJSON file without loading it."""
+    reader = NDJSONLineReader()
+    with open(path, "rb") as f:
+        while chunk := f.read(FILE_READ_SIZE):
+            yield from reader.feed(chunk)
+    yield from reader.close()
+
+
+class NDJSONImporter:
+    """Validate and import NDJSON recipe lines in fixed-size batches."""
+
+    def __init__(self, session: Session, batch_size: Optional[int] = None):
+        self.session = session
+        self.batch_size = batch_size or settings.seed_import_chunk_size
+        self.pending: List[Tuple[int, bytes]] = []
+        self.line_number = 0
+        self.imported = 0
+        self.updated = 0
+        self.processed = 0
+        self.rejected_count = 0
+        self.rejected: List[Dict[str, Any]] = []
+        self.batches: List[Dict[str, int]] = []
+
+    def add(self, line: bytes) -> bool:
+        """Queue one line; returns True once a full batch is waiting."""
+        self.line_number += 1
+        if line.strip():
+            self.pending.append((self.line_number, line))
+        return len(self.pending) >= self.batch_size
+
+    def flush(self):
+        """Validate and import the queued lines in one transaction."""
+        if not self.pending:
+            return
+
+        recipes = []
+        rejected = 0
+        for line_number, line in self.pending:
+            try:
+                recipes.append(SeedRecipe(**json.loads(line)))
+            except (ValueError, TypeError, ValidationError) as e:
+                rejected += 1
+                self._reject(line_number, e)
+
+        result = import_chunk(self.session, recipes) if recipes else {"imported": 0, "updated": 0}
+        imported, updated = result["imported"], result["updated"]
+        self.imported += imported
+        self.updated += updated
+        self.processed += len(self.pending)
+        self.rejected_count += rejected
+
+        progress = {
+            "batch": len(self.batches) + 1,
+            "first_line": self.pending[0][0],
+            "last_line": self.pending[-1][0],
+            "imported": imported,
+            "updated": updated,
+            "skipped": len(recipes) - imported - updated,
+            "rejected": rejected,
+        }
+        self.batches.append(progress)
+        logger.info("Seed import batch %(batch)d: lines %(first_line)d-%(last_line)d, "
+                    "%(imported)d imported, %(updated)d updated, %(skipped)d skipped, %(rejected)d rejected", progress)
+        self.pending = []
+
+    def import_lines(self, lines: Iterable[bytes]) -> Dict[str, Any]:
+        """Import every line, then finish."""
+        for line in lines:
+            if self.add(line):
+                self.flush()
+        return self.finish()
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush the last partial batch and return the import report."""
+        self.flush()
+        return {"message": f"Successfully imported {self.imported} recipes", **self.committed()}
+
+    def abort(self, error: str) -> Dict[str, Any]:
+        """Report for input that failed part-way: queued lines are dropped, committed batches stay."""
+        self.pending = []
+        return {"detail": error, **self.committed()}
+
+    def committed(self) -> Dict[str, Any]:
+        """Counts and batches committed so far; drops the recipe index if recipes changed."""
+        if self.imported or self.updated:
+            invalidate_recipe_index()
+        return {
+            "imported": self.imported,
+            "updated": self.updated,
+            "total_processed": self.processed,
+            "rejected_count": self.rejected_count,
+            "rejected": self.rejected,
+            "batches": self.batches,
+        }
+
+    def _reject(self, line_number: int, error: Exception):
+        # Keep only the first few errors so the report stays small
+        if len(self.rejected) < settings.seed_max_rejected_reported:
+            message = str(error).splitlines()[0] if str(error) else type(error).__name__
+            self.rejected.append({"line": line_number, "error": message})
+
+
+def import_ndjson_lines(session: Session, lines: Iterable[bytes], batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Import recipes from an iterable of NDJSON lines."""
+    return NDJSONImporter(session, batch_size).import_lines(lines)
@@ -1,6 +1,10 @@
 import json
 import os
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+# Bounded memo for repeated inputs (ingredient names repeat heavily)
+NORMALIZE_CACHE_SIZE = 8192
 
 def load_synonyms() -> Dict[str, List[str]]:
     shared_dir = os.path.join(os.path.dirname(__file__), "../../../..", "packages", "shared")
@@ -8,15 +12,57 @@ def load_synonyms() -> Dict[str, List[str]]:
         data = json.load(f)
     return data['synonyms']
 
-SYNONYMS = load_synonyms()
+def _synonyms() -> Dict[str, List[str]]:
+    """SYNONYMS, read from ingredients.json on first use rather than at import."""
+    synonyms = globals().get("SYNONYMS")
+    if synonyms is None:
+        synonyms = globals()["SYNONYMS"] = load_synonyms()
+    return synonyms
 
-def normalize_ingredient(name: str) -> str:
-    """Normalize ingredient name to canonical form."""
+def __getattr__(name: str):
+    # Module attribute SYNONYMS is loaded lazily (PEP 562)
+    if name == "SYNONYMS":
+        return _synonyms()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_lookup: Dict[str, str] = {}
+_lookup_source: Optional[Dict[str, List[str]]] = None
+
+def compile_synonyms(synonyms: Dict[str, List[str]]) -> Dict[str, str]:
+    """Compile base -> variants into a variant -> base map.
+
+    Bases are visited in order and the first base listing a word (or equal to it)
+    wins, matching the original linear scan.
+    """
+    lookup: Dict[str, str] = {}
+    for base, variants in synonyms.items():
+        for variant in variants:
+            lookup.setdefault(variant, base)
+        lookup.setdefault(base, base)
+    return lookup
+
+def _synonym_lookup() -> Dict[str, str]:
+    """Compiled map for the current SYNONYMS, recompiled if SYNONYMS is replaced."""
+    global _lookup, _lookup_source
+    synonyms = _synonyms()
+    if _lookup_source is not synonyms:
+        _lookup = compile_synonyms(synonyms)
+        _lookup_source = synonyms
+        _normalize_cached.cache_clear()
+    return _lookup
+
+def clear_normalization_cache():
+    """Forget the compiled map and memo (call after editing SYNONYMS in place)."""
+    global _lookup_source
+    _lookup_source = None
+    _normalize_cached.cache_clear()
+
+def _normalize(name: str, lookup: Dict[str, str]) -> str:
     normalized = name.lower().strip()
     
-    for base, synonyms in SYNONYMS.items():
-        if normalized in synonyms or base == normalized:
-            return base
+    base = lookup.get(normalized)
+    if base is not None:
+        return base
     
     if normalized.endswith('y') and len(normalized) > 2:
         return normalized[:-1]
@@ -25,4 +71,28 @@ def normalize_ingredient(name: str) -> str:
     if normalized.endswith('ów') and len(normalized) > 3:
         return normalized[:-2]
     
-    return normalized
\ No newline at end of file
+    return normalized
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_cached(name: str) -> str:
+    return _normalize(name, _lookup)
+
+def normalize_ingredient(name: str) -> str:
+    """Normalize ingredient name to canonical form."""
+    _synonym_lookup()
+    return _normalize_cached(name)
+
+def normalize_many(names: Iterable[str]) -> List[str]:
+    """Normalize a batch of names, computing each distinct name once.
+
+    Bypasses the memo so large imports do not evict the hot entries.
+    """
+    lookup = _synonym_lookup()
+    seen: Dict[str, str] = {}
+    results = []
+    for name in names:
+        normalized = seen.get(name)
+        if normalized is None:
+            normalized = seen[name] = _normalize(name, lookup)
+        results.append(normalized)
+    return results
@@ -0,0 +1,103 @@
+"""Per-user liked and banned ingredients.
+
+Preferences are rows in the LikedIngredient / BannedIngredient join tables,
+keyed by (user_id, ingredient_id). Adding or removing an ingredient is one
+idempotent INSERT ... ON CONFLICT DO NOTHING or DELETE, so concurrent edits
+by the same or different users never overwrite each other.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Type, Union
+from fastapi import Header
+from sqlalchemy import delete, literal, union_all
+from sqlmodel import Session, select
+from app.core.settings import settings
+from app.db import dialect_insert
+from app.models.models import BannedIngredient, Ingredient, LikedIngredient, Preferences
+
+PreferenceModel = Type[Union[LikedIngredient, BannedIngredient]]
+
+
+@dataclass
+class UserPreferences:
+    """Liked and banned ingredient IDs of one user."""
+    liked_ids: List[int] = field(default_factory=list)
+    banned_ids: List[int] = field(default_factory=list)
+
+
+def get_user_id(
+    x_user_id: Optional[str] = Header(None, max_length=64, description="User or household ID")
+) -> str:
+    """User ID dependency: the X-User-Id header, or DEFAULT_USER_ID when absent."""
+    return x_user_id or settings.default_user_id
+
+
+def get_preferences(session: Session, user_id: Optional[str] = None) -> UserPreferences:
+    """Get a user's liked and banned ingredient IDs (one UNION ALL query)."""
+    user_id = user_id or settings.default_user_id
+    statement = union_all(
+        select(LikedIngredient.ingredient_id, literal(True).label("liked")).where(LikedIngredient.user_id == user_id),
+        select(BannedIngredient.ingredient_id, literal(False).label("liked")).where(BannedIngredient.user_id == user_id)
+    )
+    prefs = UserPreferences()
+    for ingredient_id, liked in session.exec(statement):
+        (prefs.liked_ids if liked else prefs.banned_ids).append(ingredient_id)
+    return prefs
+
+
+def get_preference_ingredients(session: Session, model: PreferenceModel, user_id: str) -> List[Ingredient]:
+    """Ingredients in one of the user's preference lists."""
+    statement = (
+        select(Ingredient)
+        .join(model, model.ingredient_id == Ingredient.id)
+        .where(model.user_id == user_id)
+    )
+    return list(session.exec(statement))
+
+
+def _insert_ignore(dialect: str, model: PreferenceModel):
+    return dialect_insert(dialect)(model).on_conflict_do_nothing(index_elements=["user_id", "ingredient_id"])
+
+
+def add_preference(session: Session, model: PreferenceModel, user_id: str, ingredient_id: int):
+    """Add an ingredient to a preference list; adding it twice is a no-op."""
+    statement = _insert_ignore(session.get_bind().dialect.name, model)
+    session.exec(statement, params=[{"user_id": user_id, "ingredient_id": ingredient_id}])
+    session.commit()
+
+
+def remove_preference(session: Session, model: PreferenceModel, user_id: str, ingredient_id: int):
+    """Remove an ingredient from a preference list if present."""
+    session.exec(
+        delete(model).where(model.user_id == user_id, model.ingredient_id == ingredient_id)
+    )
+    session.commit()
+
+
+def migrate_legacy_preferences(connection) -> int:
+    """Move the legacy JSON Preferences row to DEFAULT_USER_ID; returns rows moved.
+
+    Runs on startup inside the schema transaction and is a no-op once the
+    legacy row is gone. Ingredient IDs that no longer exist are dropped.
+    """
+    row = connection.execute(
+        select(Preferences.liked_ids, Preferences.banned_ids).where(Preferences.id == 1)
+    ).first()
+    if row is None:
+        return 0
+
+    legacy_ids = set(row.liked_ids or []) | set(row.banned_ids or [])
+    existing_ids = set(connection.execute(select(Ingredient.id).where(Ingredient.id.in_(legacy_ids))).scalars())
+    dialect = connection.dialect.name
+    moved = 0
+    for model, ingredient_ids in ((LikedIngredient, row.liked_ids), (BannedIngredient, row.banned_ids)):
+        params = [
+            {"user_id": settings.default_user_id, "ingredient_id": ingredient_id}
+            for ingredient_id in dict.fromkeys(ingredient_ids or [])
+            if ingredient_id in existing_ids
+        ]
+        if params:
+            connection.execute(_insert_ignore(dialect, model), params)
+            moved += len(params)
+
+    connection.execute(delete(Preferences).where(Preferences.id == 1))
+    return moved
@@ -1,20 +1,16 @@
 from typing import List, Set, Optional
 from sqlmodel import Session, select
-from app.models.models import Recipe, Preferences, SpinHistory
+from app.core.metrics import RECIPE_MATCH_FALLBACKS
+from app.core.settings import settings
+from app.db import run_blocking
+from app.models.models import Recipe, SpinHistory
+from app.services.preferences import UserPreferences, get_preferences
+from app.services.recipe_index import get_recipe_index
+from app.services.sql_matcher import matching_recipe_ids, pick_recipe
+from app.services.spin_buffer import pending_recent_spins
 import random
 
 
-def get_preferences(session: Session) -> Preferences:
-    """Get user preferences, create default if not exists."""
-    prefs = session.get(Preferences, 1)
-    if not prefs:
-        prefs = Preferences(id=1, liked_ids=[], banned_ids=[])
-        session.add(prefs)
-        session.commit()
-        session.refresh(prefs)
-    return prefs
-
-
 def count_extra_ingredients(recipe: Recipe, liked_ids: Set[int]) -> int:
     """Count how many recipe ingredients are not in the liked list."""
     if not recipe.normalized_ingredient_ids:
@@ -38,27 +34,40 @@ def has_banned_ingredients(recipe: Recipe, banned_ids: Set[int]) -> bool:
 
 def get_recent_recipe_ids(session: Session, meal_type: str, limit: int = 5) -> Set[int]:
     """Get recently spun recipe IDs for the given meal type."""
+    # Spins still waiting in the write-behind buffer are the newest ones
+    pending = pending_recent_spins(meal_type)
+    if len(pending) >= limit:
+        return {recipe_id for recipe_id, _ in pending[:limit]}
+    
     statement = (
-        select(SpinHistory.recipe_id)
+        select(SpinHistory.recipe_id, SpinHistory.spun_at)
         .where(SpinHistory.meal_type == meal_type)
         .order_by(SpinHistory.spun_at.desc())
         .limit(limit)
     )
-    results = session.exec(statement).all()
-    return set(results)
+    # A batch being flushed can be committed while still listed as pending: count each spin once
+    spins = set(pending) | {(recipe_id, spun_at) for recipe_id, spun_at in session.exec(statement).all()}
+    newest = sorted(spins, key=lambda spin: spin[1], reverse=True)[:limit]
+    return {recipe_id for recipe_id, _ in newest}
 
 
 def filter_recipes(
     session: Session,
     meal_type: str,
     allow_one_extra: bool,
-    hide_recent: bool = False
+    hide_recent: bool = False,
+    user_id: Optional[str] = None
 ) -> List[Recipe]:
     """Filter recipes based on meal type and ingredient preferences."""
+    if settings.recipe_matcher == "sql":
+        return _filter_recipes_sql(session, meal_type, allow_one_extra, hide_recent, user_id)
+    if settings.recipe_matcher != "python":
+        return _filter_recipes_indexed(session, meal_type, allow_one_extra, hide_recent, user_id)
+    
     statement = select(Recipe).where(Recipe.meal_type == meal_type)
     all_recipes = list(session.exec(statement))
     
-    prefs = get_preferences(session)
+    prefs = get_preferences(session, user_id)
     liked_ids = set(prefs.liked_ids)
     banned_ids = set(prefs.banned_ids)
     
@@ -89,23 +98,34 @@ def get_best_matching_recipe(
     session: Session,
     meal_type: str,
     allow_one_extra: bool,
-    hide_recent: bool = False
+    hide_recent: bool = False,
+    user_id: Optional[str] = None,
+    prefs: Optional[UserPreferences] = None
 ) -> Optional[Recipe]:
-    """Get the best matching recipe, fallback to closest match if no perfect match."""
+    """Get the best matching recipe, fallback to closest match if no perfect match.
+    
+    Callers that already loaded the user's preferences can pass them as `prefs`.
+    """
+    if settings.recipe_matcher == "sql":
+        return _best_matching_recipe_sql(session, meal_type, allow_one_extra, hide_recent, user_id)
+    if settings.recipe_matcher != "python":
+        return _best_matching_recipe_indexed(session, meal_type, allow_one_extra, hide_recent, user_id, prefs)
+    
     # First try to get perfect matches
-    valid_recipes = filter_recipes(session, meal_type, allow_one_extra, hide_recent)
+    valid_recipes = filter_recipes(session, meal_type, allow_one_extra, hide_recent, user_id)
     
     if valid_recipes:
         return random.choice(valid_recipes)
     
     # If no perfect matches, find the best available recipes
+    RECIPE_MATCH_FALLBACKS.inc(matcher="python", meal_type=meal_type)
     statement = select(Recipe).where(Recipe.meal_type == meal_type)
     all_recipes = list(session.exec(statement))
     
     if not all_recipes:
         return None
     
-    prefs = get_preferences(session)
+    prefs = get_preferences(session, user_id)
     liked_ids = set(prefs.liked_ids)
     banned_ids = set(prefs.banned_ids)
     recent_ids = get_recent_recipe_ids(session, meal_type) if hide_recent else set()
@@ -139,6 +159,112 @@ def get_best_matching_recipe(
     return random.choice(best_recipes)
 
 
+def _filter_recipes_indexed(
+    session: Session,
+    meal_type: str,
+    allow_one_extra: bool,
+    hide_recent: bool,
+    user_id: Optional[str] = None
+) -> List[Recipe]:
+    """Filter recipes using the in-memory ingredient index."""
+    prefs = get_preferences(session, user_id)
+    recent_ids = get_recent_recipe_ids(session, meal_type) if hide_recent else set()
+    
+    index = get_recipe_index(session)
+    recipe_ids = run_blocking(
+        index.matching_ids,
+        meal_type,
+        set(prefs.liked_ids),
+        set(prefs.banned_ids),
+        max_extra=1 if allow_one_extra else 0,
+        exclude_ids=recent_ids
+    )
+    if not recipe_ids:
+        return []
+    
+    statement = select(Recipe).where(Recipe.id.in_(recipe_ids))
+    return list(session.exec(statement))
+
+
+def _best_matching_recipe_indexed(
+    session: Session,
+    meal_type: str,
+    allow_one_extra: bool,
+    hide_recent: bool,
+    user_id: Optional[str] = None,
+    prefs: Optional[UserPreferences] = None
+) -> Optional[Recipe]:
+    """Pick a recipe using the in-memory ingredient index; only the winner is loaded."""
+    prefs = prefs or get_preferences(session, user_id)
+    liked_ids = set(prefs.liked_ids)
+    banned_ids = set(prefs.banned_ids)
+    recent_ids = get_recent_recipe_ids(session, meal_type) if hide_recent else set()
+    
+    index = get_recipe_index(session)
+    recipe_ids = run_blocking(
+        index.matching_ids,
+        meal_type,
+        liked_ids,
+        banned_ids,
+        max_extra=1 if allow_one_extra else 0,
+        exclude_ids=recent_ids
+    )
+    
+    # If no perfect matches, fall back to the recipes with the fewest extras
+    if not recipe_ids:
+        RECIPE_MATCH_FALLBACKS.inc(matcher=settings.recipe_matcher, meal_type=meal_type)
+        recipe_ids = run_blocking(index.best_ids, meal_type, liked_ids, banned_ids, exclude_ids=recent_ids)
+    
+    if not recipe_ids:
+        return None
+    
+    return session.get(Recipe, random.choice(recipe_ids))
+
+
+def _filter_recipes_sql(
+    session: Session,
+    meal_type: str,
+    allow_one_extra: bool,
+    hide_recent: bool,
+    user_id: Optional[str] = None
+) -> List[Recipe]:
+    """Filter recipes in the database; only matching rows are loaded."""
+    recent_ids = get_recent_recipe_ids(session, meal_type) if hide_recent else set()
+    candidates = matching_recipe_ids(
+        meal_type,
+        user_id or settings.default_user_id,
+        max_extra=1 if allow_one_extra else 0,
+        exclude_ids=recent_ids
+    )
+    statement = select(Recipe).where(Recipe.id.in_(candidates.scalar_subquery()))
+    return list(session.exec(statement))
+
+
+def _best_matching_recipe_sql(
+    session: Session,
+    meal_type: str,
+    allow_one_extra: bool,
+    hide_recent: bool,
+    user_id: Optional[str] = None
+) -> Optional[Recipe]:
+    """Pick a recipe in the database, including the closest-match fallback."""
+    recent_ids = get_recent_recipe_ids(session, meal_type) if hide_recent else set()
+    picked = pick_recipe(
+        session,
+        meal_type,
+        user_id or settings.default_user_id,
+        max_extra=1 if allow_one_extra else 0,
+        exclude_ids=recent_ids
+    )
+    if picked is None:
+        return None
+    
+    recipe_id, is_fallback = picked
+    if is_fallback:
+        RECIPE_MATCH_FALLBACKS.inc(matcher="sql", meal_type=meal_type)
+    return session.get(Recipe, recipe_id)
+
+
 def get_match_quality(extra_count: int, allow_one_extra: bool) -> str:
     """Determine match quality based on extra ingredients count."""
     if extra_count == 0:
@@ -0,0 +1,174 @@
+"""In-memory ingredient index used to match recipes without loading ORM rows.
+
+Every recipe's ingredient set is stored as a dense bitset (a Python int) over
+compacted ingredient IDs, partitioned by meal type. Banned checks become a
+bitwise AND and the extra-ingredient count becomes a popcount.
+"""
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlmodel import Session, select
+from app.core.settings import settings
+from app.db import run_blocking
+from app.models.models import Recipe
+from app.services.shared_build import SharedBuild
+
+logger = logging.getLogger(__name__)
+
+
+class MealTypePartition:
+    """Recipe bitsets for a single meal type."""
+
+    def __init__(self):
+        self.recipe_ids: List[int] = []
+        self.bitsets: List[int] = []
+
+    def add(self, recipe_id: int, bitset: int):
+        self.recipe_ids.append(recipe_id)
+        self.bitsets.append(bitset)
+
+
+class RecipeIndex:
+    """Bitset index over recipe ingredients, partitioned by meal type."""
+
+    def __init__(self):
+        self.bit_positions: Dict[int, int] = {}
+        self.partitions: Dict[str, MealTypePartition] = {}
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, str, Optional[List[int]]]]) -> "RecipeIndex":
+        """Build the index from (recipe_id, meal_type, ingredient_ids) rows."""
+        index = cls()
+        for recipe_id, meal_type, ingredient_ids in rows:
+            bitset = 0
+            for ingredient_id in ingredient_ids or []:
+                position = index.bit_positions.setdefault(ingredient_id, len(index.bit_positions))
+                bitset |= 1 << position
+            partition = index.partitions.setdefault(meal_type, MealTypePartition())
+            partition.add(recipe_id, bitset)
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(partition.recipe_ids) for partition in self.partitions.values())
+
+    def mask(self, ingredient_ids: Iterable[int]) -> int:
+        """Bitset of the given ingredient IDs; IDs used by no recipe are ignored."""
+        mask = 0
+        for ingredient_id in ingredient_ids:
+            position = self.bit_positions.get(ingredient_id)
+            if position is not None:
+                mask |= 1 << position
+        return mask
+
+    def score(
+        self,
+        meal_type: str,
+        liked_ids: Set[int],
+        banned_ids: Set[int],
+        exclude_ids: Optional[Set[int]] = None
+    ) -> List[Tuple[int, int]]:
+        """Return (recipe_id, extra_count) for every recipe without banned ingredients."""
+        partition = self.partitions.get(meal_type)
+        if partition is None:
+            return []
+
+        not_liked = ~self.mask(liked_ids)
+        banned_mask = self.mask(banned_ids)
+        exclude_ids = exclude_ids or set()
+
+        scored = []
+        for recipe_id, bitset in zip(partition.recipe_ids, partition.bitsets):
+            if bitset & banned_mask or recipe_id in exclude_ids:
+                continue
+            scored.append((recipe_id, (bitset & not_liked).bit_count()))
+        return scored
+
+    def matching_ids(
+        self,
+        meal_type: str,
+        liked_ids: Set[int],
+        banned_ids: Set[int],
+        max_extra: int,
+        exclude_ids: Optional[Set[int]] = None
+    ) -> List[int]:
+        """IDs of recipes with at most `max_extra` ingredients outside the liked list."""
+        return [
+            recipe_id
+            for recipe_id, extra_count in self.score(meal_type, liked_ids, banned_ids, exclude_ids)
+            if extra_count <= max_extra
+        ]
+
+    def best_ids(
+        self,
+        meal_type: str,
+        liked_ids: Set[int],
+        banned_ids: Set[int],
+        exclude_ids: Optional[Set[int]] = None
+    ) -> List[int]:
+        """IDs of the recipes with the lowest extra-ingredient count."""
+        scored = self.score(meal_type, liked_ids, banned_ids, exclude_ids)
+        if not scored:
+            return []
+        best_score = min(extra_count for _, extra_count in scored)
+        return [recipe_id for recipe_id, extra_count in scored if extra_count == best_score]
+
+
+_index: Optional[RecipeIndex] = None
+_builds: SharedBuild[RecipeIndex] = SharedBuild()
+# Bumped on every invalidation so a build that started earlier is not published
+_generation = 0
+
+
+def get_index_class():
+    """Index implementation selected by the `recipe_matcher` setting."""
+    if settings.recipe_matcher == "sparse":
+        try:
+            from app.services.sparse_index import SparseRecipeIndex
+        except ImportError:
+            logger.warning("numpy/scipy not installed, falling back to the bitset recipe matcher")
+        else:
+            return SparseRecipeIndex
+    return RecipeIndex
+
+
+def build_recipe_index(session: Session) -> RecipeIndex:
+    """Build a fresh index from the recipe table."""
+    statement = select(Recipe.id, Recipe.meal_type, Recipe.normalized_ingredient_ids)
+    rows = session.exec(statement).all()
+    return run_blocking(get_index_class().build, rows)
+
+
+def get_recipe_index(session: Session) -> RecipeIndex:
+    """Get the process-wide index, building it if missing or older than the TTL.
+
+    Only one caller builds per generation. While it does, other callers keep
+    using the expired index, or wait for that build if there is none yet
+    (without blocking the event loop under DB_ASYNC, see shared_build).
+    """
+    index = _index
+    if index is not None and not _is_expired(index):
+        return index
+
+    generation = _generation
+
+    def build() -> RecipeIndex:
+        global _index
+        built = build_recipe_index(session)
+        if generation == _generation:
+            _index = built
+        return built
+
+    return _builds.get(generation, build, stale=index)
+
+
+def invalidate_recipe_index():
+    """Drop the index so the next spin rebuilds it (call after recipe changes)."""
+    global _index, _generation
+    _generation += 1
+    _index = None
+
+
+def _is_expired(index: RecipeIndex) -> bool:
+    ttl = settings.recipe_index_ttl_seconds
+    return ttl > 0 and time.monotonic() - index.built_at > ttl
@@ -0,0 +1,46 @@
+"""Set-based recipe lookups.
+
+Loading many recipes with their ingredients takes two queries in total (one
+for the recipe rows, one join for every ingredient of those recipes) rather
+than two per recipe.
+"""
+from typing import Any, Dict, Iterable, List
+from sqlmodel import Session, select
+from app.core.serialization import ingredient_fields, recipe_fields
+from app.models.models import Ingredient, Recipe, RecipeIngredient
+
+# Upper bound for one batch request, like the history page size
+MAX_BATCH_IDS = 200
+
+
+def get_recipe_payloads(session: Session, recipe_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """RecipeWithIngredients-shaped dicts in the requested order; unknown IDs are skipped.
+
+    The rows come from the database, so they are not validated; the routers
+    encode these dicts directly.
+    """
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    if not recipe_ids:
+        return []
+
+    recipes = {
+        recipe.id: recipe
+        for recipe in session.exec(select(Recipe).where(Recipe.id.in_(recipe_ids)))
+    }
+    if not recipes:
+        return []
+
+    statement = (
+        select(RecipeIngredient.recipe_id, Ingredient)
+        .join(Ingredient)
+        .where(RecipeIngredient.recipe_id.in_(list(recipes)))
+    )
+    ingredients: Dict[int, List[Dict[str, Any]]] = {recipe_id: [] for recipe_id in recipes}
+    for recipe_id, ingredient in session.exec(statement):
+        ingredients[recipe_id].append(ingredient_fields(ingredient))
+
+    return [
+        {**recipe_fields(recipe), "ingredients": ingredients[recipe.id]}
+        for recipe in (recipes.get(recipe_id) for recipe_id in recipe_ids)
+        if recipe is not None
+    ]
@@ -0,0 +1,148 @@
+"""Full-text recipe search over title, tags and steps_excerpt.
+
+SQLite: an FTS5 table (recipe_fts, rowid = recipe.id) kept in sync by
+triggers on the recipe table, so bulk imports need no extra work. The
+unicode61 tokenizer removes diacritics; ł, which it keeps, is replaced before
+indexing. Ranked with bm25, title weighted highest.
+
+PostgreSQL: a stored generated tsvector column (recipe.search_vector) with a
+GIN index, built with the 'simple' configuration and weighted A/B/C. Text is
+folded by recipe_search_fold(), an immutable wrapper around the unaccent
+extension, and the query goes through the same function, so both sides lose
+the same diacritics ("creme" finds "crème", "losos" finds "łosoś"). Ranked
+with ts_rank.
+
+Every query word is a prefix match, which also covers Polish inflection
+("pierog" finds "pierogi", "pierogów"). Pages are keyset-paginated on
+(score, id), where a lower score is a better match. Scores depend on the
+whole corpus (bm25 document frequencies, ts_rank), so a cursor is only
+stable while the recipes are unchanged: after an import, later pages can
+repeat or skip recipes.
+"""
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import Float, Integer, and_, or_, text
+from sqlmodel import Session, select
+from app.models.models import Recipe
+from app.services.ingredient_search import fold
+
+MAX_QUERY_TERMS = 8
+
+
+def _sqlite_fold(column: str) -> str:
+    # unicode61 removes every other Polish diacritic itself
+    return f"replace(replace({column}, 'ł', 'l'), 'Ł', 'l')"
+
+
+def _sqlite_tags(row: str) -> str:
+    # Tags are stored as JSON with \u escapes; json_each decodes them
+    return f"(SELECT group_concat(value, ' ') FROM json_each({row}.tags))"
+
+
+def _sqlite_values(row: str) -> str:
+    return f"{_sqlite_fold(f'{row}.title')}, {_sqlite_fold(_sqlite_tags(row))}, {_sqlite_fold(f'{row}.steps_excerpt')}"
+
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE recipe_fts USING fts5("
+    "title, tags, steps_excerpt, tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER recipe_fts_insert AFTER INSERT ON recipe BEGIN "
+    f"INSERT INTO recipe_fts (rowid, title, tags, steps_excerpt) VALUES (new.id, {_sqlite_values('new')}); END",
+    "CREATE TRIGGER recipe_fts_delete AFTER DELETE ON recipe BEGIN "
+    "DELETE FROM recipe_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER recipe_fts_update AFTER UPDATE OF title, tags, steps_excerpt ON recipe BEGIN "
+    "DELETE FROM recipe_fts WHERE rowid = old.id; "
+    f"INSERT INTO recipe_fts (rowid, title, tags, steps_excerpt) VALUES (new.id, {_sqlite_values('new')}); END",
+    # Recipes stored before the search index existed
+    f"INSERT INTO recipe_fts (rowid, title, tags, steps_excerpt) SELECT recipe.id, {_sqlite_values('recipe')} FROM recipe",
+]
+
+
+def _postgres_document(expression: str, weight: str) -> str:
+    return f"setweight(to_tsvector('simple', recipe_search_fold(coalesce({expression}, ''))), '{weight}')"
+
+
+POSTGRES_DDL = [
+    # unaccent is a trusted extension (PostgreSQL 13+); its rules also cover ł
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() is only STABLE; naming the dictionary makes it safe to declare IMMUTABLE for the generated column
+    "CREATE OR REPLACE FUNCTION recipe_search_fold(value text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+    "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, lower(value)) $$",
+    # Columns generated before recipe_search_fold() only folded Polish letters; rebuild them
+    "DO $$ BEGIN "
+    "IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = 'recipe' "
+    "AND column_name = 'search_vector' AND generation_expression NOT LIKE '%recipe_search_fold%') THEN "
+    "ALTER TABLE recipe DROP COLUMN search_vector; END IF; END $$",
+    # tags::jsonb::text decodes the \u escapes of the stored JSON
+    "ALTER TABLE recipe ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    f"{_postgres_document('title', 'A')} || {_postgres_document('tags::jsonb::text', 'B')} || "
+    f"{_postgres_document('steps_excerpt', 'C')}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_recipe_search_vector ON recipe USING GIN (search_vector)",
+]
+
+
+def create_search_index(connection):
+    """Create the full-text index if missing and fill it from existing recipes."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_fts'"
+        ).first()
+        if not exists:
+            for statement in SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+    elif dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+
+
+def query_terms(query: str) -> List[str]:
+    """Folded words of a search query (diacritics removed, at most MAX_QUERY_TERMS)."""
+    return re.findall(r"\w+", fold(query))[:MAX_QUERY_TERMS]
+
+
+def _matches(dialect: str, terms: List[str]):
+    """(id, score) of every recipe matching all terms as prefixes; lower scores rank first."""
+    if dialect == "sqlite":
+        statement = text(
+            "SELECT rowid AS id, bm25(recipe_fts, 10.0, 5.0, 1.0) AS score "
+            "FROM recipe_fts WHERE recipe_fts MATCH :query"
+        ).bindparams(query=" ".join(f'"{term}"*' for term in terms))
+    else:
+        # Folded again in SQL with the function that built the document, so both sides match exactly
+        statement = text(
+            "SELECT id, -ts_rank(search_vector, to_tsquery('simple', recipe_search_fold(:query)))::float8 AS score "
+            "FROM recipe WHERE search_vector @@ to_tsquery('simple', recipe_search_fold(:query))"
+        ).bindparams(query=" & ".join(f"{term}:*" for term in terms))
+    return statement.columns(id=Integer, score=Float).subquery("matches")
+
+
+def search_recipes(
+    session: Session,
+    query: str,
+    limit: int,
+    meal_type: Optional[str] = None,
+    after: Optional[Tuple[float, int]] = None
+) -> List[Tuple[Recipe, float]]:
+    """Up to `limit` (recipe, score) best matches, continuing after the (score, id) key `after`."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    matches = _matches(session.get_bind().dialect.name, terms)
+    statement = (
+        select(Recipe, matches.c.score)
+        .join(matches, matches.c.id == Recipe.id)
+        .order_by(matches.c.score, Recipe.id)
+        .limit(limit)
+    )
+    if meal_type:
+        statement = statement.where(Recipe.meal_type == meal_type)
+    if after:
+        score, recipe_id = after
+        statement = statement.where(or_(
+            matches.c.score > score,
+            and_(matches.c.score == score, Recipe.id > recipe_id)
+        ))
+    return list(session.exec(statement))
@@ -0,0 +1,183 @@
+"""Bulk recipe import used by the seed endpoints.
+
+Recipes are imported in chunks, one transaction per chunk. Each chunk
+normalizes all ingredient names up front, resolves or inserts the ingredients
+in one set-based pass and bulk-inserts new recipes and their RecipeIngredient
+rows. Recipes whose URL is already stored are compared with the stored row
+and links; changed ones (e.g. re-crawled pages) are rewritten and relinked,
+unchanged ones skipped.
+"""
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import delete, insert, update
+from sqlmodel import Session, select
+from app.core.settings import settings
+from app.models.models import Ingredient, Recipe, RecipeIngredient
+from app.models.schemas import SeedRecipe
+from app.services.ingredient_search import index_imported_recipes, invalidate_ingredient_search_index
+from app.services.normalization import normalize_many
+from app.services.recipe_index import invalidate_recipe_index
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit
+IN_CLAUSE_SIZE = 500
+# Recipe columns taken from the seed; a stored recipe is updated when any differ
+RECIPE_FIELDS = ("title", "source", "meal_type", "time_minutes", "image_url", "tags", "steps_excerpt",
+                 "normalized_ingredient_ids")
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def resolve_ingredients(session: Session, names: Dict[str, str]) -> Dict[str, int]:
+    """Map normalized names to ingredient IDs, inserting the missing ones.
+
+    `names` maps each normalized name to the raw name stored for new ingredients.
+    """
+    ingredient_ids: Dict[str, int] = {}
+    for batch in _batched(names, IN_CLAUSE_SIZE):
+        statement = select(Ingredient.normalized, Ingredient.id).where(Ingredient.normalized.in_(batch))
+        ingredient_ids.update(session.exec(statement).all())
+
+    missing = [normalized for normalized in names if normalized not in ingredient_ids]
+    if missing:
+        session.exec(
+            insert(Ingredient),
+            params=[{"name": names[normalized], "normalized": normalized} for normalized in missing]
+        )
+        for batch in _batched(missing, IN_CLAUSE_SIZE):
+            statement = select(Ingredient.normalized, Ingredient.id).where(Ingredient.normalized.in_(batch))
+            ingredient_ids.update(session.exec(statement).all())
+
+    return ingredient_ids
+
+
+def stored_recipes(session: Session, urls: Iterable[str]) -> Dict[str, Tuple[int, Dict[str, Any], Dict[int, str]]]:
+    """Map stored URLs to (recipe ID, RECIPE_FIELDS values, ingredient ID -> amount text)."""
+    stored: Dict[str, Tuple[int, Dict[str, Any], Dict[int, str]]] = {}
+    columns = [getattr(Recipe, field) for field in RECIPE_FIELDS]
+    for batch in _batched(urls, IN_CLAUSE_SIZE):
+        for url, recipe_id, *values in session.exec(select(Recipe.url, Recipe.id, *columns).where(Recipe.url.in_(batch))):
+            stored[url] = (recipe_id, dict(zip(RECIPE_FIELDS, values)), {})
+
+    links = {recipe_id: recipe_links for recipe_id, _, recipe_links in stored.values()}
+    for batch in _batched(links, IN_CLAUSE_SIZE):
+        statement = (
+            select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.amount_text)
+            .where(RecipeIngredient.recipe_id.in_(batch))
+        )
+        for recipe_id, ingredient_id, amount_text in session.exec(statement):
+            links[recipe_id][ingredient_id] = amount_text
+    return stored
+
+
+def import_chunk(session: Session, recipes: List[SeedRecipe]) -> Dict[str, int]:
+    """Import one chunk of recipes in a single transaction.
+
+    New URLs are inserted. A stored URL whose recipe changed is updated in
+    place, fields and ingredient links, so re-crawled pages replace their
+    earlier version; unchanged ones are skipped. When a URL repeats, the
+    last occurrence wins (later crawl output is newer). Returns the numbers
+    of recipes imported and updated.
+    """
+    latest = list({recipe.url: recipe for recipe in recipes}.values())
+    if not latest:
+        return {"imported": 0, "updated": 0}
+
+    # Normalize every ingredient name once
+    unique_names = list(dict.fromkeys(name for recipe in latest for name in recipe.ingredients))
+    normalized_names = dict(zip(unique_names, normalize_many(unique_names)))
+
+    raw_names: Dict[str, str] = {}
+    for name, normalized in normalized_names.items():
+        raw_names.setdefault(normalized, name)
+    ingredient_ids = resolve_ingredients(session, raw_names)
+
+    stored = stored_recipes(session, [recipe.url for recipe in latest])
+    new_recipes, new_rows, new_links = [], [], []
+    updated_rows, updated_links = [], {}
+    for recipe in latest:
+        # Ingredient ID -> original text, keeping the first of any duplicates
+        links: Dict[int, str] = {}
+        for name in recipe.ingredients:
+            links.setdefault(ingredient_ids[normalized_names[name]], name)
+        row = {field: getattr(recipe, field) for field in RECIPE_FIELDS if field != "normalized_ingredient_ids"}
+        row["normalized_ingredient_ids"] = list(links)
+
+        if recipe.url not in stored:
+            new_recipes.append(recipe)
+            new_rows.append({**row, "url": recipe.url})
+            new_links.append(links)
+            continue
+        recipe_id, stored_row, stored_links = stored[recipe.url]
+        if row != stored_row or links != stored_links:
+            updated_rows.append({"id": recipe_id, **row})
+            updated_links[recipe_id] = links
+
+    if not new_rows and not updated_rows:
+        session.commit()
+        return {"imported": 0, "updated": 0}
+
+    link_rows = []
+    if new_rows:
+        result = session.exec(insert(Recipe).returning(Recipe.id, Recipe.url), params=new_rows)
+        recipe_ids = {url: recipe_id for recipe_id, url in result.all()}
+        link_rows = [
+            {"recipe_id": recipe_ids[recipe.url], "ingredient_id": ingredient_id, "amount_text": name}
+            for recipe, links in zip(new_recipes, new_links)
+            for ingredient_id, name in links.items()
+        ]
+
+    if updated_rows:
+        session.exec(update(Recipe), params=updated_rows)
+        for batch in _batched(updated_links, IN_CLAUSE_SIZE):
+            session.exec(delete(RecipeIngredient).where(RecipeIngredient.recipe_id.in_(batch)))
+        link_rows += [
+            {"recipe_id": recipe_id, "ingredient_id": ingredient_id, "amount_text": name}
+            for recipe_id, links in updated_links.items()
+            for ingredient_id, name in links.items()
+        ]
+
+    if link_rows:
+        session.exec(insert(RecipeIngredient), params=link_rows)
+
+    session.commit()
+    if updated_rows:
+        # Usage counts may have gone down as well as up
+        invalidate_ingredient_search_index()
+    else:
+        index_imported_recipes(
+            {ingredient_id: (raw_names[normalized], normalized) for normalized, ingredient_id in ingredient_ids.items()},
+            Counter(row["ingredient_id"] for row in link_rows)
+        )
+    return {"imported": len(new_rows), "updated": len(updated_rows)}
+
+
+def import_recipes(
+    session: Session,
+    recipes: Iterable[SeedRecipe],
+    chunk_size: Optional[int] = None
+) -> Dict[str, int]:
+    """Import recipes in chunked transactions, updating changed recipes at URLs that already exist."""
+    chunk_size = chunk_size or settings.seed_import_chunk_size
+    imported_count = 0
+    updated_count = 0
+    total_processed = 0
+
+    for chunk in _batched(recipes, chunk_size):
+        result = import_chunk(session, chunk)
+        imported_count += result["imported"]
+        updated_count += result["updated"]
+        total_processed += len(chunk)
+
+    if imported_count or updated_count:
+        invalidate_recipe_index()
+
+    return {"imported": imported_count, "updated": updated_count, "total_processed": total_processed}
@@ -0,0 +1,67 @@
+"""One build per index generation, shared by every caller that needs it.
+
+The process-wide indexes (recipe matching, ingredient search) are built on
+first use and again after they expire or are invalidated. Concurrent callers
+join the build already running for the current generation instead of each
+building their own copy.
+
+Waiting must not block the event loop: with DB_ASYNC, endpoint bodies run
+through ``AsyncSession.run_sync`` on the event loop thread, and the build
+running there yields to the loop on every query. Such callers await the
+build through SQLAlchemy's greenlet bridge; threadpool callers block.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Optional, TypeVar
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+T = TypeVar("T")
+
+
+def _wait(future: Future):
+    if in_greenlet():
+        return await_only(asyncio.wrap_future(future))
+    return future.result()
+
+
+class SharedBuild(Generic[T]):
+    """Runs at most one build per generation; concurrent callers share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._builds: Dict[int, Future] = {}
+
+    def get(self, generation: int, build: Callable[[], T], stale: Optional[T] = None) -> T:
+        """Result of `build` for `generation`, run here or by the caller already running it.
+
+        While another caller builds, `stale` (an expired index) is returned
+        if given, otherwise the caller waits for that build. If the build
+        fails, its waiters retry and one of them builds again.
+        """
+        while True:
+            with self._lock:
+                future = self._builds.get(generation)
+                if future is None:
+                    future = self._builds[generation] = Future()
+                    owner = True
+                else:
+                    owner = False
+            if owner:
+                return self._run(generation, future, build)
+            if stale is not None:
+                return stale
+            result = _wait(future)
+            if result is not None:
+                return result
+
+    def _run(self, generation: int, future: Future, build: Callable[[], T]) -> T:
+        result = None
+        try:
+            result = build()
+            return result
+        finally:
+            with self._lock:
+                del self._builds[generation]
+            # None (failed build) sends the waiters back to build it themselves
+            future.set_result(result)
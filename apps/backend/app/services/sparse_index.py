@@ -0,0 +1,127 @@
+"""Vectorized recipe matching over a sparse recipe x ingredient matrix.
+
+Each meal type keeps a CSR incidence matrix. Extra-ingredient counts and
+banned flags for every recipe come from one sparse mat-vec product against a
+two-column preferences matrix (not-liked indicator, banned indicator).
+
+Requires numpy and scipy (``pip install .[sparse]``).
+"""
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class SparseMealPartition:
+    """CSR incidence matrix for a single meal type."""
+
+    def __init__(self, recipe_ids: np.ndarray, matrix: csr_matrix):
+        self.recipe_ids = recipe_ids
+        self.matrix = matrix
+
+
+class SparseRecipeIndex:
+    """Sparse-matrix index over recipe ingredients, partitioned by meal type."""
+
+    def __init__(self):
+        self.column_positions: Dict[int, int] = {}
+        self.partitions: Dict[str, SparseMealPartition] = {}
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, str, Optional[List[int]]]]) -> "SparseRecipeIndex":
+        """Build the index from (recipe_id, meal_type, ingredient_ids) rows."""
+        index = cls()
+        coordinates: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+
+        for recipe_id, meal_type, ingredient_ids in rows:
+            recipe_ids, row_numbers, columns = coordinates.setdefault(meal_type, ([], [], []))
+            row_number = len(recipe_ids)
+            recipe_ids.append(recipe_id)
+            for ingredient_id in dict.fromkeys(ingredient_ids or []):
+                column = index.column_positions.setdefault(ingredient_id, len(index.column_positions))
+                row_numbers.append(row_number)
+                columns.append(column)
+
+        n_columns = len(index.column_positions)
+        for meal_type, (recipe_ids, row_numbers, columns) in coordinates.items():
+            matrix = csr_matrix(
+                (np.ones(len(columns), dtype=np.int32), (row_numbers, columns)),
+                shape=(len(recipe_ids), n_columns)
+            )
+            index.partitions[meal_type] = SparseMealPartition(
+                np.asarray(recipe_ids, dtype=np.int64), matrix
+            )
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(partition.recipe_ids) for partition in self.partitions.values())
+
+    def _columns(self, ingredient_ids: Iterable[int]) -> List[int]:
+        """Matrix columns of the given ingredient IDs; IDs used by no recipe are ignored."""
+        return [
+            self.column_positions[ingredient_id]
+            for ingredient_id in ingredient_ids
+            if ingredient_id in self.column_positions
+        ]
+
+    def _preferences_matrix(self, liked_ids: Set[int], banned_ids: Set[int]) -> np.ndarray:
+        prefs = np.zeros((len(self.column_positions), 2), dtype=np.int32)
+        prefs[:, 0] = 1
+        prefs[self._columns(liked_ids), 0] = 0
+        prefs[self._columns(banned_ids), 1] = 1
+        return prefs
+
+    def score_arrays(
+        self,
+        meal_type: str,
+        liked_ids: Set[int],
+        banned_ids: Set[int],
+        exclude_ids: Optional[Set[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (recipe_ids, extra_counts) arrays for recipes without banned ingredients."""
+        partition = self.partitions.get(meal_type)
+        if partition is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+
+        counts = partition.matrix @ self._preferences_matrix(liked_ids, banned_ids)
+        keep = counts[:, 1] == 0
+        if exclude_ids:
+            keep &= ~np.isin(partition.recipe_ids, list(exclude_ids))
+        return partition.recipe_ids[keep], counts[keep, 0]
+
+    def score(
+        self,
+        meal_type: str,
+        liked_ids: Set[int],
+        banned_ids: Set[int],
+        exclude_ids: Optional[Set[int]] = None
+    ) -> List[Tuple[int, int]]:
+        """Return (recipe_id, extra_count) for every recipe without banned ingredients."""
+        recipe_ids, extra_counts = self.score_arrays(meal_type, liked_ids, banned_ids, exclude_ids)
+        return list(zip(recipe_ids.tolist(), extra_counts.tolist()))
+
+    def matching_ids(
+        self,
+        meal_type: str,
+        liked_ids: Set[int],
+        banned_ids: Set[int],
+        max_extra: int,
+        exclude_ids: Optional[Set[int]] = None
+    ) -> List[int]:
+        """IDs of recipes with at most `max_extra` ingredients outside the liked list."""
+        recipe_ids, extra_counts = self.score_arrays(meal_type, liked_ids, banned_ids, exclude_ids)
+        return recipe_ids[extra_counts <= max_extra].tolist()
+
+    def best_ids(
+        self,
+        meal_type: str,
+        liked_ids: Set[int],
+        banned_ids: Set[int],
+        exclude_ids: Optional[Set[int]] = None
+    ) -> List[int]:
+        """IDs of the recipes with the lowest extra-ingredient count."""
+        recipe_ids, extra_counts = self.score_arrays(meal_type, liked_ids, banned_ids, exclude_ids)
+        if not len(recipe_ids):
+            return []
+        return recipe_ids[extra_counts == extra_counts.min()].tolist()
@@ -0,0 +1,192 @@
+"""Write-behind buffer for spin history inserts.
+
+With SPIN_HISTORY_WRITE_MODE=buffered, spins are queued in memory and written
+in batches by a background thread, either every
+SPIN_BUFFER_FLUSH_INTERVAL_SECONDS or as soon as SPIN_BUFFER_MAX_RECORDS are
+waiting. Queued spins are lost if the process dies before a flush, so the
+interval and batch size bound how many spins can be lost; "sync" (the
+default) writes every spin before responding. While the database is
+unreachable, failed batches are kept for the next flush, up to
+SPIN_BUFFER_MAX_PENDING spins; older ones are dropped and counted in the
+spin_buffer_dropped metric.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlmodel import Session
+from app.core.metrics import SPIN_BUFFER_DROPPED
+from app.core.settings import settings
+from app.db import get_engine, run_blocking
+from app.models.models import SpinHistory
+
+logger = logging.getLogger(__name__)
+
+
+class SpinHistoryBuffer:
+    """Queue of spin records flushed to the database in batches."""
+
+    def __init__(self, max_records: int, flush_interval: float, max_pending: Optional[int] = None):
+        self.max_records = max_records
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending or settings.spin_buffer_max_pending
+        self._pending: List[Dict[str, Any]] = []
+        self._in_flight: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, recipe_id: int, meal_type: str, allow_one_extra: bool, spun_at: datetime):
+        """Queue one spin; a full buffer wakes the flusher."""
+        with self._lock:
+            self._pending.append({
+                "recipe_id": recipe_id,
+                "meal_type": meal_type,
+                "allow_one_extra": allow_one_extra,
+                "spun_at": spun_at,
+            })
+            self._drop_overflow()
+            full = len(self._pending) >= self.max_records
+
+        if full:
+            if self._thread is not None:
+                self._wakeup.set()
+            else:
+                self.flush()
+
+    def _drop_overflow(self):
+        # Caller holds the lock; the oldest spins go first
+        overflow = len(self._in_flight) + len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            SPIN_BUFFER_DROPPED.inc(overflow)
+            logger.warning(f"Spin history buffer full, dropped {overflow} spins")
+
+    def pending_spins(self, meal_type: str) -> List[Tuple[int, datetime]]:
+        """(recipe_id, spun_at) of unflushed spins for a meal type, newest first."""
+        with self._lock:
+            records = self._in_flight + self._pending
+        return [(record["recipe_id"], record["spun_at"]) for record in reversed(records)
+                if record["meal_type"] == meal_type]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._in_flight)
+
+    def flush(self) -> int:
+        """Write all queued spins in one transaction; returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                # Stay visible to recency checks until committed
+                self._in_flight, self._pending = self._pending, []
+                records = self._in_flight
+            if not records:
+                return 0
+
+            try:
+                with Session(get_engine()) as session:
+                    session.exec(insert(SpinHistory), params=records)
+                    session.commit()
+            except Exception:
+                # Put the batch back so the next flush retries it, within the size limit
+                with self._lock:
+                    self._pending = records + self._pending
+                    self._in_flight = []
+                    self._drop_overflow()
+                raise
+
+            with self._lock:
+                self._in_flight = []
+            return len(records)
+
+    def start(self):
+        """Start the background flusher thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="spin-history-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher thread and write everything still queued."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush spin history buffer")
+
+
+_buffer: Optional[SpinHistoryBuffer] = None
+
+
+def get_spin_buffer() -> Optional[SpinHistoryBuffer]:
+    """The process-wide buffer, or None when spins are written synchronously."""
+    global _buffer
+    if _buffer is None and settings.spin_history_write_mode == "buffered":
+        _buffer = SpinHistoryBuffer(
+            settings.spin_buffer_max_records,
+            settings.spin_buffer_flush_interval_seconds
+        )
+    return _buffer
+
+
+def start_spin_buffer():
+    buffer = get_spin_buffer()
+    if buffer is not None:
+        buffer.start()
+
+
+def stop_spin_buffer():
+    """Flush and stop the buffer (call on shutdown)."""
+    global _buffer
+    if _buffer is not None:
+        _buffer.stop()
+        _buffer = None
+
+
+def flush_spin_buffer():
+    """Write queued spins now, e.g. before reading or deleting history.
+
+    Under DB_ASYNC the flush, which uses the sync engine and may wait for the
+    flusher thread, runs in a worker thread (see run_blocking).
+    """
+    if _buffer is not None:
+        run_blocking(_buffer.flush)
+
+
+def record_spin(session: Session, recipe_id: int, meal_type: str, allow_one_extra: bool):
+    """Record a spin, queued or written immediately depending on the write mode."""
+    spun_at = datetime.utcnow()
+    buffer = get_spin_buffer()
+    if buffer is not None:
+        buffer.add(recipe_id, meal_type, allow_one_extra, spun_at)
+        return
+
+    history_entry = SpinHistory(
+        recipe_id=recipe_id,
+        meal_type=meal_type,
+        allow_one_extra=allow_one_extra,
+        spun_at=spun_at
+    )
+    session.add(history_entry)
+    session.commit()
+
+
+def pending_recent_spins(meal_type: str) -> List[Tuple[int, datetime]]:
+    """(recipe_id, spun_at) of unflushed spins for a meal type, newest first."""
+    if _buffer is None:
+        return []
+    return _buffer.pending_spins(meal_type)
@@ -0,0 +1,82 @@
+"""Recipe matching evaluated entirely in the database (RECIPE_MATCHER=sql).
+
+Extra-ingredient counts come from a GROUP BY over RecipeIngredient outer-joined
+to the user's LikedIngredient rows. Recipes with a banned ingredient are
+removed with a NOT EXISTS anti-join against BannedIngredient. The random pick
+is made by ``ORDER BY random() LIMIT 1``, so one row is returned whatever the
+catalogue size. Works on SQLite and PostgreSQL.
+"""
+from typing import Optional, Set, Tuple
+from sqlalchemy import and_, case, exists, func
+from sqlmodel import Session, select
+from app.models.models import BannedIngredient, LikedIngredient, Recipe, RecipeIngredient
+
+
+def extra_count_column():
+    """Number of a recipe's ingredients not liked by the user (needs the joins below)."""
+    return func.count(RecipeIngredient.ingredient_id) - func.count(LikedIngredient.ingredient_id)
+
+
+def candidate_recipe_ids(meal_type: str, user_id: str, exclude_ids: Optional[Set[int]] = None, *columns):
+    """SELECT recipe IDs (and `columns`) of a meal type without banned ingredients, grouped for extra_count_column()."""
+    banned = (
+        select(RecipeIngredient.recipe_id)
+        .join(BannedIngredient, BannedIngredient.ingredient_id == RecipeIngredient.ingredient_id)
+        .where(RecipeIngredient.recipe_id == Recipe.id, BannedIngredient.user_id == user_id)
+    )
+    statement = (
+        select(Recipe.id, *columns)
+        .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+        .outerjoin(LikedIngredient, and_(
+            LikedIngredient.ingredient_id == RecipeIngredient.ingredient_id,
+            LikedIngredient.user_id == user_id
+        ))
+        .where(Recipe.meal_type == meal_type, ~exists(banned))
+        .group_by(Recipe.id)
+    )
+    if exclude_ids:
+        statement = statement.where(Recipe.id.not_in(exclude_ids))
+    return statement
+
+
+def matching_recipe_ids(meal_type: str, user_id: str, max_extra: int, exclude_ids: Optional[Set[int]] = None):
+    """SELECT the IDs of recipes with at most `max_extra` ingredients outside the liked list."""
+    return candidate_recipe_ids(meal_type, user_id, exclude_ids).having(extra_count_column() <= max_extra)
+
+
+def pick_recipe(
+    session: Session,
+    meal_type: str,
+    user_id: str,
+    max_extra: int,
+    exclude_ids: Optional[Set[int]] = None
+) -> Optional[Tuple[int, bool]]:
+    """Random matching recipe ID, else a random one with the fewest extras; one query.
+
+    All matches sort first with equal weight; the rest sort by extra count,
+    so the fallback of the other matchers comes for free. Returns
+    (recipe ID, whether the fallback was used).
+    """
+    extra_count = extra_count_column()
+    rank = case((extra_count <= max_extra, 0), else_=extra_count)
+    statement = (
+        candidate_recipe_ids(meal_type, user_id, exclude_ids, rank)
+        .order_by(rank, func.random())
+        .limit(1)
+    )
+    row = session.exec(statement).first()
+    if row is None:
+        return None
+    return row[0], row[1] > 0
+
+
+def pick_recipe_id(
+    session: Session,
+    meal_type: str,
+    user_id: str,
+    max_extra: int,
+    exclude_ids: Optional[Set[int]] = None
+) -> Optional[int]:
+    """ID of the recipe chosen by pick_recipe(), or None."""
+    picked = pick_recipe(session, meal_type, user_id, max_extra, exclude_ids)
+    return picked[0] if picked else None
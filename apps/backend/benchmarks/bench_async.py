@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Compare requests/sec of the sync and async (DB_ASYNC) database paths.
+
+Starts uvicorn once per mode on the same seeded SQLite file and drives it
+with many concurrent clients. Requests that fail (5xx or connection errors)
+are counted; a short pool timeout keeps pool exhaustion from stalling the run.
+
+Usage: python -m benchmarks.bench_async [concurrency] [requests] [recipes]
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from sqlmodel import SQLModel, Session, create_engine
+from app.models.models import LikedIngredient
+from app.models.schemas import SeedRecipe
+from app.services.seed_import import import_recipes
+
+MEAL_TYPES = ["breakfast", "lunch", "snack", "dinner"]
+INGREDIENTS = [f"składnik {i}" for i in range(500)]
+
+
+def seed_database(db_file: str, recipe_count: int):
+    engine = create_engine(f"sqlite:///{db_file}")
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(42)
+    recipes = [
+        SeedRecipe(title=f"Przepis {i}", source="bench", url=f"http://bench/{i}",
+                   meal_type=rng.choice(MEAL_TYPES), ingredients=rng.sample(INGREDIENTS, rng.randint(3, 10)),
+                   steps_excerpt="...")
+        for i in range(recipe_count)
+    ]
+    with Session(engine) as session:
+        import_recipes(session, recipes)
+        for ingredient_id in rng.sample(range(1, len(INGREDIENTS) + 1), 200):
+            session.add(LikedIngredient(user_id="default", ingredient_id=ingredient_id))
+        session.commit()
+    engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def drive(base_url: str, concurrency: int, total: int, recipe_count: int):
+    """Send `total` requests from `concurrency` workers; returns (req/s, errors)."""
+    counter = iter(range(total))
+    errors = 0
+    rng = random.Random(7)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                try:
+                    if i % 2:
+                        response = await client.get("/api/recipes/random", params={"meal": rng.choice(MEAL_TYPES)})
+                    else:
+                        response = await client.get(f"/api/recipes/{rng.randint(1, recipe_count)}")
+                    errors += response.status_code >= 500
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start), errors
+
+
+def run_mode(db_file: str, db_async: bool, concurrency: int, total: int, recipe_count: int):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_file}", DB_PATH=db_file,
+               DB_ASYNC=str(db_async).lower(), DB_POOL_TIMEOUT="5", LOG_LEVEL="WARNING")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stderr=subprocess.DEVNULL
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_ready(base_url)
+        return asyncio.run(drive(base_url, concurrency, total, recipe_count))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    recipe_count = int(sys.argv[3]) if len(sys.argv) > 3 else 5_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        seed_database(db_file, recipe_count)
+        print(f"{recipe_count} recipes, {total} requests, concurrency {concurrency}")
+        for label, db_async in (("sync", False), ("async", True)):
+            rate, errors = run_mode(db_file, db_async, concurrency, total, recipe_count)
+            print(f"  {label:<6} {rate:9.1f} req/s  ({errors} errors)")
+
+
+if __name__ == "__main__":
+    main()
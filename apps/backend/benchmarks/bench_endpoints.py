@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Endpoint latency and memory at several catalogue sizes.
+
+For each scale a seeded catalogue is generated with tools/seed/generate_recipes.py
+(NDJSON shards written in parallel), streamed into a fresh SQLite database through
+POST /api/import/seed/stream, and the main endpoints are timed through the
+ASGI app. Each scale runs in its own process so peak RSS is per scale.
+Results are written as JSON; pass two result files to --compare to diff runs.
+
+Usage:
+    python -m benchmarks.bench_endpoints [--scales 1000,10000,100000,1000000]
+                                         [--requests 200] [--output FILE]
+    python -m benchmarks.bench_endpoints --compare OLD.json NEW.json
+
+The 1M scale needs a few minutes and several GB of disk.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SCALES = "1000,10000,100000,1000000"
+MEAL_TYPES = ["breakfast", "lunch", "snack", "dinner"]
+LIKED = ["jajka", "mleko", "mąka", "sól", "masło", "cebula", "ziemniaki", "pomidory", "ser", "chleb"]
+BANNED = ["szynka", "łosoś"]
+
+
+def write_catalogue(out_dir: str, count: int, seed: int = 42) -> List[Path]:
+    """Generate `count` recipes as NDJSON shards; returns the shard paths in order."""
+    sys.path.append(str(REPO_ROOT / "tools" / "seed"))
+    import generate_recipes
+
+    manifest = generate_recipes.write_catalogue(count, Path(out_dir), seed)
+    return [Path(out_dir) / shard["file"] for shard in manifest["shards"]]
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), else the peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(latencies: List[float], errors: int) -> Dict[str, float]:
+    """Latency percentiles in milliseconds."""
+    ms = sorted(latency * 1000 for latency in latencies)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {
+        "count": len(ms),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def measure(send: Callable[[int], object], requests: int) -> Dict[str, float]:
+    """Call `send(i)` `requests` times and summarize latency, errors and RSS growth."""
+    latencies = []
+    errors = 0
+    rss_before = rss_mb()
+    for i in range(requests):
+        start = time.perf_counter()
+        response = send(i)
+        latencies.append(time.perf_counter() - start)
+        errors += response.status_code >= 400
+    result = summarize(latencies, errors)
+    result["rss_growth_mb"] = round(rss_mb() - rss_before, 1)
+    return result
+
+
+def run_scale(count: int, requests: int) -> Dict:
+    """Benchmark one catalogue size (runs in a fresh process)."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    rng = random.Random(count)
+    shards = write_catalogue(os.environ["BENCH_CATALOGUE"], count)
+    result = {"recipes": count, "catalogue_mb": round(sum(shard.stat().st_size for shard in shards) / 2 ** 20, 1)}
+
+    with TestClient(app) as client:
+        def body():
+            for shard in shards:
+                with open(shard, "rb") as f:
+                    while chunk := f.read(64 * 1024):
+                        yield chunk
+
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        response = client.post("/api/import/seed/stream", content=body())
+        elapsed = time.perf_counter() - start
+        result["seed_import"] = {
+            "seconds": round(elapsed, 3),
+            "recipes_per_second": round(count / elapsed, 1),
+            "imported": response.json().get("imported"),
+            "rss_growth_mb": round(rss_mb() - rss_before, 1),
+        }
+
+        endpoints = result["endpoints"] = {}
+        endpoints["POST /api/ingredients/liked"] = measure(
+            lambda i: client.post("/api/ingredients/liked", json={"name": LIKED[i % len(LIKED)]}), requests)
+        endpoints["POST /api/ingredients/banned"] = measure(
+            lambda i: client.post("/api/ingredients/banned", json={"name": BANNED[i % len(BANNED)]}), requests)
+        endpoints["GET /api/ingredients/liked"] = measure(
+            lambda i: client.get("/api/ingredients/liked"), requests)
+        endpoints["GET /api/recipes/random"] = measure(
+            lambda i: client.get("/api/recipes/random", params={
+                "meal": MEAL_TYPES[i % len(MEAL_TYPES)], "allow_one_extra": True, "hide_recent": True
+            }), requests)
+        endpoints["GET /api/recipes/{id}"] = measure(
+            lambda i: client.get(f"/api/recipes/{rng.randint(1, count)}"), requests)
+        endpoints["GET /api/recipes?ids="] = measure(
+            lambda i: client.get("/api/recipes", params={
+                "ids": ",".join(str(rng.randint(1, count)) for _ in range(50))
+            }), requests)
+        endpoints["GET /api/history/"] = measure(
+            lambda i: client.get("/api/history/", params={"limit": 50}), requests)
+        endpoints["DELETE /api/ingredients/liked/{id}"] = measure(
+            lambda i: client.delete(f"/api/ingredients/liked/{i + 1}"), requests)
+
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return result
+
+
+def run_worker(count: int, requests: int) -> Dict:
+    """Run one scale in a subprocess against its own temporary database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{db_file}",
+            DB_PATH=db_file,
+            BENCH_CATALOGUE=os.path.join(tmp, "catalogue"),
+            LOG_LEVEL="WARNING",
+        )
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_endpoints", "--worker", str(count),
+             "--requests", str(requests)],
+            env=env, check=True, stdout=subprocess.PIPE, text=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old_path: str, new_path: str):
+    """Print p50/p95/p99 changes between two result files."""
+    old_run = json.loads(Path(old_path).read_text())
+    new_run = json.loads(Path(new_path).read_text())
+    old_scales = {scale["recipes"]: scale for scale in old_run["scales"]}
+
+    print(f"{old_run['meta']['revision']} -> {new_run['meta']['revision']}")
+    for scale in new_run["scales"]:
+        old = old_scales.get(scale["recipes"])
+        if old is None:
+            continue
+        print(f"\n{scale['recipes']} recipes")
+        for endpoint, stats in scale["endpoints"].items():
+            before = old["endpoints"].get(endpoint)
+            if before is None:
+                continue
+            changes = "  ".join(
+                f"{key[:3]} {before[key]:8.2f} -> {stats[key]:8.2f} ms ({(stats[key] / before[key] - 1) * 100 if before[key] else 0.0:+5.0f}%)"
+                for key in ("p50_ms", "p95_ms", "p99_ms")
+            )
+            print(f"  {endpoint:<36} {changes}")
+        print(f"  {'peak RSS':<36} {old['peak_rss_mb']:.1f} -> {scale['peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated catalogue sizes")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/endpoints-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.worker:
+        # Keep generator and app output off stdout, which carries the result
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_scale(args.worker, args.requests)
+        print(json.dumps(result))
+        return
+
+    from app.core.settings import settings
+
+    run = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "recipe_matcher": settings.recipe_matcher,
+            "requests_per_endpoint": args.requests,
+        },
+        "scales": [],
+    }
+    for count in (int(scale) for scale in args.scales.split(",")):
+        print(f"{count} recipes...", flush=True)
+        scale = run_worker(count, args.requests)
+        run["scales"].append(scale)
+        print(f"  import {scale['seed_import']['recipes_per_second']:.0f} recipes/s, "
+              f"peak RSS {scale['peak_rss_mb']:.0f} MB")
+        for endpoint, stats in scale["endpoints"].items():
+            print(f"  {endpoint:<36} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  "
+                  f"p99 {stats['p99_ms']:8.2f} ms  ({stats['errors']} errors)")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"endpoints-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(run, indent=2))
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
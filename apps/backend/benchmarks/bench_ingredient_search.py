@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Ingredient autocomplete latency.
+
+Builds the prefix index over synthetic Polish-looking ingredient names with
+Zipf-like recipe counts and replays typing: every prefix of sampled names,
+without diacritics, as a user would type them. Reports build time, p50/p99/max
+per keystroke for the top 10 and top 50, and the cost of adding an ingredient.
+
+Usage: python -m benchmarks.bench_ingredient_search [ingredients] [words_typed]
+"""
+import random
+import statistics
+import sys
+import time
+from app.services.ingredient_search import MAX_LIMIT, IngredientSearchIndex, fold
+
+STEMS = ["ząb", "żur", "śliw", "łoso", "ogór", "pomid", "cebul", "czosn", "marchw", "ziemni", "kapust", "buracz",
+         "jabł", "grusz", "mąk", "masł", "śmietan", "twaróg", "jaj", "pieprz", "papryk", "koperk", "pietrusz",
+         "szczypior", "kurczak", "wieprzow", "wołow", "indyk", "dorsz", "śledź", "groch", "fasol", "soczewic"]
+SUFFIXES = ["", "ek", "ka", "ki", "owy", "owa", "owe", "ny", "na", "ów", "em", "ami"]
+QUALIFIERS = ["", "", "", "świeży", "suszony", "wędzony", "mielony", "drobny", "czerwony", "zielony", "młody"]
+
+
+def make_ingredients(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        words = [rng.choice(STEMS) + rng.choice(SUFFIXES) for _ in range(rng.choice((1, 1, 2)))]
+        qualifier = rng.choice(QUALIFIERS)
+        names.add(" ".join(words + ([qualifier] if qualifier else [])) + (f" {len(names)}" if rng.random() < 0.5 else ""))
+    return [(ingredient_id, name, name.lower()) for ingredient_id, name in enumerate(sorted(names), start=1)]
+
+
+def percentiles(samples):
+    ms = sorted(sample * 1000 for sample in samples)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive")
+    return f"p50 {cuts[49]:.3f} ms  p99 {cuts[98]:.3f} ms  max {ms[-1]:.3f} ms"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    typed = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rng = random.Random(7)
+    ingredients = make_ingredients(count)
+    recipe_counts = [(ingredient_id, int(10_000 / rank ** 1.1)) for rank, (ingredient_id, _, _) in
+                     enumerate(rng.sample(ingredients, len(ingredients)), start=1)]
+
+    start = time.perf_counter()
+    index = IngredientSearchIndex.build(ingredients, recipe_counts)
+    print(f"{len(index)} ingredients, built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Every prefix of each word typed, without Polish characters
+    queries = [fold(name)[:length] for _, name, _ in rng.sample(ingredients, typed)
+               for length in range(1, len(fold(name).split(" ")[0]) + 1)]
+    for limit in (10, MAX_LIMIT):
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, limit)
+            timings.append(time.perf_counter() - start)
+        print(f"  top {limit:<3} {len(queries)} keystrokes  {percentiles(timings)}")
+
+    timings = []
+    for ingredient_id in range(count + 1, count + 1001):
+        start = time.perf_counter()
+        index.add(ingredient_id, f"nowy składnik {ingredient_id}", f"nowy składnik {ingredient_id}")
+        timings.append(time.perf_counter() - start)
+    print(f"  add     1000 ingredients  {percentiles(timings)} (max includes merging pending keys into blocks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compare recipe matching engines on a synthetic catalogue.
+
+Usage: python -m benchmarks.bench_matching [recipes] [ingredients]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, create_engine
+from app.models.models import BannedIngredient, Ingredient, LikedIngredient, Recipe, RecipeIngredient
+from app.services.recipe_filter import count_extra_ingredients, has_banned_ingredients
+from app.services.recipe_index import RecipeIndex
+from app.services.sql_matcher import matching_recipe_ids, pick_recipe_id
+
+MEAL_TYPES = ["breakfast", "lunch", "snack", "dinner"]
+
+
+def make_rows(recipe_count: int, ingredient_count: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        (recipe_id, rng.choice(MEAL_TYPES), rng.sample(range(1, ingredient_count + 1), rng.randint(3, 12)))
+        for recipe_id in range(1, recipe_count + 1)
+    ]
+
+
+def python_match(recipes, liked_ids, banned_ids):
+    """The per-recipe loop used by RECIPE_MATCHER=python."""
+    return [
+        recipe.id for recipe in recipes
+        if not has_banned_ingredients(recipe, banned_ids)
+        and count_extra_ingredients(recipe, liked_ids) <= 1
+    ]
+
+
+def load_database(path: str, rows, ingredient_count: int, liked_ids, banned_ids):
+    """Write the catalogue and preferences to a SQLite file for the sql matcher."""
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.exec(insert(Ingredient), params=[
+            {"id": i, "name": str(i), "normalized": str(i)} for i in range(1, ingredient_count + 1)
+        ])
+        session.exec(insert(Recipe), params=[
+            {"id": recipe_id, "title": "", "source": "", "url": str(recipe_id), "meal_type": meal,
+             "steps_excerpt": "", "normalized_ingredient_ids": ids}
+            for recipe_id, meal, ids in rows
+        ])
+        session.exec(insert(RecipeIngredient), params=[
+            {"recipe_id": recipe_id, "ingredient_id": ingredient_id, "amount_text": ""}
+            for recipe_id, _, ids in rows for ingredient_id in ids
+        ])
+        session.exec(insert(LikedIngredient), params=[{"user_id": "bench", "ingredient_id": i} for i in liked_ids])
+        session.exec(insert(BannedIngredient), params=[{"user_id": "bench", "ingredient_id": i} for i in banned_ids])
+        session.commit()
+    return engine
+
+
+def timed(label: str, fn, repeat: int = 20):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<8} {elapsed_ms:9.3f} ms/spin  ({len(result)} matches)")
+
+
+def main():
+    recipe_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    ingredient_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    rows = make_rows(recipe_count, ingredient_count)
+    rng = random.Random(1)
+    liked_ids = set(rng.sample(range(1, ingredient_count + 1), ingredient_count // 2))
+    banned_ids = set(rng.sample(range(1, ingredient_count + 1), 20))
+    meal_type = "dinner"
+
+    print(f"{recipe_count} recipes, {ingredient_count} ingredients, meal={meal_type}")
+
+    recipes = [
+        Recipe(id=recipe_id, title="", source="", url="", meal_type=meal, steps_excerpt="",
+               normalized_ingredient_ids=ids)
+        for recipe_id, meal, ids in rows if meal == meal_type
+    ]
+    timed("python", lambda: python_match(recipes, liked_ids, banned_ids))
+
+    start = time.perf_counter()
+    bitset = RecipeIndex.build(rows)
+    print(f"  bitset index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    timed("bitset", lambda: bitset.matching_ids(meal_type, liked_ids, banned_ids, max_extra=1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        engine = load_database(os.path.join(tmp, "bench.db"), rows, ingredient_count, liked_ids, banned_ids)
+        print(f"  sql database loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+        with Session(engine) as session:
+            statement = matching_recipe_ids(meal_type, "bench", max_extra=1)
+            timed("sql", lambda: session.exec(statement).all(), repeat=5)
+            timed("sql pick", lambda: [pick_recipe_id(session, meal_type, "bench", max_extra=1)], repeat=5)
+        engine.dispose()
+
+    try:
+        from app.services.sparse_index import SparseRecipeIndex
+    except ImportError:
+        print("  sparse   skipped (numpy/scipy not installed)")
+        return
+
+    start = time.perf_counter()
+    sparse = SparseRecipeIndex.build(rows)
+    print(f"  sparse index built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    timed("sparse", lambda: sparse.matching_ids(meal_type, liked_ids, banned_ids, max_extra=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Normalization throughput with a large synonym dictionary.
+
+Compares the original linear scan over SYNONYMS with the compiled
+variant -> base map, with and without the memo, and normalize_many.
+
+Usage: python -m benchmarks.bench_normalization [bases] [variants_per_base]
+"""
+import random
+import sys
+import time
+from unittest.mock import patch
+from app.services import normalization
+from app.services.normalization import normalize_ingredient, normalize_many
+
+
+def linear_scan_normalize(name: str, synonyms) -> str:
+    """The pre-compilation implementation, kept here for comparison."""
+    normalized = name.lower().strip()
+    for base, variants in synonyms.items():
+        if normalized in variants or base == normalized:
+            return base
+    return normalized
+
+
+def make_synonyms(bases: int, variants: int):
+    return {
+        f"składnik{i}": [f"składnik{i}_{j}" for j in range(variants)]
+        for i in range(bases)
+    }
+
+
+def make_inputs(synonyms, count: int, seed: int = 42):
+    """Realistic mix: mostly repeated known variants, some unknown names."""
+    rng = random.Random(seed)
+    vocabulary = [variant for variants in synonyms.values() for variant in variants]
+    hot = rng.sample(vocabulary, min(500, len(vocabulary)))
+    inputs = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.7:
+            inputs.append(rng.choice(hot))
+        elif roll < 0.9:
+            inputs.append(rng.choice(vocabulary))
+        else:
+            inputs.append(f"nieznany{i}")
+    return inputs
+
+
+def report(label: str, count: int, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {count / elapsed:14,.0f} names/s")
+
+
+def main():
+    bases = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    variants = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    synonyms = make_synonyms(bases, variants)
+    print(f"{bases} bases x {variants} variants = {bases * (variants + 1)} dictionary entries")
+
+    with patch.object(normalization, "SYNONYMS", synonyms):
+        start = time.perf_counter()
+        normalization.clear_normalization_cache()
+        normalization._synonym_lookup()
+        print(f"  compiled in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        slow_inputs = make_inputs(synonyms, 2_000)
+        report("linear scan", len(slow_inputs),
+               lambda: [linear_scan_normalize(name, synonyms) for name in slow_inputs])
+
+        inputs = make_inputs(synonyms, 200_000)
+        report("compiled (no memo)", len(inputs),
+               lambda: [normalization._normalize(name, normalization._lookup) for name in inputs])
+
+        normalization._normalize_cached.cache_clear()
+        report("normalize_ingredient", len(inputs),
+               lambda: [normalize_ingredient(name) for name in inputs])
+        print(f"    memo: {normalization._normalize_cached.cache_info()}")
+
+        report("normalize_many", len(inputs), lambda: normalize_many(inputs))
+
+
+if __name__ == "__main__":
+    main()
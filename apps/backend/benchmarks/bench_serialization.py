@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Response serialization cost for large payloads.
+
+Builds a full history page (200 spins with their recipes) and a full batch of
+recipes with ingredients (200 recipes, 12 ingredients each) from in-memory
+rows, then times turning the rows into response bytes in four ways:
+
+  validated   response models built field by field, then FastAPI's
+              response_model path (validate again, jsonable_encoder) and
+              json.dumps, as the routers did before
+  construct   the same models built with model_construct, encoded with orjson
+  orjson      model-shaped dicts encoded by APIResponse, as the routers do now
+  msgpack     the same dicts, encoded for Accept: application/msgpack
+
+Usage: python -m benchmarks.bench_serialization [rounds]
+"""
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.core.serialization import MSGPACK_MEDIA_TYPE, encode, ingredient_fields, recipe_fields
+from app.models.models import Ingredient, Recipe, SpinHistory
+from app.models.schemas import (
+    IngredientResponse, RecipeResponse, RecipeWithIngredients, SpinHistoryPage, SpinHistoryResponse
+)
+
+PAGE_SIZE = 200
+INGREDIENTS_PER_RECIPE = 12
+
+
+def make_recipe(recipe_id: int) -> Recipe:
+    return Recipe(id=recipe_id, title=f"Pierogi z kapustą i grzybami {recipe_id}", source="kwestiasmaku",
+                  url=f"https://example.pl/przepis/{recipe_id}", meal_type="dinner", time_minutes=45,
+                  image_url=f"https://example.pl/img/{recipe_id}.jpg", tags=["polska", "wigilia", "pierogi"],
+                  steps_excerpt="Zagnieść ciasto, rozwałkować, nałożyć farsz i ugotować w osolonej wodzie. " * 3,
+                  normalized_ingredient_ids=list(range(INGREDIENTS_PER_RECIPE)))
+
+
+def history_rows():
+    spun_at = datetime(2024, 3, 1, 12, 0)
+    return [(SpinHistory(id=i, recipe_id=i, meal_type="dinner", allow_one_extra=bool(i % 2),
+                         spun_at=spun_at - timedelta(minutes=i)), make_recipe(i)) for i in range(PAGE_SIZE)]
+
+
+def batch_rows():
+    ingredients = [Ingredient(id=i, name=f"składnik {i}", normalized=f"skladnik {i}")
+                   for i in range(INGREDIENTS_PER_RECIPE)]
+    return [(make_recipe(i), ingredients) for i in range(PAGE_SIZE)]
+
+
+def history_page(rows, build):
+    items = [build(SpinHistoryResponse)(id=history.id, recipe=build(RecipeResponse)(**recipe_fields(recipe)),
+                                        meal_type=history.meal_type, allow_one_extra=history.allow_one_extra,
+                                        spun_at=history.spun_at) for history, recipe in rows]
+    return build(SpinHistoryPage)(items=items, next_cursor="abc")
+
+
+def recipe_batch(rows, build) -> List[RecipeWithIngredients]:
+    return [build(RecipeWithIngredients)(
+        **recipe_fields(recipe),
+        ingredients=[build(IngredientResponse)(id=i.id, name=i.name, normalized=i.normalized) for i in ingredients]
+    ) for recipe, ingredients in rows]
+
+
+def validated(model):
+    return model
+
+
+def constructed(model):
+    return model.model_construct
+
+
+def history_payload(rows):
+    items = [{"id": history.id, "recipe": recipe_fields(recipe), "meal_type": history.meal_type,
+              "allow_one_extra": history.allow_one_extra, "spun_at": history.spun_at} for history, recipe in rows]
+    return {"items": items, "next_cursor": "abc"}
+
+
+def batch_payload(rows):
+    return [{**recipe_fields(recipe), "ingredients": [ingredient_fields(i) for i in ingredients]}
+            for recipe, ingredients in rows]
+
+
+def fastapi_json(field, content) -> bytes:
+    # What FastAPI did for a response_model route returning a model, with the default JSONResponse
+    data = asyncio.run(serialize_response(field=field, response_content=content))
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def timed(run, rounds: int):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, len(body)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    payloads = [
+        ("history page", history_rows(), history_page, history_payload, SpinHistoryPage),
+        ("recipe batch", batch_rows(), recipe_batch, batch_payload, List[RecipeWithIngredients]),
+    ]
+    for name, rows, build, payload, response_model in payloads:
+        field = create_response_field(name="response", type_=response_model)
+        variants = {
+            "validated": lambda: fastapi_json(field, build(rows, validated)),
+            "construct": lambda: encode(build(rows, constructed)),
+            "orjson": lambda: encode(payload(rows)),
+            "msgpack": lambda: encode(payload(rows), MSGPACK_MEDIA_TYPE),
+        }
+        baseline = None
+        print(f"{name} ({PAGE_SIZE} items), median of {rounds}")
+        for variant, run in variants.items():
+            ms, size = timed(run, rounds)
+            baseline = baseline or ms
+            print(f"  {variant:<10} {ms:7.2f} ms  {size / 1024:6.1f} KiB  {baseline / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Find the saturation point: a concurrency sweep against a local server.
+
+Starts start.py (or uvicorn app.main:app) on a seeded temporary SQLite file
+and, for each concurrency level, runs that many async clients in a closed
+loop for a fixed time. Clients send a mix of spins, preference edits and
+history reads as different users. For each level it reports throughput,
+latency percentiles and histograms, HTTP/transport errors, and server-side
+errors found in the server log ("database is locked", pool timeouts).
+
+Usage:
+    python -m benchmarks.load_test [--levels 1,5,10,25,50,100,200] [--duration 15]
+                                   [--server start|uvicorn] [--recipes 5000] [--timeout 10]
+                                   [--url http://host:port] [--output FILE]
+
+Environment variables (DB_ASYNC, RECIPE_MATCHER, SPIN_HISTORY_WRITE_MODE, ...)
+are passed through to the server. --url skips starting and seeding a server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+from benchmarks.bench_async import INGREDIENTS, MEAL_TYPES, free_port, seed_database, wait_until_ready
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+USERS = [f"user{i}" for i in range(50)]
+# Operation name -> share of requests
+MIX = {"spin": 0.6, "history": 0.25, "preference": 0.15}
+# Upper bounds in milliseconds; the last bucket is everything slower
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+# Server log patterns counted per level
+SERVER_ERRORS = {
+    "database is locked": re.compile(r"database is locked"),
+    "pool timeout": re.compile(r"QueuePool limit|TimeoutError"),
+    "traceback": re.compile(r"^Traceback", re.MULTILINE),
+}
+
+
+class Stats:
+    """Latencies and failures of one operation at one concurrency level."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+
+    def record(self, seconds: float, error: Optional[str] = None):
+        self.latencies.append(seconds * 1000)
+        if error:
+            self.errors[error] += 1
+
+    def summary(self) -> Dict:
+        ms = sorted(self.latencies)
+        if len(ms) > 1:
+            cuts = statistics.quantiles(ms, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = ms[0] if ms else 0.0
+        histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for latency in ms:
+            histogram[next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if latency <= bound),
+                           len(HISTOGRAM_BUCKETS_MS))] += 1
+        return {
+            "requests": len(ms),
+            "errors": dict(self.errors),
+            "error_rate": round(sum(self.errors.values()) / len(ms), 4) if ms else 0.0,
+            "p50_ms": round(p50, 2),
+            "p95_ms": round(p95, 2),
+            "p99_ms": round(p99, 2),
+            "max_ms": round(ms[-1], 2) if ms else 0.0,
+            "histogram": histogram,
+        }
+
+
+class Client:
+    """One simulated user sending the request mix in a closed loop."""
+
+    def __init__(self, http: httpx.AsyncClient, rng: random.Random):
+        self.http = http
+        self.rng = rng
+        self.headers = {"X-User-Id": rng.choice(USERS)}
+        self.liked_id: Optional[int] = None
+
+    async def spin(self) -> httpx.Response:
+        return await self.http.get("/api/recipes/random", headers=self.headers, params={
+            "meal": self.rng.choice(MEAL_TYPES), "allow_one_extra": True, "hide_recent": True
+        })
+
+    async def history(self) -> httpx.Response:
+        return await self.http.get("/api/history/", params={"limit": 20})
+
+    async def preference(self) -> httpx.Response:
+        # Alternate like/unlike so the lists stay small
+        if self.liked_id is None:
+            response = await self.http.post("/api/ingredients/liked", headers=self.headers,
+                                            json={"name": self.rng.choice(INGREDIENTS)})
+            if response.status_code == 200:
+                self.liked_id = response.json()["id"]
+            return response
+        response = await self.http.delete(f"/api/ingredients/liked/{self.liked_id}", headers=self.headers)
+        self.liked_id = None
+        return response
+
+    async def run(self, deadline: float, stats: Dict[str, Stats]):
+        operations = list(MIX)
+        weights = list(MIX.values())
+        while time.perf_counter() < deadline:
+            operation = self.rng.choices(operations, weights)[0]
+            start = time.perf_counter()
+            error = None
+            try:
+                response = await getattr(self, operation)()
+                if response.status_code >= 500:
+                    error = f"http {response.status_code}"
+            except httpx.TimeoutException:
+                error = "timeout"
+            except httpx.HTTPError as exc:
+                error = type(exc).__name__
+            stats[operation].record(time.perf_counter() - start, error)
+
+
+async def run_level(base_url: str, concurrency: int, duration: float, timeout: float, seed: int) -> Dict:
+    """Run `concurrency` clients for `duration` seconds."""
+    stats: Dict[str, Stats] = defaultdict(Stats)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as http:
+        clients = [Client(http, random.Random(seed * 1000 + i)) for i in range(concurrency)]
+        start = time.perf_counter()
+        await asyncio.gather(*(client.run(start + duration, stats) for client in clients))
+        elapsed = time.perf_counter() - start
+
+    total = Stats()
+    for operation_stats in stats.values():
+        total.latencies += operation_stats.latencies
+        total.errors += operation_stats.errors
+    summary = total.summary()
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "throughput": round(summary["requests"] / elapsed, 1),
+        "ok_throughput": round((summary["requests"] - sum(total.errors.values())) / elapsed, 1),
+        "overall": summary,
+        "operations": {operation: stats[operation].summary() for operation in MIX},
+    }
+
+
+def count_server_errors(log_file: Optional[Path], offset: int):
+    """Count SERVER_ERRORS in the server log after `offset`; returns (counts, new offset)."""
+    if log_file is None:
+        return {}, offset
+    with open(log_file, "rb") as f:
+        f.seek(offset)
+        text = f.read().decode("utf-8", "replace")
+        offset = f.tell()
+    return {name: len(pattern.findall(text)) for name, pattern in SERVER_ERRORS.items()}, offset
+
+
+def start_server(server: str, db_file: str, log_file: Path):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_file}", DB_PATH=db_file,
+               API_HOST="127.0.0.1", PORT=str(port), API_PORT=str(port), LOG_LEVEL="WARNING")
+    if server == "start":
+        command = [sys.executable, "start.py"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    with open(log_file, "wb") as log:
+        process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def print_histogram(histogram: List[int], width: int = 40):
+    labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+    peak = max(histogram) or 1
+    for label, count in zip(labels, histogram):
+        if count:
+            print(f"      {label:>9} {'#' * max(1, round(count / peak * width)):<{width}} {count}")
+
+
+def print_level(level: Dict, show_histogram: bool):
+    overall = level["overall"]
+    server_errors = ", ".join(f"{name} {count}" for name, count in level.get("server_errors", {}).items() if count)
+    print(f"  c={level['concurrency']:<4} {level['throughput']:8.1f} req/s  "
+          f"p50 {overall['p50_ms']:8.1f}  p95 {overall['p95_ms']:8.1f}  p99 {overall['p99_ms']:8.1f} ms  "
+          f"errors {overall['error_rate'] * 100:5.1f}%" + (f"  [{server_errors}]" if server_errors else ""))
+    for operation, summary in level["operations"].items():
+        errors = ", ".join(f"{name} {count}" for name, count in summary["errors"].items())
+        print(f"      {operation:<10} {summary['requests']:6} req  p50 {summary['p50_ms']:8.1f}  "
+              f"p99 {summary['p99_ms']:8.1f} ms" + (f"  ({errors})" if errors else ""))
+    if show_histogram:
+        print_histogram(overall["histogram"])
+
+
+def saturation(levels: List[Dict], max_error_rate: float = 0.01) -> Dict:
+    """Peak-throughput level and the first level whose error rate exceeds `max_error_rate`."""
+    peak = max(levels, key=lambda level: level["ok_throughput"])
+    failing = next((level["concurrency"] for level in levels if level["overall"]["error_rate"] > max_error_rate), None)
+    return {"peak_concurrency": peak["concurrency"], "peak_throughput": peak["ok_throughput"],
+            "first_failing_concurrency": failing}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--levels", default="1,5,10,25,50,100,200", help="Comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per level")
+    parser.add_argument("--server", choices=["start", "uvicorn"], default="start",
+                        help="Run start.py or uvicorn app.main:app")
+    parser.add_argument("--timeout", type=float, default=10, help="Client timeout per request in seconds")
+    parser.add_argument("--recipes", type=int, default=5000, help="Recipes to seed")
+    parser.add_argument("--url", help="Use an already running server instead")
+    parser.add_argument("--histograms", action="store_true", help="Print a latency histogram per level")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = log_file = None
+        base_url = args.url
+        if base_url is None:
+            db_file = os.path.join(tmp, "load.db")
+            log_file = Path(tmp) / "server.log"
+            seed_database(db_file, args.recipes)
+            process, base_url = start_server(args.server, db_file, log_file)
+        try:
+            wait_until_ready(base_url)
+            print(f"{base_url}: {args.duration:g}s per level, mix " +
+                  ", ".join(f"{operation} {share:.0%}" for operation, share in MIX.items()))
+            results = []
+            offset = 0
+            for concurrency in levels:
+                level = asyncio.run(run_level(base_url, concurrency, args.duration, args.timeout, seed=concurrency))
+                level["server_errors"], offset = count_server_errors(log_file, offset)
+                results.append(level)
+                print_level(level, args.histograms)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    summary = saturation(results)
+    failing = summary["first_failing_concurrency"]
+    print(f"Peak {summary['peak_throughput']:.1f} ok req/s at c={summary['peak_concurrency']}; "
+          + (f"error rate above 1% from c={failing}" if failing else "error rate below 1% at all levels"))
+
+    run = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "server": args.url or args.server,
+            "recipes": None if args.url else args.recipes,
+            "duration": args.duration,
+            "mix": MIX,
+            "histogram_buckets_ms": HISTOGRAM_BUCKETS_MS,
+            "env": {name: os.environ[name] for name in
+                    ("DB_ASYNC", "RECIPE_MATCHER", "SPIN_HISTORY_WRITE_MODE", "DB_POOL_SIZE") if name in os.environ},
+        },
+        "saturation": summary,
+        "levels": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(run, indent=2))
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import pytest
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.db import get_session
+from app.main import app
+from app.services.ingredient_search import invalidate_ingredient_search_index
+from app.services.recipe_index import invalidate_recipe_index
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite engine shared by every connection of a test."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    """Database session on the in-memory test database."""
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def client(engine):
+    """API client whose requests use the in-memory test database."""
+    def get_test_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_test_session
+    invalidate_recipe_index()
+    invalidate_ingredient_search_index()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    invalidate_recipe_index()
+    invalidate_ingredient_search_index()
+
+
+@pytest.fixture
+def query_budget(engine):
+    """Context manager asserting that at most `max_queries` SQL statements run inside it.
+
+    Usage: ``with query_budget(3): client.get(...)``. The failure message lists
+    the statements, so an N+1 regression shows which query repeats.
+    """
+    @contextmanager
+    def budget(max_queries: int):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "after_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "after_cursor_execute", record)
+        assert len(statements) <= max_queries, (
+            f"{len(statements)} queries, budget {max_queries}:\n" + "\n".join(statements)
+        )
+
+    return budget
@@ -0,0 +1,207 @@
+import inspect
+import msgpack
+import pytest
+from unittest.mock import patch
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.util.concurrency import in_greenlet
+from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import db
+from app.core.settings import settings
+from app.db import get_async_session, get_session
+from app.models.models import Recipe
+from app.routers import history, ingredients, recipes, seed
+from app.routers.async_router import ROUTE_OPTIONS, build_async_router
+from app.services import spin_buffer
+from app.services.recipe_index import RecipeIndex, invalidate_recipe_index
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    """API client running the async routers on an aiosqlite database."""
+    db_file = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_file}")
+    SQLModel.metadata.create_all(sync_engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}")
+
+    async def get_test_async_session():
+        async with AsyncSession(async_engine) as session:
+            yield session
+
+    test_app = FastAPI()
+    for module in (recipes, ingredients, history, seed):
+        test_app.include_router(build_async_router(module.router))
+    test_app.dependency_overrides[get_async_session] = get_test_async_session
+
+    invalidate_recipe_index()
+    with TestClient(test_app) as client:
+        client.sync_engine = sync_engine
+        yield client
+    invalidate_recipe_index()
+    sync_engine.dispose()
+
+
+class TestBuildAsyncRouter:
+    """Test suite for the async router wrapper."""
+
+    def test_database_endpoints_are_async(self):
+        """Test that sync endpoints become coroutines and async ones are kept."""
+        async_router = build_async_router(seed.router)
+        endpoints = {route.path: route.endpoint for route in async_router.routes}
+
+        assert inspect.iscoroutinefunction(endpoints["/api/import/seed"])
+        assert endpoints["/api/import/seed/stream"] is seed.import_seed_stream
+
+    def test_routes_are_preserved(self):
+        """Test that paths, methods and response models match the sync router."""
+        async_router = build_async_router(recipes.router)
+        original = [(r.path, r.methods, r.response_model) for r in recipes.router.routes]
+        copied = [(r.path, r.methods, r.response_model) for r in async_router.routes]
+
+        assert copied == original
+
+    def test_openapi_matches_sync_app(self):
+        """Test that DB_ASYNC does not change the OpenAPI schema."""
+        sync_app, async_app = FastAPI(), FastAPI()
+        for module in (recipes, ingredients, history, seed):
+            sync_app.include_router(module.router)
+            async_app.include_router(build_async_router(module.router))
+
+        assert async_app.openapi() == sync_app.openapi()
+
+    def test_route_options_are_copied(self):
+        """Test that dependencies, response class and schema options survive the copy."""
+        router = APIRouter(prefix="/x", dependencies=[Depends(lambda: None)])
+
+        @router.get("/{item_id}", response_class=PlainTextResponse, responses={404: {"description": "Gone"}},
+                    include_in_schema=False, deprecated=True, operation_id="get_x",
+                    response_model_exclude_none=True, openapi_extra={"x-test": 1})
+        def get_x(item_id: int, session: Session = Depends(get_session)):
+            return "x"
+
+        original, = router.routes
+        copied, = build_async_router(router).routes
+
+        for option in ROUTE_OPTIONS:
+            assert getattr(copied, option) == getattr(original, option), option
+
+
+class TestAsyncEndpoints:
+    """Test suite for the API served through the async engine."""
+
+    def test_seed_and_spin(self, async_client):
+        """Test that a recipe can be seeded, liked, spun and read back."""
+        response = async_client.post("/api/import/seed", json=[{
+            "title": "Jajecznica", "source": "test", "url": "http://jajecznica",
+            "meal_type": "breakfast", "ingredients": ["jajko", "masło"], "steps_excerpt": "Smaż"
+        }])
+        assert response.status_code == 200
+
+        async_client.post("/api/ingredients/liked", json={"name": "jajko"})
+        response = async_client.get("/api/recipes/random", params={"meal": "breakfast", "allow_one_extra": True})
+
+        assert response.status_code == 200
+        assert response.json()["title"] == "Jajecznica"
+        assert response.json()["extra_ingredients_count"] == 1
+
+        history_items = async_client.get("/api/history/").json()["items"]
+        assert [item["recipe"]["title"] for item in history_items] == ["Jajecznica"]
+
+    def test_history_flush_runs_off_the_event_loop(self, async_client):
+        """Test that the spin buffer flush before a history read runs in a worker thread."""
+        flushed_in_greenlet = []
+        original_flush = spin_buffer.SpinHistoryBuffer.flush
+
+        def flush(buffer):
+            flushed_in_greenlet.append(in_greenlet())
+            return original_flush(buffer)
+
+        spin_buffer._buffer = None
+        with patch.object(settings, "spin_history_write_mode", "buffered"), \
+                patch.object(spin_buffer, "get_engine", return_value=async_client.sync_engine), \
+                patch.object(spin_buffer.SpinHistoryBuffer, "flush", flush):
+            with Session(async_client.sync_engine) as session:
+                session.add(Recipe(title="Zupa", source="test", url="http://zupa", meal_type="lunch",
+                                   steps_excerpt="Gotuj", normalized_ingredient_ids=[]))
+                session.commit()
+            async_client.get("/api/recipes/random", params={"meal": "lunch"})
+            history_items = async_client.get("/api/history/").json()["items"]
+        spin_buffer._buffer = None
+
+        assert [item["recipe"]["title"] for item in history_items] == ["Zupa"]
+        assert flushed_in_greenlet == [False]
+
+    def test_index_work_runs_off_the_event_loop(self, async_client):
+        """Test that building and matching the recipe index happen in worker threads, not on the loop."""
+        on_loop = []
+
+        def recording(method):
+            def wrapper(*args, **kwargs):
+                on_loop.append((method.__name__, in_greenlet()))
+                return method(*args, **kwargs)
+            return wrapper
+
+        with Session(async_client.sync_engine) as session:
+            session.add(Recipe(title="Zupa", source="test", url="http://zupa", meal_type="lunch",
+                               steps_excerpt="Gotuj", normalized_ingredient_ids=[]))
+            session.commit()
+        with patch.object(settings, "recipe_matcher", "bitset"), \
+                patch.object(RecipeIndex, "build", classmethod(recording(RecipeIndex.build.__func__))), \
+                patch.object(RecipeIndex, "matching_ids", recording(RecipeIndex.matching_ids)):
+            response = async_client.get("/api/recipes/random", params={"meal": "lunch"})
+
+        assert response.json()["title"] == "Zupa"
+        assert on_loop == [("build", False), ("matching_ids", False)]
+
+    def test_http_errors_propagate(self, async_client):
+        """Test that HTTPExceptions raised inside run_sync keep their status code."""
+        assert async_client.get("/api/recipes/random", params={"meal": "brunch"}).status_code == 400
+        assert async_client.get("/api/recipes/999").status_code == 404
+
+    def test_reads_rows_written_elsewhere(self, async_client):
+        """Test that the async session sees rows committed by the sync engine."""
+        with Session(async_client.sync_engine) as session:
+            session.add(Recipe(title="Zupa", source="test", url="http://zupa", meal_type="lunch",
+                               steps_excerpt="Gotuj", normalized_ingredient_ids=[]))
+            session.commit()
+
+        response = async_client.get("/api/recipes/1")
+
+        assert response.status_code == 200
+        assert response.json()["title"] == "Zupa"
+
+    def test_msgpack_negotiation(self, async_client):
+        """Test that the copied routes keep negotiating the response format."""
+        with Session(async_client.sync_engine) as session:
+            session.add(Recipe(title="Zupa", source="test", url="http://zupa", meal_type="lunch",
+                               steps_excerpt="Gotuj", normalized_ingredient_ids=[]))
+            session.commit()
+
+        response = async_client.get("/api/recipes/1", headers={"Accept": "application/msgpack"})
+
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content)["title"] == "Zupa"
+
+
+class TestAsyncDatabaseUrl:
+    """Test suite for deriving the async driver URL."""
+
+    @pytest.mark.parametrize("url,expected", [
+        ("sqlite:///./data/app.db", "sqlite+aiosqlite:///./data/app.db"),
+        ("postgresql://user@localhost/amciuday", "postgresql+asyncpg://user@localhost/amciuday"),
+        ("postgresql+psycopg2://user@localhost/amciuday", "postgresql+asyncpg://user@localhost/amciuday"),
+    ])
+    def test_driver_is_swapped(self, url, expected):
+        """Test that the sync driver is replaced with its async counterpart."""
+        with patch.object(settings, 'database_url', url), \
+                patch.object(settings, 'async_database_url', None):
+            assert db.get_async_database_url() == expected
+
+    def test_explicit_async_url_wins(self):
+        """Test that ASYNC_DATABASE_URL overrides the derived URL."""
+        with patch.object(settings, 'async_database_url', "sqlite+aiosqlite:///other.db"):
+            assert db.get_async_database_url() == "sqlite+aiosqlite:///other.db"
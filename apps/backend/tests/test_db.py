@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import patch
+
+from app import db
+from app.core.settings import settings
+
+
+@pytest.fixture
+def fresh_engine():
+    """Make sure each test starts and ends without a cached engine."""
+    db.dispose_engine()
+    yield
+    db.dispose_engine()
+
+
+class TestGetEngine:
+    """Test suite for the process-wide engine."""
+
+    def test_get_engine_is_cached(self, fresh_engine):
+        """Test that repeated calls reuse one engine and pool."""
+        with patch('app.db.create_db_engine') as mock_create:
+            first = db.get_engine()
+            second = db.get_engine()
+
+        assert first is second
+        mock_create.assert_called_once()
+
+    def test_dispose_engine_resets_cache(self, fresh_engine):
+        """Test that disposing closes the pool and a new engine is created afterwards."""
+        with patch('app.db.create_db_engine') as mock_create:
+            first = db.get_engine()
+            db.dispose_engine()
+            db.get_engine()
+
+        first.dispose.assert_called_once()
+        assert mock_create.call_count == 2
+
+    def test_dispose_engine_without_engine(self, fresh_engine):
+        """Test that disposing before first use is a no-op."""
+        db.dispose_engine()
+        assert db._engine is None
+
+
+class TestPoolOptions:
+    """Test suite for pool options taken from settings."""
+
+    def test_pool_options_from_settings(self):
+        """Test that pool sizing comes from settings."""
+        with patch.object(settings, 'db_pool_size', 7), \
+                patch.object(settings, 'db_max_overflow', 3), \
+                patch.object(settings, 'db_pool_recycle', 60):
+            options = db._pool_options("postgresql://user@localhost/amciuday")
+
+        assert options["pool_size"] == 7
+        assert options["max_overflow"] == 3
+        assert options["pool_recycle"] == 60
+        assert options["pool_pre_ping"] is True
+
+    def test_pool_options_in_memory_sqlite(self):
+        """Test that in-memory SQLite gets no pool sizing options."""
+        options = db._pool_options("sqlite://:memory:")
+
+        assert "pool_size" not in options
+        assert "max_overflow" not in options
+
+    def test_sqlite_engine_uses_pool_settings(self, tmp_path):
+        """Test that a file-based SQLite engine is built with the configured pool."""
+        db_file = tmp_path / "test.db"
+        with patch.object(settings, 'database_url', f"sqlite:///{db_file}"), \
+                patch.object(settings, 'db_path', str(db_file)), \
+                patch.object(settings, 'db_pool_size', 3):
+            engine = db.create_db_engine()
+
+        try:
+            assert engine.pool.size() == 3
+        finally:
+            engine.dispose()
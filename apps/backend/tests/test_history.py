@@ -0,0 +1,253 @@
+import asyncio
+import threading
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.settings import settings
+from app.models.models import Recipe, SpinHistory, SpinHistoryDaily
+from app.services.history_retention import (
+    _postgres_rollup, apply_retention, rollup_and_purge, run_retention_job_async
+)
+
+
+def add_spins(session, count: int, meal_type: str = "dinner", same_time: bool = False):
+    recipe = Recipe(title="Zupa", source="test", url=f"http://{meal_type}", meal_type=meal_type,
+                    steps_excerpt="Steps", normalized_ingredient_ids=[])
+    session.add(recipe)
+    session.commit()
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    for i in range(count):
+        spun_at = start if same_time else start + timedelta(minutes=i)
+        session.add(SpinHistory(recipe_id=recipe.id, meal_type=meal_type,
+                                allow_one_extra=False, spun_at=spun_at))
+    session.commit()
+
+
+def collect_pages(client, **params):
+    ids = []
+    pages = 0
+    cursor = None
+    while True:
+        query = dict(params)
+        if cursor:
+            query["cursor"] = cursor
+        data = client.get("/api/history/", params=query).json()
+        ids.extend(item["id"] for item in data["items"])
+        pages += 1
+        cursor = data["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+
+class TestHistoryPagination:
+    """Test suite for keyset-paginated GET /api/history/."""
+
+    def test_first_page(self, client, session):
+        """Test that the first page holds the newest entries and a cursor."""
+        add_spins(session, 5)
+
+        data = client.get("/api/history/", params={"limit": 2}).json()
+
+        assert [item["id"] for item in data["items"]] == [5, 4]
+        assert data["next_cursor"]
+
+    def test_pages_cover_all_entries_once(self, client, session):
+        """Test that following cursors returns every entry exactly once, newest first."""
+        add_spins(session, 7)
+
+        ids, pages = collect_pages(client, limit=3)
+
+        assert ids == [7, 6, 5, 4, 3, 2, 1]
+        assert pages == 3
+
+    def test_ties_on_spun_at(self, client, session):
+        """Test that entries with the same timestamp are ordered by id across pages."""
+        add_spins(session, 5, same_time=True)
+
+        ids, _ = collect_pages(client, limit=2)
+
+        assert ids == [5, 4, 3, 2, 1]
+
+    def test_exact_page_has_no_cursor(self, client, session):
+        """Test that a full last page does not advertise another page."""
+        add_spins(session, 2)
+
+        data = client.get("/api/history/", params={"limit": 2}).json()
+
+        assert len(data["items"]) == 2
+        assert data["next_cursor"] is None
+
+    def test_pagination_with_meal_filter(self, client, session):
+        """Test that cursors respect the meal filter."""
+        add_spins(session, 3, meal_type="dinner")
+        add_spins(session, 3, meal_type="lunch")
+
+        ids, _ = collect_pages(client, limit=2, meal="lunch")
+
+        assert ids == [6, 5, 4]
+
+    def test_invalid_cursor(self, client):
+        """Test that a malformed cursor is rejected."""
+        assert client.get("/api/history/", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/api/history/", params={"cursor": "WzFd"}).status_code == 400
+
+    def test_limit_bounds(self, client):
+        """Test that the page size is bounded."""
+        assert client.get("/api/history/", params={"limit": 0}).status_code == 422
+        assert client.get("/api/history/", params={"limit": 1000}).status_code == 422
+
+
+class TestClearHistory:
+    """Test suite for DELETE /api/history/."""
+
+    def test_clear_all(self, client, session):
+        """Test that all entries are deleted in one statement."""
+        add_spins(session, 4)
+
+        response = client.delete("/api/history/")
+
+        assert response.json()["message"] == "Cleared 4 history entries"
+        assert session.exec(select(SpinHistory)).all() == []
+
+    def test_clear_date_range(self, client, session):
+        """Test that only entries inside the date range are deleted."""
+        add_spins(session, 1)
+        session.add(SpinHistory(recipe_id=1, meal_type="dinner", allow_one_extra=False,
+                                spun_at=datetime(2025, 1, 5, 8, 0)))
+        session.add(SpinHistory(recipe_id=1, meal_type="dinner", allow_one_extra=False,
+                                spun_at=datetime(2025, 1, 9, 8, 0)))
+        session.commit()
+
+        response = client.delete("/api/history/", params={"from_date": "2025-01-02", "to_date": "2025-01-05"})
+
+        assert response.json()["message"] == "Cleared 1 history entries"
+        remaining = [entry.spun_at.day for entry in session.exec(select(SpinHistory))]
+        assert sorted(remaining) == [1, 9]
+
+
+class TestHistoryRetention:
+    """Test suite for rolling old spins up into daily counts."""
+
+    def add_spin(self, session, recipe_id: int, spun_at: datetime, meal_type: str = "dinner"):
+        session.add(SpinHistory(recipe_id=recipe_id, meal_type=meal_type,
+                                allow_one_extra=False, spun_at=spun_at))
+
+    def test_rollup_and_purge(self, session):
+        """Test that old spins become per-day/per-recipe counts and are deleted."""
+        add_spins(session, 0)
+        self.add_spin(session, 1, datetime(2025, 1, 1, 8, 0))
+        self.add_spin(session, 1, datetime(2025, 1, 1, 20, 0))
+        self.add_spin(session, 1, datetime(2025, 1, 2, 8, 0))
+        self.add_spin(session, 1, datetime(2025, 3, 1, 8, 0))
+        session.commit()
+
+        result = rollup_and_purge(session, datetime(2025, 2, 1))
+
+        assert result == {"rolled_up_rows": 2, "deleted": 3}
+        daily = {row.day: row.spin_count for row in session.exec(select(SpinHistoryDaily))}
+        assert daily == {date(2025, 1, 1): 2, date(2025, 1, 2): 1}
+        assert len(session.exec(select(SpinHistory)).all()) == 1
+
+    def test_rollup_adds_to_existing_counts(self, session):
+        """Test that repeated runs add to the existing daily rows."""
+        add_spins(session, 0)
+        self.add_spin(session, 1, datetime(2025, 1, 1, 8, 0))
+        session.commit()
+        rollup_and_purge(session, datetime(2025, 2, 1))
+
+        self.add_spin(session, 1, datetime(2025, 1, 1, 9, 0))
+        session.commit()
+        rollup_and_purge(session, datetime(2025, 2, 1))
+
+        assert session.exec(select(SpinHistoryDaily)).one().spin_count == 2
+
+    def test_second_run_over_same_data_is_a_no_op(self, session):
+        """Test that running the job twice over the same spins counts them once."""
+        add_spins(session, 3)
+
+        first = rollup_and_purge(session, datetime(2025, 2, 1))
+        second = rollup_and_purge(session, datetime(2025, 2, 1))
+
+        assert first == {"rolled_up_rows": 1, "deleted": 3}
+        assert second == {"rolled_up_rows": 0, "deleted": 0}
+        assert session.exec(select(SpinHistoryDaily)).one().spin_count == 3
+
+    def test_concurrent_jobs_count_each_spin_once(self, tmp_path):
+        """Test that two workers rolling up the same spins at once do not double-count them."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            add_spins(session, 50)
+        barrier = threading.Barrier(2)
+        results = []
+
+        def job():
+            with Session(engine) as session:
+                barrier.wait()
+                results.append(rollup_and_purge(session, datetime(2025, 2, 1)))
+
+        threads = [threading.Thread(target=job) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with Session(engine) as session:
+            assert session.exec(select(SpinHistoryDaily)).one().spin_count == 50
+        assert sorted(result["deleted"] for result in results) == [0, 50]
+        engine.dispose()
+
+    def test_postgres_rollup_counts_deleted_rows(self):
+        """Test that on PostgreSQL the upsert reads the rows returned by the DELETE."""
+        sql = " ".join(str(_postgres_rollup(datetime(2025, 2, 1)).compile(dialect=postgresql.dialect())).split())
+
+        assert sql.startswith("WITH expired AS (DELETE FROM spinhistory WHERE spinhistory.spun_at <")
+        assert "FROM expired GROUP BY" in sql
+        assert "INSERT INTO spinhistorydaily" in sql and "FROM counts ON CONFLICT" in sql
+
+    def test_async_job_uses_async_engine(self, tmp_path):
+        """Test that under DB_ASYNC the scheduled job runs on the async engine."""
+        db_file = tmp_path / "history.db"
+        engine = create_engine(f"sqlite:///{db_file}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            add_spins(session, 2)
+
+        async def run_job():
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}")
+            try:
+                with patch("app.services.history_retention.get_async_engine", return_value=async_engine), \
+                        patch("app.services.history_retention.get_engine", side_effect=AssertionError):
+                    return await run_retention_job_async()
+            finally:
+                await async_engine.dispose()
+
+        with patch.object(settings, "history_retention_days", 30):
+            result = asyncio.run(run_job())
+
+        assert result == {"rolled_up_rows": 1, "deleted": 2}
+        engine.dispose()
+
+    def test_retention_disabled(self, session):
+        """Test that retention does nothing when disabled."""
+        add_spins(session, 2)
+
+        with patch.object(settings, "history_retention_days", 0):
+            assert apply_retention(session) == {"rolled_up_rows": 0, "deleted": 0}
+
+        assert len(session.exec(select(SpinHistory)).all()) == 2
+
+    def test_retention_endpoint(self, client, session):
+        """Test running retention on demand keeps recent spins."""
+        add_spins(session, 0)
+        self.add_spin(session, 1, datetime.utcnow() - timedelta(days=40))
+        self.add_spin(session, 1, datetime.utcnow())
+        session.commit()
+
+        response = client.post("/api/history/retention", params={"days": 30})
+
+        assert response.json()["deleted"] == 1
+        assert len(session.exec(select(SpinHistory)).all()) == 1
@@ -0,0 +1,147 @@
+import random
+import pytest
+from unittest.mock import patch
+
+from app.services import ingredient_search
+from app.services.ingredient_search import IngredientSearchIndex, fold, search_keys
+from app.models.models import Ingredient, Recipe, RecipeIngredient
+from app.models.schemas import SeedRecipe
+from app.services.seed_import import import_recipes
+
+
+INGREDIENTS = [
+    (1, "ząbek czosnku", "czosnek"),
+    (2, "Żurek", "żurek"),
+    (3, "zielona pietruszka", "pietruszka"),
+    (4, "łosoś wędzony", "łosoś"),
+    (5, "ziemniaki", "ziemniak"),
+    (6, "zabielacz", "zabielacz"),
+]
+RECIPE_COUNTS = [(1, 40), (2, 3), (3, 12), (5, 90)]
+
+
+@pytest.fixture
+def index():
+    return IngredientSearchIndex.build(INGREDIENTS, RECIPE_COUNTS)
+
+
+def names(results):
+    return [name for _, name, _, _ in results]
+
+
+class TestFolding:
+    """Test suite for diacritic folding and search keys."""
+
+    def test_fold_polish_letters(self):
+        """Test that every Polish letter folds to its ASCII base, ł included."""
+        assert fold("  Zażółć  GĘŚLĄ jaźń ") == "zazolc gesla jazn"
+
+    def test_keys_for_every_word(self):
+        """Test that name and normalized form are indexed from each word start."""
+        assert search_keys("ząbek czosnku", "czosnek") == ["zabek czosnku", "czosnku", "czosnek"]
+
+
+class TestIngredientSearchIndex:
+    """Test suite for prefix lookups."""
+
+    def test_prefix_without_diacritics(self, index):
+        """Test that "zab" matches "ząbek" and plain "zabielacz", most used first."""
+        assert names(index.search("zab")) == ["ząbek czosnku", "zabielacz"]
+
+    def test_ranked_by_recipe_count(self, index):
+        """Test ranking by recipe frequency across name and word matches."""
+        assert names(index.search("z")) == ["ziemniaki", "ząbek czosnku", "zielona pietruszka", "Żurek", "zabielacz"]
+        assert index.search("ziem")[0] == (5, "ziemniaki", "ziemniak", 90)
+
+    def test_matches_inner_words_and_normalized(self, index):
+        """Test that later words and the normalized form are searchable, each ingredient once."""
+        assert names(index.search("czos")) == ["ząbek czosnku"]
+        assert names(index.search("pietr")) == ["zielona pietruszka"]
+        assert names(index.search("LOS")) == ["łosoś wędzony"]
+
+    def test_limit_and_empty_query(self, index):
+        """Test the result limit and that blank queries match nothing."""
+        assert len(index.search("z", limit=2)) == 2
+        assert index.search("  ") == []
+        assert index.search("xyz") == []
+
+    def test_incremental_add(self, index):
+        """Test that added ingredients are found without a rebuild and duplicates are ignored."""
+        index.add(7, "żółtko", "żółtko")
+        index.add(7, "żółtko", "żółtko")
+        index.add_recipe_counts({7: 100})
+
+        assert index.search("zol") == [(7, "żółtko", "żółtko", 100)]
+        assert names(index.search("z", limit=1)) == ["żółtko"]
+        assert len(index) == 7
+
+    def test_blocks_match_a_full_scan(self):
+        """Test that precomputed block tops and pending keys give the same results as scanning every key."""
+        rng = random.Random(3)
+        letters = "abcząłóż"
+        rows = [(i, "".join(rng.choice(letters) for _ in range(rng.randint(1, 6))) + f" {i}", f"n{i}")
+                for i in range(1, 3000)]
+        counts = {i: rng.randint(0, 50) for i in range(1, 3000)}
+        with patch.object(ingredient_search, "MAX_PENDING", 200):
+            index = IngredientSearchIndex.build(rows[:2000], [(i, counts[i]) for i in range(1, 2000)])
+            for row in rows[2000:]:
+                index.add(*row)
+            index.add_recipe_counts({i: counts[i] for i in range(2000, 3000)})
+
+        for prefix in ["a", "z", "ab", "zo", "cal", "b 1"]:
+            expected = sorted(
+                (row for row in rows if any(key.startswith(prefix) for key in search_keys(row[1], row[2]))),
+                key=lambda row: (-counts[row[0]], len(row[1]), row[1])
+            )[:10]
+            assert [result[0] for result in index.search(prefix)] == [row[0] for row in expected], prefix
+
+
+class TestSearchEndpoint:
+    """Test suite for GET /api/ingredients/search."""
+
+    @pytest.fixture
+    def catalogue(self, session):
+        for ingredient_id, name, normalized in INGREDIENTS:
+            session.add(Ingredient(id=ingredient_id, name=name, normalized=normalized))
+        for recipe_id in range(1, 4):
+            session.add(Recipe(id=recipe_id, title=f"R{recipe_id}", source="test", url=f"http://{recipe_id}",
+                               meal_type="dinner", steps_excerpt="s", normalized_ingredient_ids=[]))
+            session.add(RecipeIngredient(recipe_id=recipe_id, ingredient_id=6, amount_text="1"))
+        session.add(RecipeIngredient(recipe_id=1, ingredient_id=1, amount_text="1"))
+        session.commit()
+        return session
+
+    def test_search(self, client, catalogue):
+        """Test results with recipe counts."""
+        response = client.get("/api/ingredients/search", params={"q": "Zab"})
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"id": 6, "name": "zabielacz", "normalized": "zabielacz", "recipe_count": 3},
+            {"id": 1, "name": "ząbek czosnku", "normalized": "czosnek", "recipe_count": 1},
+        ]
+
+    def test_validation(self, client):
+        """Test that the query is required and the limit bounded."""
+        assert client.get("/api/ingredients/search").status_code == 422
+        assert client.get("/api/ingredients/search", params={"q": "a", "limit": 51}).status_code == 422
+
+    def test_added_ingredient_is_searchable(self, client, catalogue, query_budget):
+        """Test that a newly liked ingredient shows up without rebuilding the index."""
+        client.get("/api/ingredients/search", params={"q": "a"})  # builds the index
+        client.post("/api/ingredients/liked", json={"name": "Szczypiorek"})
+
+        with query_budget(0):
+            results = client.get("/api/ingredients/search", params={"q": "szczyp"}).json()
+        assert [result["name"] for result in results] == ["Szczypiorek"]
+
+    def test_import_updates_counts(self, client, catalogue, session):
+        """Test that imported recipes add new ingredients and recipe counts in place."""
+        client.get("/api/ingredients/search", params={"q": "a"})
+        recipes = [SeedRecipe(title=f"Nowy {i}", source="test", url=f"http://new/{i}", meal_type="lunch",
+                              steps_excerpt="s", ingredients=["ziemniaki", "koperek"]) for i in range(5)]
+        import_recipes(session, recipes)
+
+        results = client.get("/api/ingredients/search", params={"q": "k"}).json()
+        assert [(result["name"], result["recipe_count"]) for result in results] == [("koperek", 5)]
+        assert client.get("/api/ingredients/search", params={"q": "ziem"}).json()[0]["recipe_count"] == 5
@@ -0,0 +1,141 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.core import metrics
+from app.core.settings import settings
+from app.models.models import Ingredient, LikedIngredient, Recipe, RecipeIngredient
+
+
+class TestRegistry:
+    """Test suite for the text exposition format."""
+
+    def test_counter_and_gauge(self):
+        """Test HELP/TYPE lines, label escaping and the _total suffix."""
+        registry = metrics.Registry()
+        counter = registry.register(metrics.Counter("jobs", "Jobs done", ("kind",)))
+        gauge = registry.register(metrics.Gauge("queue", "Queued jobs"))
+        counter.inc(kind='a"b')
+        counter.inc(2, kind='a"b')
+        gauge.inc(3)
+        gauge.dec()
+
+        assert registry.render().splitlines() == [
+            "# HELP jobs Jobs done",
+            "# TYPE jobs counter",
+            'jobs_total{kind="a\\"b"} 3',
+            "# HELP queue Queued jobs",
+            "# TYPE queue gauge",
+            "queue 2",
+        ]
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts, +Inf, sum and count."""
+        histogram = metrics.Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, route="/x")
+
+        assert histogram.render()[2:] == [
+            'latency_seconds_bucket{route="/x",le="0.1"} 2',
+            'latency_seconds_bucket{route="/x",le="1"} 3',
+            'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+            'latency_seconds_sum{route="/x"} 3.65',
+            'latency_seconds_count{route="/x"} 4',
+        ]
+
+    def test_duplicate_name_rejected(self):
+        """Test that a metric name can only be registered once."""
+        registry = metrics.Registry()
+        registry.register(metrics.Counter("jobs", "Jobs done"))
+        with pytest.raises(ValueError):
+            registry.register(metrics.Gauge("jobs", "Jobs"))
+
+
+class TestMetricsEndpoint:
+    """Test suite for GET /metrics and the request/query instrumentation."""
+
+    def test_requests_labelled_by_route_template(self, client):
+        """Test that path parameters do not create new series."""
+        before = metrics.HTTP_REQUESTS.value(method="GET", route="/api/recipes/{recipe_id}", status="404")
+        client.get("/api/recipes/123456")
+        client.get("/api/recipes/654321")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == metrics.CONTENT_TYPE
+        assert metrics.HTTP_REQUESTS.value(method="GET", route="/api/recipes/{recipe_id}", status="404") == before + 2
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/api/recipes/{recipe_id}",le="+Inf"}' \
+            in response.text
+        assert "/api/recipes/123456" not in response.text
+
+    def test_unmatched_route(self, client):
+        """Test that unknown paths share one label."""
+        before = metrics.HTTP_REQUESTS.value(method="GET", route="unmatched", status="404")
+        client.get("/no/such/path")
+        assert metrics.HTTP_REQUESTS.value(method="GET", route="unmatched", status="404") == before + 1
+
+    def test_query_metrics(self, client):
+        """Test that SQL statements are counted and timed."""
+        before = metrics.DB_QUERIES.value(statement="SELECT")
+        client.get("/api/ingredients/liked")
+        assert metrics.DB_QUERIES.value(statement="SELECT") > before
+        assert metrics.DB_QUERY_DURATION.count(statement="SELECT") > 0
+
+    def test_failed_statements(self, engine):
+        """Test that a failing statement is counted as an error and leaves no start time on the connection."""
+        metrics.install_query_metrics()
+        errors = metrics.DB_QUERY_ERRORS.value(statement="SELECT")
+        queries = metrics.DB_QUERIES.value(statement="SELECT")
+
+        with engine.connect() as connection:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM no_such_table"))
+            assert connection.info["metrics_query_start"] == []
+
+        assert metrics.DB_QUERY_ERRORS.value(statement="SELECT") == errors + 3
+        assert metrics.DB_QUERIES.value(statement="SELECT") == queries + 3
+
+    def test_spin_and_fallback_counters(self, client, session):
+        """Test spins per meal type and the closest-match fallback counter."""
+        for ingredient_id in (1, 2, 3):
+            session.add(Ingredient(id=ingredient_id, name=f"i{ingredient_id}", normalized=f"i{ingredient_id}"))
+            session.add(RecipeIngredient(recipe_id=1, ingredient_id=ingredient_id, amount_text=""))
+        session.add(Recipe(id=1, title="R1", source="test", url="http://1", meal_type="snack",
+                           steps_excerpt="s", normalized_ingredient_ids=[1, 2, 3]))
+        session.add(LikedIngredient(user_id=settings.default_user_id, ingredient_id=1))
+        session.commit()
+        params = {"meal": "snack", "allow_one_extra": False, "hide_recent": False}
+
+        for matcher in ("python", "bitset", "sql"):
+            spins = metrics.RECIPE_SPINS.value(meal_type="snack")
+            fallbacks = metrics.RECIPE_MATCH_FALLBACKS.value(matcher=matcher, meal_type="snack")
+            with patch.object(settings, 'recipe_matcher', matcher):
+                assert client.get("/api/recipes/random", params=params).status_code == 200
+
+            assert metrics.RECIPE_SPINS.value(meal_type="snack") == spins + 1
+            assert metrics.RECIPE_MATCH_FALLBACKS.value(matcher=matcher, meal_type="snack") == fallbacks + 1
+
+
+class TestPoolStatus:
+    """Test suite for the connection pool gauges."""
+
+    def test_pool_gauges(self, tmp_path):
+        """Test that the sync engine's pool is reported while a connection is checked out."""
+        db_file = tmp_path / "pool.db"
+        db.dispose_engine()
+        try:
+            with patch.object(settings, 'database_url', f"sqlite:///{db_file}"), \
+                    patch.object(settings, 'db_path', str(db_file)), \
+                    patch.object(settings, 'db_pool_size', 3):
+                with db.get_engine().connect():
+                    status = db.pool_status()["sync"]
+                    text = metrics.REGISTRY.render()
+        finally:
+            db.dispose_engine()
+
+        assert status == {"size": 3, "checked_out": 1, "overflow": -2}
+        assert 'db_pool_checked_out{engine="sync"} 1' in text
@@ -0,0 +1,202 @@
+import gzip
+import json
+import pytest
+from unittest.mock import patch
+from sqlmodel import select
+
+from app.core.settings import settings
+from app.models.models import Recipe
+from app.services.ndjson_import import DECOMPRESS_STEP, NDJSONLineReader, import_ndjson_lines, iter_file_lines
+
+
+def seed_line(url: str, **overrides) -> bytes:
+    recipe = {
+        "title": f"Recipe {url}",
+        "source": "test",
+        "url": url,
+        "meal_type": "lunch",
+        "steps_excerpt": "Steps",
+        "ingredients": ["sól", "pieprz"],
+    }
+    recipe.update(overrides)
+    return json.dumps(recipe, ensure_ascii=False).encode("utf-8")
+
+
+def ndjson(*lines: bytes) -> bytes:
+    return b"\n".join(lines) + b"\n"
+
+
+def feed_in_pieces(data: bytes, size: int):
+    reader = NDJSONLineReader()
+    lines = []
+    for start in range(0, len(data), size):
+        lines.extend(reader.feed(data[start:start + size]))
+    lines.extend(reader.close())
+    return lines
+
+
+class TestNDJSONLineReader:
+    """Test suite for incremental line splitting."""
+
+    def test_lines_split_across_chunks(self):
+        """Test that lines are reassembled regardless of chunk boundaries."""
+        data = b'{"a": 1}\n{"b": 2}\n{"c": 3}'
+        assert feed_in_pieces(data, 3) == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+    def test_gzip_input(self):
+        """Test that gzip-compressed input is detected and decompressed."""
+        data = b'{"a": 1}\n{"b": "\xc5\xbc"}\n'
+        assert feed_in_pieces(gzip.compress(data), 1) == [b'{"a": 1}', b'{"b": "\xc5\xbc"}']
+
+    def test_concatenated_gzip_members(self):
+        """Test that every member of concatenated gzip input is read, whatever the chunk size."""
+        data = gzip.compress(ndjson(b"1", b"2")) + gzip.compress(ndjson(b"3")) + b"\x00" * 8 + gzip.compress(b"4")
+
+        for size in (1, 7, len(data)):
+            assert feed_in_pieces(data, size) == [b"1", b"2", b"3", b"4"]
+
+    def test_single_byte_input(self):
+        """Test that input shorter than the gzip magic is still returned."""
+        reader = NDJSONLineReader()
+        assert list(reader.feed(b"1")) == []
+        assert list(reader.close()) == [b"1"]
+
+    def test_line_too_long(self):
+        """Test that an unterminated oversized line is rejected."""
+        reader = NDJSONLineReader(max_line_bytes=10)
+        with pytest.raises(ValueError):
+            list(reader.feed(b"x" * 20))
+
+    def test_complete_line_too_long(self):
+        """Test that an oversized line is rejected even when it ends inside the chunk."""
+        reader = NDJSONLineReader(max_line_bytes=10)
+        with pytest.raises(ValueError):
+            list(reader.feed(b"short\n" + b"x" * 20 + b"\nshort\n"))
+
+    def test_gzip_is_inflated_in_steps(self):
+        """Test that a highly compressed chunk is inflated step by step as its lines are consumed."""
+        line = b"x" * 1000
+        data = gzip.compress((line + b"\n") * 10_000)
+        reader = NDJSONLineReader()
+        lines = reader.feed(data)
+
+        assert next(lines) == line
+        assert len(reader._buffer) < DECOMPRESS_STEP
+        assert reader._decompressor.unconsumed_tail
+        assert 1 + len(list(lines)) + len(list(reader.close())) == 10_000
+
+    def test_gzip_line_too_long(self):
+        """Test that an oversized line inside gzip input is rejected."""
+        reader = NDJSONLineReader(max_line_bytes=100)
+        with pytest.raises(ValueError):
+            list(reader.feed(gzip.compress(b"x" * 10_000 + b"\n")))
+
+    def test_iter_file_lines_gzip(self, tmp_path):
+        """Test reading a gzip-compressed NDJSON file."""
+        path = tmp_path / "recipes.ndjson.gz"
+        path.write_bytes(gzip.compress(ndjson(b"1", b"2")))
+        assert list(iter_file_lines(str(path))) == [b"1", b"2"]
+
+
+class TestImportNDJSONLines:
+    """Test suite for batched NDJSON import."""
+
+    def test_import_in_batches(self, session):
+        """Test that lines are imported in fixed-size batches with progress."""
+        lines = [seed_line(f"http://{i}") for i in range(5)]
+
+        report = import_ndjson_lines(session, lines, batch_size=2)
+
+        assert report["imported"] == 5
+        assert report["total_processed"] == 5
+        assert [batch["imported"] for batch in report["batches"]] == [2, 2, 1]
+        assert len(session.exec(select(Recipe)).all()) == 5
+
+    def test_rejected_lines_are_reported(self, session):
+        """Test that invalid lines are skipped and reported with line numbers."""
+        lines = [
+            seed_line("http://1"),
+            b"not json",
+            b"",
+            seed_line("http://2", meal_type=None),
+            b"[1, 2]",
+            seed_line("http://1"),
+        ]
+
+        report = import_ndjson_lines(session, lines, batch_size=10)
+
+        assert report["imported"] == 1
+        assert report["rejected_count"] == 3
+        assert [r["line"] for r in report["rejected"]] == [2, 4, 5]
+        assert report["batches"][0]["skipped"] == 1
+
+    def test_rejected_report_is_capped(self, session):
+        """Test that only the first few rejected lines are kept."""
+        with patch.object(settings, "seed_max_rejected_reported", 2):
+            report = import_ndjson_lines(session, [b"bad"] * 5)
+
+        assert report["rejected_count"] == 5
+        assert len(report["rejected"]) == 2
+
+
+class TestSeedStreamEndpoint:
+    """Test suite for POST /api/import/seed/stream."""
+
+    def test_stream_body(self, client):
+        """Test importing an NDJSON request body."""
+        body = ndjson(seed_line("http://1"), seed_line("http://2"), b"{}")
+
+        response = client.post("/api/import/seed/stream?batch_size=1", content=body)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["rejected_count"] == 1
+        assert len(data["batches"]) == 3
+
+    def test_stream_gzip_body(self, client):
+        """Test importing a gzip-compressed request body."""
+        body = gzip.compress(ndjson(seed_line("http://1")))
+
+        response = client.post("/api/import/seed/stream", content=body,
+                                headers={"Content-Encoding": "gzip"})
+
+        assert response.json()["imported"] == 1
+
+    def test_stream_file_mode(self, client, tmp_path):
+        """Test that an empty body imports the configured NDJSON file."""
+        path = tmp_path / "seed.ndjson"
+        path.write_bytes(ndjson(seed_line("http://1"), seed_line("http://2")))
+
+        with patch.object(settings, "seed_ndjson", str(path)):
+            response = client.post("/api/import/seed/stream")
+
+        assert response.json()["imported"] == 2
+
+    def test_stream_missing_file(self, client, tmp_path):
+        """Test that a missing seed file is a client error."""
+        with patch.object(settings, "seed_ndjson", str(tmp_path / "missing.ndjson")):
+            response = client.post("/api/import/seed/stream")
+
+        assert response.status_code == 400
+
+    def test_stream_fails_after_committed_batches(self, client):
+        """Test that input failing part-way reports the committed batches and refreshes the recipe index."""
+        assert client.get("/api/recipes/random", params={"meal": "dinner"}).status_code == 404
+        lines = [seed_line(f"http://{i}", meal_type="dinner") for i in range(4)]
+        # The overlong line is only detected a few decompression steps after the valid ones
+        body = gzip.compress(ndjson(*lines, b"x" * (settings.seed_max_line_bytes + 1)))
+
+        response = client.post("/api/import/seed/stream?batch_size=1", content=body)
+
+        assert response.status_code == 400
+        data = response.json()
+        assert data["detail"].startswith("Failed to read NDJSON body")
+        assert (data["imported"], len(data["batches"])) == (4, 4)
+        assert client.get("/api/recipes/random", params={"meal": "dinner"}).status_code == 200
+
+    def test_stream_corrupt_gzip(self, client):
+        """Test that a corrupt gzip body is a client error."""
+        response = client.post("/api/import/seed/stream", content=b"\x1f\x8b" + b"\x00" * 32)
+
+        assert response.status_code == 400
@@ -2,7 +2,16 @@ import pytest
 from unittest.mock import patch, mock_open
 import json
 import os
-from app.services.normalization import normalize_ingredient, load_synonyms, SYNONYMS
+import time
+from app.services import normalization
+from app.services.normalization import (
+    normalize_ingredient,
+    normalize_many,
+    compile_synonyms,
+    clear_normalization_cache,
+    load_synonyms,
+    SYNONYMS,
+)
 
 
 class TestLoadSynonyms:
@@ -279,6 +288,82 @@ class TestNormalizationIntegration:
             assert normalize_ingredient("unknown_ingredient") == "unknown_ingredient"
 
 
+class TestCompiledSynonyms:
+    """Test suite for the compiled variant -> base map and memo."""
+
+    def test_compile_synonyms_maps_variants_and_bases(self):
+        """Test that variants and bases both map to their base."""
+        lookup = compile_synonyms({"pomidor": ["pomidory"], "cebula": ["cebule"]})
+        assert lookup == {
+            "pomidory": "pomidor", "pomidor": "pomidor",
+            "cebule": "cebula", "cebula": "cebula",
+        }
+
+    def test_compile_synonyms_first_base_wins(self):
+        """Test that a word listed under several bases maps to the first, like the linear scan."""
+        lookup = compile_synonyms({"ser": ["sery", "masło"], "masło": ["masła"]})
+        assert lookup["masło"] == "ser"
+        assert lookup["masła"] == "masło"
+
+    def test_memo_follows_replaced_synonyms(self):
+        """Test that replacing SYNONYMS invalidates the compiled map and memo."""
+        with patch('app.services.normalization.SYNONYMS', {"pomidor": ["pomidory"]}):
+            assert normalize_ingredient("pomidory") == "pomidor"
+        with patch('app.services.normalization.SYNONYMS', {"warzywo": ["pomidory"]}):
+            assert normalize_ingredient("pomidory") == "warzywo"
+
+    def test_clear_cache_after_in_place_edit(self):
+        """Test that clearing the cache picks up in-place SYNONYMS edits."""
+        synonyms = {"pomidor": []}
+        with patch('app.services.normalization.SYNONYMS', synonyms):
+            assert normalize_ingredient("pomidorki") == "pomidork"
+            synonyms["pomidor"].append("pomidorki")
+            clear_normalization_cache()
+            assert normalize_ingredient("pomidorki") == "pomidor"
+
+    def test_memo_is_bounded(self):
+        """Test that the memo never grows past its limit."""
+        with patch('app.services.normalization.SYNONYMS', {}):
+            for i in range(normalization.NORMALIZE_CACHE_SIZE + 10):
+                normalize_ingredient(f"składnik{i}")
+            info = normalization._normalize_cached.cache_info()
+        assert info.currsize == normalization.NORMALIZE_CACHE_SIZE
+
+
+class TestNormalizeMany:
+    """Test suite for batch normalization."""
+
+    def test_normalize_many_matches_single(self):
+        """Test that batch results match normalize_ingredient in order."""
+        names = ["Pomidory", "cebuli", "pomidory", "sól", "  ząbek czosnku "]
+        with patch('app.services.normalization.SYNONYMS', {
+            "pomidor": ["pomidory"], "cebula": ["cebuli"], "czosnek": ["ząbek czosnku"]
+        }):
+            assert normalize_many(names) == [normalize_ingredient(name) for name in names]
+            assert normalize_many(names) == ["pomidor", "cebula", "pomidor", "sól", "czosnek"]
+
+    def test_normalize_many_empty(self):
+        """Test batch normalization of no names."""
+        assert normalize_many([]) == []
+
+    def test_normalize_many_large_dictionary(self):
+        """Test batch throughput with a dictionary of thousands of entries."""
+        large_synonyms = {
+            f"ingredient_{i}": [f"ingredient_{i}_syn_{j}" for j in range(5)]
+            for i in range(5000)
+        }
+        names = [f"ingredient_{i % 5000}_syn_{i % 5}" for i in range(50_000)]
+
+        with patch('app.services.normalization.SYNONYMS', large_synonyms):
+            start = time.perf_counter()
+            result = normalize_many(names)
+            elapsed = time.perf_counter() - start
+
+        assert result[4999] == "ingredient_4999"
+        # A linear scan over 30k entries would take minutes here
+        assert elapsed < 2.0
+
+
 # Test fixtures and utilities
 @pytest.fixture
 def sample_synonyms():
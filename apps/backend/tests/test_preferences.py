@@ -0,0 +1,80 @@
+from sqlmodel import select
+
+from app.core.settings import settings
+from app.models.models import Ingredient, LikedIngredient, BannedIngredient, Preferences, Recipe
+from app.services.preferences import migrate_legacy_preferences
+
+
+def liked_names(client, user_id=None):
+    headers = {"X-User-Id": user_id} if user_id else {}
+    return sorted(ing["normalized"] for ing in client.get("/api/ingredients/liked", headers=headers).json())
+
+
+class TestPreferenceEndpoints:
+    """Test suite for the per-user liked/banned endpoints."""
+
+    def test_users_are_isolated(self, client):
+        """Test that each X-User-Id has its own lists and no header means the default user."""
+        client.post("/api/ingredients/liked", json={"name": "jajko"}, headers={"X-User-Id": "anna"})
+        client.post("/api/ingredients/liked", json={"name": "mleko"}, headers={"X-User-Id": "piotr"})
+        client.post("/api/ingredients/liked", json={"name": "ser"})
+
+        assert liked_names(client, "anna") == ["jajko"]
+        assert liked_names(client, "piotr") == ["mleko"]
+        assert liked_names(client) == ["ser"]
+
+    def test_add_is_idempotent(self, client, session):
+        """Test that adding the same ingredient twice stores one row."""
+        first = client.post("/api/ingredients/banned", json={"name": "cebula"})
+        second = client.post("/api/ingredients/banned", json={"name": "cebule"})
+
+        assert first.json()["id"] == second.json()["id"]
+        assert len(session.exec(select(BannedIngredient)).all()) == 1
+
+    def test_remove(self, client):
+        """Test that removing only affects the given user."""
+        ingredient = client.post("/api/ingredients/liked", json={"name": "jajko"}).json()
+        client.post("/api/ingredients/liked", json={"name": "jajko"}, headers={"X-User-Id": "anna"})
+
+        response = client.delete(f"/api/ingredients/liked/{ingredient['id']}")
+
+        assert response.status_code == 200
+        assert liked_names(client) == []
+        assert liked_names(client, "anna") == ["jajko"]
+
+    def test_spin_uses_user_bans(self, client, session):
+        """Test that the random recipe honours the requesting user's banned list."""
+        session.add(Ingredient(id=1, name="jajko", normalized="jajko"))
+        session.add(Recipe(id=1, title="Jajecznica", source="test", url="http://a", meal_type="breakfast",
+                           steps_excerpt="Smaż", normalized_ingredient_ids=[1]))
+        session.add(BannedIngredient(user_id="anna", ingredient_id=1))
+        session.commit()
+        params = {"meal": "breakfast", "allow_one_extra": True, "hide_recent": False}
+
+        assert client.get("/api/recipes/random", params=params, headers={"X-User-Id": "anna"}).status_code == 404
+        assert client.get("/api/recipes/random", params=params).status_code == 200
+
+
+class TestMigrateLegacyPreferences:
+    """Test suite for moving the JSON Preferences row into the join tables."""
+
+    def test_migrates_and_removes_legacy_row(self, engine, session):
+        """Test that liked/banned IDs move to the default user and the row is deleted."""
+        session.add(Ingredient(id=1, name="jajko", normalized="jajko"))
+        session.add(Ingredient(id=2, name="mleko", normalized="mleko"))
+        session.add(Preferences(id=1, liked_ids=[1, 1, 99], banned_ids=[2]))
+        session.commit()
+
+        with engine.begin() as connection:
+            moved = migrate_legacy_preferences(connection)
+
+        assert moved == 2
+        liked = session.exec(select(LikedIngredient)).all()
+        assert [(row.user_id, row.ingredient_id) for row in liked] == [(settings.default_user_id, 1)]
+        assert session.exec(select(BannedIngredient.ingredient_id)).all() == [2]
+        assert session.get(Preferences, 1) is None
+
+    def test_no_legacy_row(self, engine):
+        """Test that migration is a no-op once the legacy row is gone."""
+        with engine.begin() as connection:
+            assert migrate_legacy_preferences(connection) == 0
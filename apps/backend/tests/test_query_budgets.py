@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import patch
+
+from app.core.settings import settings
+from app.models.models import Ingredient, LikedIngredient, Recipe, RecipeIngredient
+
+
+RANDOM_PARAMS = {"meal": "dinner", "allow_one_extra": True, "hide_recent": True}
+
+
+@pytest.fixture
+def catalogue(session):
+    """Twenty dinner recipes with three ingredients each, the first two liked."""
+    for ingredient_id in range(1, 11):
+        session.add(Ingredient(id=ingredient_id, name=f"i{ingredient_id}", normalized=f"i{ingredient_id}"))
+    for recipe_id in range(1, 21):
+        ingredient_ids = [1, 2, 3 + recipe_id % 8]
+        session.add(Recipe(id=recipe_id, title=f"R{recipe_id}", source="test", url=f"http://{recipe_id}",
+                           meal_type="dinner", steps_excerpt="s", normalized_ingredient_ids=ingredient_ids))
+        for ingredient_id in ingredient_ids:
+            session.add(RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id, amount_text="1"))
+    for ingredient_id in (1, 2):
+        session.add(LikedIngredient(user_id=settings.default_user_id, ingredient_id=ingredient_id))
+    session.commit()
+    return session
+
+
+class TestQueryBudgets:
+    """Test suite for the number of SQL statements per endpoint."""
+
+    @pytest.mark.parametrize("matcher,budget", [("bitset", 4), ("sparse", 4), ("sql", 5)])
+    def test_random_recipe(self, client, catalogue, query_budget, matcher, budget):
+        """Test a spin: preferences, recent spins, match, recipe, history insert."""
+        with patch.object(settings, 'recipe_matcher', matcher):
+            client.get("/api/recipes/random", params=RANDOM_PARAMS)  # builds the index
+            with query_budget(budget):
+                assert client.get("/api/recipes/random", params=RANDOM_PARAMS).status_code == 200
+
+    def test_recipe_by_id(self, client, catalogue, query_budget):
+        """Test that a recipe and its ingredients take two queries."""
+        with query_budget(2):
+            assert client.get("/api/recipes/1").status_code == 200
+
+    def test_recipe_batch_is_not_n_plus_one(self, client, catalogue, query_budget):
+        """Test that the batch endpoint does not query per recipe."""
+        with query_budget(2):
+            response = client.get("/api/recipes", params={"ids": ",".join(str(i) for i in range(1, 21))})
+        assert len(response.json()) == 20
+
+    def test_history_page(self, client, catalogue, query_budget):
+        """Test that a history page is one query."""
+        for _ in range(5):
+            client.get("/api/recipes/random", params=RANDOM_PARAMS)
+        with query_budget(1):
+            assert len(client.get("/api/history/", params={"limit": 3}).json()["items"]) == 3
+
+    def test_liked_list(self, client, catalogue, query_budget):
+        """Test that listing liked ingredients is one query."""
+        with query_budget(1):
+            assert len(client.get("/api/ingredients/liked").json()) == 2
+
+    @pytest.mark.parametrize("name,budget", [("i5", 2), ("nowy", 3)])
+    def test_add_liked(self, client, catalogue, query_budget, name, budget):
+        """Test adding an existing or new ingredient: lookup, (insert), preference insert."""
+        with query_budget(budget):
+            assert client.post("/api/ingredients/liked", json={"name": name}).status_code == 200
+
+    def test_remove_liked(self, client, catalogue, query_budget):
+        """Test that removing a liked ingredient is one DELETE."""
+        with query_budget(1):
+            assert client.delete("/api/ingredients/liked/1").status_code == 200
+
+
+class TestQueryHeaders:
+    """Test suite for the X-Query-Count debug headers."""
+
+    def test_headers_when_enabled(self, client, catalogue):
+        """Test that the headers report statements and database time."""
+        with patch.object(settings, 'debug_query_headers', True):
+            response = client.get("/api/recipes/1")
+
+        assert response.headers["x-query-count"] == "2"
+        assert float(response.headers["x-query-time-ms"]) > 0
+
+    def test_no_headers_by_default(self, client, catalogue):
+        """Test that the headers are off unless DEBUG_QUERY_HEADERS is set."""
+        assert "x-query-count" not in client.get("/api/recipes/1").headers
@@ -11,7 +11,16 @@ from app.services.recipe_filter import (
     filter_recipes,
     get_random_recipe,
 )
-from app.models.models import Recipe, Preferences, SpinHistory
+from app.models.models import BannedIngredient, Ingredient, LikedIngredient, Recipe, SpinHistory
+from app.core.settings import settings
+from app.services.preferences import UserPreferences
+
+
+@pytest.fixture(autouse=True)
+def python_matcher():
+    """These tests exercise the pure-Python matching path."""
+    with patch.object(settings, 'recipe_matcher', 'python'):
+        yield
 
 
 class TestCountExtraIngredients:
@@ -198,38 +207,28 @@ class TestHasBannedIngredients:
 class TestGetPreferences:
     """Test suite for get_preferences function."""
 
-    @patch('app.services.recipe_filter.Session')
-    def test_get_preferences_existing(self, mock_session_class):
-        """Test getting existing preferences."""
-        mock_session = Mock(spec=Session)
-        existing_prefs = Preferences(id=1, liked_ids=[1, 2, 3], banned_ids=[4, 5])
-        mock_session.get.return_value = existing_prefs
+    def test_get_preferences_per_user(self, session):
+        """Test that each user gets only their own liked and banned IDs."""
+        session.add(Ingredient(id=1, name="jajko", normalized="jajko"))
+        session.add(Ingredient(id=2, name="mleko", normalized="mleko"))
+        session.add(LikedIngredient(user_id="anna", ingredient_id=1))
+        session.add(BannedIngredient(user_id="anna", ingredient_id=2))
+        session.add(LikedIngredient(user_id="piotr", ingredient_id=2))
+        session.commit()
         
-        result = get_preferences(mock_session)
+        result = get_preferences(session, "anna")
         
-        assert result == existing_prefs
-        mock_session.get.assert_called_once_with(Preferences, 1)
-        mock_session.add.assert_not_called()
-        mock_session.commit.assert_not_called()
+        assert result.liked_ids == [1]
+        assert result.banned_ids == [2]
+        assert get_preferences(session, "piotr").liked_ids == [2]
 
-    @patch('app.services.recipe_filter.Session')
-    def test_get_preferences_create_default(self, mock_session_class):
-        """Test creating default preferences when none exist."""
-        mock_session = Mock(spec=Session)
-        mock_session.get.return_value = None  # No existing preferences
-        
-        result = get_preferences(mock_session)
-        
-        mock_session.get.assert_called_once_with(Preferences, 1)
-        mock_session.add.assert_called_once()
-        mock_session.commit.assert_called_once()
-        mock_session.refresh.assert_called_once()
+    def test_get_preferences_default_user_empty(self, session):
+        """Test that a user without preferences gets empty lists and nothing is written."""
+        result = get_preferences(session)
         
-        # Check that default preferences were created
-        added_prefs = mock_session.add.call_args[0][0]
-        assert added_prefs.id == 1
-        assert added_prefs.liked_ids == []
-        assert added_prefs.banned_ids == []
+        assert result.liked_ids == []
+        assert result.banned_ids == []
+        assert session.exec(select(LikedIngredient)).all() == []
 
 
 class TestGetRecentRecipeIds:
@@ -246,13 +245,16 @@ class TestGetRecentRecipeIds:
         mock_statement.order_by.return_value = mock_statement
         mock_statement.limit.return_value = mock_statement
         
-        # Mock the execution result
-        mock_session.exec.return_value.all.return_value = [101, 102, 103]
+        # Mock the execution result: (recipe_id, spun_at) rows, newest first
+        now = datetime.utcnow()
+        mock_session.exec.return_value.all.return_value = [
+            (101, now), (102, now - timedelta(minutes=1)), (103, now - timedelta(minutes=2))
+        ]
         
         result = get_recent_recipe_ids(mock_session, "dinner", limit=3)
         
         assert result == {101, 102, 103}
-        mock_select.assert_called_once_with(SpinHistory.recipe_id)
+        mock_select.assert_called_once_with(SpinHistory.recipe_id, SpinHistory.spun_at)
         mock_statement.where.assert_called_once()
         mock_statement.order_by.assert_called_once()
         mock_statement.limit.assert_called_once_with(3)
@@ -483,7 +485,7 @@ class TestGetRandomRecipe:
         result = get_random_recipe(mock_session, "dinner", allow_one_extra=True)
         
         assert result == test_recipes[1]
-        mock_filter.assert_called_once_with(mock_session, "dinner", True, False)
+        mock_filter.assert_called_once_with(mock_session, "dinner", True, False, None)
         mock_choice.assert_called_once_with(test_recipes)
 
     @patch('app.services.recipe_filter.filter_recipes')
@@ -496,7 +498,7 @@ class TestGetRandomRecipe:
         result = get_random_recipe(mock_session, "breakfast", allow_one_extra=False)
         
         assert result is None
-        mock_filter.assert_called_once_with(mock_session, "breakfast", False, False)
+        mock_filter.assert_called_once_with(mock_session, "breakfast", False, False, None)
 
     @patch('app.services.recipe_filter.filter_recipes')
     @patch('app.services.recipe_filter.random.choice')
@@ -511,7 +513,7 @@ class TestGetRandomRecipe:
         result = get_random_recipe(mock_session, "lunch", allow_one_extra=True, hide_recent=True)
         
         assert result == test_recipe
-        mock_filter.assert_called_once_with(mock_session, "lunch", True, True)
+        mock_filter.assert_called_once_with(mock_session, "lunch", True, True, None)
 
     @patch('app.services.recipe_filter.filter_recipes')
     @patch('app.services.recipe_filter.random.choice')
@@ -590,8 +592,7 @@ def sample_recipe():
 @pytest.fixture
 def sample_preferences():
     """Fixture providing sample preferences for testing."""
-    return Preferences(
-        id=1,
+    return UserPreferences(
         liked_ids=[1, 2],
         banned_ids=[4, 5]
     )
@@ -0,0 +1,263 @@
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+from sqlmodel import Session
+
+from app.services import recipe_index
+from app.services.recipe_index import RecipeIndex, get_recipe_index, invalidate_recipe_index
+from app.services.recipe_filter import filter_recipes, get_best_matching_recipe
+from app.models.models import Recipe
+from app.core.settings import settings
+
+
+ROWS = [
+    (1, "dinner", [1, 2]),        # All liked
+    (2, "dinner", [1, 2, 3]),     # One extra ingredient
+    (3, "dinner", [1, 4]),        # Contains banned ingredient 4
+    (4, "dinner", [5, 6, 7]),     # All extra ingredients
+    (5, "dinner", [1, 2]),        # Perfect but recent
+    (6, "breakfast", [8]),
+    (7, "breakfast", None),       # No ingredients
+]
+
+
+@pytest.fixture
+def index():
+    return RecipeIndex.build(ROWS)
+
+
+@pytest.fixture(autouse=True)
+def reset_index():
+    invalidate_recipe_index()
+    yield
+    invalidate_recipe_index()
+
+
+class TestRecipeIndexBuild:
+    """Test suite for building the bitset index."""
+
+    def test_build_partitions_by_meal_type(self, index):
+        """Test that recipes are partitioned by meal type."""
+        assert index.partitions["dinner"].recipe_ids == [1, 2, 3, 4, 5]
+        assert index.partitions["breakfast"].recipe_ids == [6, 7]
+        assert len(index) == 7
+
+    def test_build_compacts_ingredient_ids(self, index):
+        """Test that ingredient IDs are mapped to dense bit positions."""
+        assert sorted(index.bit_positions.values()) == list(range(8))
+
+    def test_mask_ignores_unknown_ingredients(self, index):
+        """Test that ingredients not used by any recipe do not affect the mask."""
+        assert index.mask([1, 999]) == index.mask([1])
+        assert index.mask([]) == 0
+
+
+class TestRecipeIndexMatching:
+    """Test suite for bitset matching."""
+
+    def test_matching_ids_perfect(self, index):
+        """Test that only recipes without extras match when no extra is allowed."""
+        assert index.matching_ids("dinner", {1, 2}, {4}, max_extra=0) == [1, 5]
+
+    def test_matching_ids_one_extra(self, index):
+        """Test that one extra ingredient is allowed when requested."""
+        assert index.matching_ids("dinner", {1, 2}, {4}, max_extra=1) == [1, 2, 5]
+
+    def test_matching_ids_excludes_recent(self, index):
+        """Test that excluded recipe IDs are skipped."""
+        assert index.matching_ids("dinner", {1, 2}, {4}, max_extra=0, exclude_ids={5}) == [1]
+
+    def test_matching_ids_empty_recipe(self, index):
+        """Test that recipes without ingredients count as perfect matches."""
+        assert index.matching_ids("breakfast", set(), set(), max_extra=0) == [7]
+
+    def test_matching_ids_unknown_meal_type(self, index):
+        """Test that an unknown meal type has no matches."""
+        assert index.matching_ids("supper", {1}, set(), max_extra=1) == []
+
+    def test_best_ids_fallback(self, index):
+        """Test that the fallback returns the recipes with the fewest extras."""
+        assert index.best_ids("dinner", set(), {4}) == [1, 5]
+        assert index.best_ids("dinner", {5, 6}, {1}) == [4]
+
+    def test_best_ids_all_banned(self, index):
+        """Test that banned recipes are never returned by the fallback."""
+        assert index.best_ids("breakfast", set(), {8}) == [7]
+        assert index.best_ids("dinner", set(), {1, 5}) == []
+
+    def test_score_matches_python_loop(self, index):
+        """Test that bitset scores agree with counting in Python."""
+        liked_ids = {1, 3, 6}
+        scores = dict(index.score("dinner", liked_ids, set()))
+        for recipe_id, _, ingredient_ids in ROWS[:5]:
+            expected = len([i for i in ingredient_ids if i not in liked_ids])
+            assert scores[recipe_id] == expected
+
+
+class TestGetRecipeIndex:
+    """Test suite for the process-wide index cache."""
+
+    @patch('app.services.recipe_index.build_recipe_index')
+    def test_index_is_cached(self, mock_build):
+        """Test that the index is built once and reused."""
+        mock_session = Mock(spec=Session)
+        mock_build.return_value = RecipeIndex.build(ROWS)
+
+        first = get_recipe_index(mock_session)
+        second = get_recipe_index(mock_session)
+
+        assert first is second
+        mock_build.assert_called_once_with(mock_session)
+
+    @patch('app.services.recipe_index.build_recipe_index')
+    def test_invalidate_rebuilds(self, mock_build):
+        """Test that invalidation forces a rebuild on next use."""
+        mock_session = Mock(spec=Session)
+        mock_build.side_effect = lambda session: RecipeIndex.build(ROWS)
+
+        first = get_recipe_index(mock_session)
+        invalidate_recipe_index()
+        second = get_recipe_index(mock_session)
+
+        assert first is not second
+        assert mock_build.call_count == 2
+
+    @patch('app.services.recipe_index.build_recipe_index')
+    def test_expired_index_rebuilds(self, mock_build):
+        """Test that an index older than the TTL is rebuilt."""
+        mock_session = Mock(spec=Session)
+        mock_build.side_effect = lambda session: RecipeIndex.build(ROWS)
+
+        first = get_recipe_index(mock_session)
+        first.built_at -= settings.recipe_index_ttl_seconds + 1
+        second = get_recipe_index(mock_session)
+
+        assert first is not second
+
+    @patch('app.services.recipe_index.build_recipe_index')
+    def test_expired_index_served_during_rebuild(self, mock_build):
+        """Test that callers keep the expired index instead of waiting on a rebuild."""
+        mock_session = Mock(spec=Session)
+        mock_build.side_effect = lambda session: RecipeIndex.build(ROWS)
+
+        first = get_recipe_index(mock_session)
+        first.built_at -= settings.recipe_index_ttl_seconds + 1
+        release = threading.Event()
+        mock_build.side_effect = lambda session: release.wait(5) and RecipeIndex.build(ROWS)
+        rebuild = threading.Thread(target=get_recipe_index, args=(mock_session,))
+        rebuild.start()
+        time.sleep(0.05)
+
+        second = get_recipe_index(mock_session)
+        release.set()
+        rebuild.join()
+
+        assert first is second
+        assert mock_build.call_count == 2
+        assert recipe_index._index is not first
+
+    @patch('app.services.recipe_index.build_recipe_index')
+    def test_first_build_is_shared(self, mock_build):
+        """Test that callers finding no index wait for the running build instead of building privately."""
+        mock_session = Mock(spec=Session)
+        release = threading.Event()
+        mock_build.side_effect = lambda session: release.wait(5) and RecipeIndex.build(ROWS)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_recipe_index(mock_session)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        mock_build.assert_called_once()
+        assert len({id(index) for index in results}) == 1
+
+    @patch('app.services.recipe_index.build_recipe_index')
+    def test_invalidation_during_build_is_not_lost(self, mock_build):
+        """Test that an index built before an invalidation is not cached."""
+        mock_session = Mock(spec=Session)
+
+        def build_then_invalidate(session):
+            invalidate_recipe_index()
+            return RecipeIndex.build(ROWS)
+
+        mock_build.side_effect = build_then_invalidate
+        get_recipe_index(mock_session)
+
+        assert recipe_index._index is None
+
+
+class TestIndexedFiltering:
+    """Test suite for recipe_filter using the bitset index."""
+
+    def setup_prefs(self, mock_get_prefs, liked_ids, banned_ids):
+        mock_prefs = Mock()
+        mock_prefs.liked_ids = liked_ids
+        mock_prefs.banned_ids = banned_ids
+        mock_get_prefs.return_value = mock_prefs
+
+    @patch('app.services.recipe_filter.get_recipe_index')
+    @patch('app.services.recipe_filter.get_preferences')
+    @patch('app.services.recipe_filter.get_recent_recipe_ids')
+    def test_filter_recipes_loads_only_matches(self, mock_get_recent, mock_get_prefs, mock_get_index):
+        """Test that only matching recipes are loaded from the database."""
+        mock_session = Mock(spec=Session)
+        mock_session.exec.return_value = iter([Recipe(id=1, title="Perfect", source="test", url="u",
+                                                      meal_type="dinner", steps_excerpt="s")])
+        mock_get_index.return_value = RecipeIndex.build(ROWS)
+        mock_get_recent.return_value = {5}
+        self.setup_prefs(mock_get_prefs, [1, 2], [4])
+
+        with patch.object(settings, 'recipe_matcher', 'bitset'):
+            result = filter_recipes(mock_session, "dinner", allow_one_extra=False, hide_recent=True)
+
+        assert [r.id for r in result] == [1]
+        mock_session.exec.assert_called_once()
+
+    @patch('app.services.recipe_filter.get_recipe_index')
+    @patch('app.services.recipe_filter.get_preferences')
+    def test_filter_recipes_no_matches_skips_query(self, mock_get_prefs, mock_get_index):
+        """Test that no recipe query runs when nothing matches."""
+        mock_session = Mock(spec=Session)
+        mock_get_index.return_value = RecipeIndex.build(ROWS)
+        self.setup_prefs(mock_get_prefs, [], [1, 5, 8])
+
+        with patch.object(settings, 'recipe_matcher', 'bitset'):
+            result = filter_recipes(mock_session, "dinner", allow_one_extra=True)
+
+        assert result == []
+        mock_session.exec.assert_not_called()
+
+    @patch('app.services.recipe_filter.random.choice')
+    @patch('app.services.recipe_filter.get_recipe_index')
+    @patch('app.services.recipe_filter.get_preferences')
+    def test_best_matching_recipe_fallback(self, mock_get_prefs, mock_get_index, mock_choice):
+        """Test that the fallback picks among the recipes with the fewest extras."""
+        mock_session = Mock(spec=Session)
+        mock_get_index.return_value = RecipeIndex.build(ROWS)
+        mock_choice.side_effect = lambda ids: ids[0]
+        self.setup_prefs(mock_get_prefs, [5], [1])
+
+        with patch.object(settings, 'recipe_matcher', 'bitset'):
+            get_best_matching_recipe(mock_session, "dinner", allow_one_extra=False)
+
+        mock_choice.assert_called_once_with([4])
+        mock_session.get.assert_called_once_with(Recipe, 4)
+
+    @patch('app.services.recipe_filter.get_recipe_index')
+    @patch('app.services.recipe_filter.get_preferences')
+    def test_best_matching_recipe_none(self, mock_get_prefs, mock_get_index):
+        """Test that None is returned when every recipe is banned."""
+        mock_session = Mock(spec=Session)
+        mock_get_index.return_value = RecipeIndex.build(ROWS)
+        self.setup_prefs(mock_get_prefs, [], [1, 5])
+
+        with patch.object(settings, 'recipe_matcher', 'bitset'):
+            result = get_best_matching_recipe(mock_session, "dinner", allow_one_extra=False)
+
+        assert result is None
+        mock_session.get.assert_not_called()
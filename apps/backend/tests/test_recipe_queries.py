@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import event
+
+from app.models.schemas import RecipeWithIngredients, SeedRecipe
+from app.services.recipe_queries import MAX_BATCH_IDS, get_recipe_payloads
+from app.services.seed_import import import_recipes
+
+
+@pytest.fixture
+def recipes(session):
+    """Three imported recipes sharing some ingredients."""
+    import_recipes(session, [
+        SeedRecipe(title=f"Recipe {i}", source="test", url=f"http://{i}", meal_type="dinner",
+                   steps_excerpt="Steps", ingredients=ingredients)
+        for i, ingredients in enumerate([["pomidor", "cebula"], ["sól"], ["pomidor", "ryż", "sól"]], start=1)
+    ])
+    return session
+
+
+def count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestGetRecipePayloads:
+    """Test suite for the set-based recipe lookup."""
+
+    def test_returns_requested_order(self, recipes):
+        """Test that recipes come back in the requested order with their ingredients."""
+        result = get_recipe_payloads(recipes, [3, 1])
+
+        assert [recipe["id"] for recipe in result] == [3, 1]
+        assert {ing["normalized"] for ing in result[0]["ingredients"]} == {"pomidor", "ryż", "sól"}
+        assert {ing["normalized"] for ing in result[1]["ingredients"]} == {"pomidor", "cebula"}
+
+    def test_payloads_match_response_model(self, recipes):
+        """Test that the unvalidated dicts have exactly the RecipeWithIngredients fields and values."""
+        for payload in get_recipe_payloads(recipes, [1, 2, 3]):
+            assert RecipeWithIngredients.model_validate(payload).model_dump() == payload
+
+    def test_skips_unknown_and_duplicate_ids(self, recipes):
+        """Test that unknown IDs are dropped and duplicates returned once."""
+        result = get_recipe_payloads(recipes, [2, 99, 2])
+
+        assert [recipe["id"] for recipe in result] == [2]
+
+    def test_uses_two_queries(self, recipes, engine):
+        """Test that any number of recipes is loaded with two queries."""
+        statements = count_queries(engine)
+
+        get_recipe_payloads(recipes, [1, 2, 3])
+
+        assert len(statements) == 2
+
+    def test_empty_ids(self, session):
+        """Test that no IDs means no results."""
+        assert get_recipe_payloads(session, []) == []
+
+
+class TestBatchEndpoints:
+    """Test suite for GET /api/recipes and POST /api/recipes/batch."""
+
+    def test_get_with_comma_separated_ids(self, client, recipes):
+        """Test that comma-separated and repeated IDs are both accepted."""
+        response = client.get("/api/recipes", params=[("ids", "2,1"), ("ids", "3")])
+
+        assert response.status_code == 200
+        assert [recipe["id"] for recipe in response.json()] == [2, 1, 3]
+        assert response.json()[0]["ingredients"][0]["normalized"] == "sól"
+
+    def test_get_with_invalid_ids(self, client):
+        """Test that non-integer IDs are rejected."""
+        assert client.get("/api/recipes", params={"ids": "1,abc"}).status_code == 400
+
+    def test_too_many_ids(self, client):
+        """Test that oversized batches are rejected."""
+        ids = list(range(1, MAX_BATCH_IDS + 2))
+
+        assert client.get("/api/recipes", params={"ids": ",".join(map(str, ids))}).status_code == 400
+        assert client.post("/api/recipes/batch", json={"ids": ids}).status_code == 400
+
+    def test_post_batch(self, client, recipes):
+        """Test that IDs can be sent in the request body."""
+        response = client.post("/api/recipes/batch", json={"ids": [1, 42]})
+
+        assert response.status_code == 200
+        assert [recipe["id"] for recipe in response.json()] == [1]
+
+    def test_single_recipe_still_works(self, client, recipes):
+        """Test that GET /api/recipes/{id} returns the same shape as the batch endpoint."""
+        single = client.get("/api/recipes/1").json()
+        batch = client.get("/api/recipes", params={"ids": "1"}).json()
+
+        assert single == batch[0]
+        assert client.get("/api/recipes/99").status_code == 404
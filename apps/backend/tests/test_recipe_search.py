@@ -0,0 +1,154 @@
+import pytest
+from sqlalchemy import text
+
+from app.models.models import Recipe
+from app.models.schemas import SeedRecipe
+from app.services.recipe_search import POSTGRES_DDL, _matches, create_search_index, query_terms, search_recipes
+from app.services.seed_import import import_recipes
+
+
+def make_recipe(recipe_id, title, tags=(), steps="Wymieszać.", meal_type="dinner"):
+    return Recipe(id=recipe_id, title=title, source="test", url=f"http://{recipe_id}", meal_type=meal_type,
+                  tags=list(tags), steps_excerpt=steps, normalized_ingredient_ids=[])
+
+
+@pytest.fixture
+def search_index(engine):
+    """Full-text index on the test database, as created on startup."""
+    with engine.begin() as connection:
+        create_search_index(connection)
+
+
+@pytest.fixture
+def catalogue(search_index, session):
+    session.add(make_recipe(1, "Pierogi ruskie", ["polska", "obiad"], "Ugotować ziemniaki, dodać twaróg."))
+    session.add(make_recipe(2, "Łosoś pieczony", ["ryby"], "Piec łososia 20 minut."))
+    session.add(make_recipe(3, "Żurek na zakwasie", ["zupy", "wielkanoc"], "Zagotować zakwas z kiełbasą."))
+    session.add(make_recipe(4, "Sałatka", ["łosoś", "szybkie"], "Pokroić, wymieszać.", meal_type="snack"))
+    session.add(make_recipe(5, "Kopytka", ["polska"], "Ziemniaki przecisnąć, jak na pierogi."))
+    session.commit()
+    return session
+
+
+def ids(response):
+    return [item["id"] for item in response.json()["items"]]
+
+
+class TestQueryTerms:
+    """Test suite for query parsing."""
+
+    def test_terms_are_folded_words(self):
+        """Test that punctuation is dropped and diacritics are removed, ł included."""
+        assert query_terms('Łosoś, "pieczony"* OR żurek') == ["losos", "pieczony", "or", "zurek"]
+
+    def test_term_limit(self):
+        """Test that long queries are cut to the first terms."""
+        assert len(query_terms(" ".join(f"w{i}" for i in range(20)))) == 8
+
+
+class TestPostgresSearch:
+    """Test suite for the PostgreSQL statements (no PostgreSQL server in the test run)."""
+
+    def test_document_and_query_are_folded_alike(self):
+        """Test that the indexed text and the query both go through recipe_search_fold."""
+        generated = next(statement for statement in POSTGRES_DDL if "GENERATED ALWAYS" in statement)
+        query = str(_matches("postgresql", ["creme", "zurek"]).element)
+
+        assert generated.count("recipe_search_fold(") == 3 and "translate(" not in generated
+        assert query.count("to_tsquery('simple', recipe_search_fold(:query))") == 2
+
+
+class TestSearchRecipes:
+    """Test suite for the FTS5 search service."""
+
+    def test_diacritics_and_prefixes(self, catalogue):
+        """Test that words match without diacritics and as prefixes of inflected forms."""
+        assert [recipe.id for recipe, _ in search_recipes(catalogue, "zurek", 10)] == [3]
+        assert [recipe.id for recipe, _ in search_recipes(catalogue, "ŻUR", 10)] == [3]
+        assert [recipe.id for recipe, _ in search_recipes(catalogue, "losos", 10)] == [2, 4]
+
+    def test_title_ranks_above_steps(self, catalogue):
+        """Test that a title match outranks a match in the steps."""
+        assert [recipe.id for recipe, _ in search_recipes(catalogue, "pierog", 10)] == [1, 5]
+
+    def test_all_terms_required(self, catalogue):
+        """Test that every word must match."""
+        assert sorted(recipe.id for recipe, _ in search_recipes(catalogue, "ziemniaki polska", 10)) == [1, 5]
+        assert search_recipes(catalogue, "ziemniaki ryby", 10) == []
+
+    def test_index_follows_updates_and_deletes(self, catalogue):
+        """Test that the triggers keep the index in sync with the recipe table."""
+        recipe = catalogue.get(Recipe, 5)
+        recipe.title = "Kluski śląskie"
+        catalogue.add(recipe)
+        catalogue.delete(catalogue.get(Recipe, 1))
+        catalogue.commit()
+
+        assert [recipe.id for recipe, _ in search_recipes(catalogue, "slaskie", 10)] == [5]
+        assert [recipe.id for recipe, _ in search_recipes(catalogue, "pierog", 10)] == [5]
+
+    def test_existing_recipes_are_indexed(self, engine, session):
+        """Test that recipes stored before the index existed are backfilled, and a second call is a no-op."""
+        session.add(make_recipe(1, "Bigos"))
+        session.commit()
+        with engine.begin() as connection:
+            create_search_index(connection)
+            create_search_index(connection)
+
+        assert [recipe.id for recipe, _ in search_recipes(session, "bigos", 10)] == [1]
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM recipe_fts")).scalar() == 1
+
+    def test_imported_recipes_are_searchable(self, search_index, session):
+        """Test that recipes from a seed import are indexed on insert."""
+        import_recipes(session, [SeedRecipe(title="Gołąbki", source="test", url="http://g", meal_type="dinner",
+                                            tags=["kapusta"], steps_excerpt="Zawinąć.", ingredients=["kapusta"])])
+
+        assert [recipe.title for recipe, _ in search_recipes(session, "golabki kapusta", 10)] == ["Gołąbki"]
+
+
+class TestSearchEndpoint:
+    """Test suite for GET /api/recipes/search."""
+
+    def test_search(self, client, catalogue):
+        """Test a search response with recipe fields."""
+        response = client.get("/api/recipes/search", params={"q": "żurek"})
+
+        assert response.status_code == 200
+        assert response.json()["items"][0]["title"] == "Żurek na zakwasie"
+        assert response.json()["items"][0]["tags"] == ["zupy", "wielkanoc"]
+        assert response.json()["next_cursor"] is None
+
+    def test_meal_filter(self, client, catalogue):
+        """Test filtering matches by meal type."""
+        assert ids(client.get("/api/recipes/search", params={"q": "losos", "meal": "snack"})) == [4]
+        assert client.get("/api/recipes/search", params={"q": "losos", "meal": "brunch"}).status_code == 400
+
+    def test_keyset_pagination(self, client, search_index, session):
+        """Test that pages follow each other without gaps or repeats."""
+        for recipe_id in range(1, 26):
+            session.add(make_recipe(recipe_id, f"Zupa {recipe_id}", steps="zupa " * (recipe_id % 4 + 1)))
+        session.commit()
+
+        seen, cursor = [], None
+        while True:
+            params = {"q": "zupa", "limit": 10, **({"cursor": cursor} if cursor else {})}
+            page = client.get("/api/recipes/search", params=params).json()
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert sorted(seen) == list(range(1, 26))
+        assert len(seen) == 25
+
+    def test_search_is_not_a_recipe_id(self, client, catalogue, query_budget):
+        """Test that /search is routed before /{recipe_id} and costs one query."""
+        with query_budget(1):
+            assert client.get("/api/recipes/search", params={"q": "kopytka"}).status_code == 200
+
+    def test_invalid_input(self, client, catalogue):
+        """Test query validation and bad cursors."""
+        assert client.get("/api/recipes/search").status_code == 422
+        assert client.get("/api/recipes/search", params={"q": "zupa", "cursor": "nope"}).status_code == 400
+        assert client.get("/api/recipes/search", params={"q": "!!!"}).json() == {"items": [], "next_cursor": None}
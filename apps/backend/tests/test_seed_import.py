@@ -0,0 +1,129 @@
+from unittest.mock import patch
+from sqlmodel import select
+
+from app.models.models import Ingredient, Recipe, RecipeIngredient
+from app.models.schemas import SeedRecipe
+from app.services.seed_import import import_recipes, resolve_ingredients
+
+
+def make_seed(url: str, ingredients, meal_type: str = "dinner") -> SeedRecipe:
+    return SeedRecipe(
+        title=f"Recipe {url}",
+        source="test",
+        url=url,
+        meal_type=meal_type,
+        tags=["test"],
+        steps_excerpt="Steps",
+        ingredients=ingredients
+    )
+
+
+class TestResolveIngredients:
+    """Test suite for set-based ingredient resolution."""
+
+    def test_inserts_missing_and_reuses_existing(self, session):
+        """Test that existing ingredients are reused and missing ones inserted once."""
+        session.add(Ingredient(name="pomidory", normalized="pomidor"))
+        session.commit()
+
+        ids = resolve_ingredients(session, {"pomidor": "pomidory", "cebula": "cebule"})
+        session.commit()
+
+        ingredients = session.exec(select(Ingredient)).all()
+        assert len(ingredients) == 2
+        assert ids == {ing.normalized: ing.id for ing in ingredients}
+        assert {ing.name for ing in ingredients} == {"pomidory", "cebule"}
+
+
+class TestImportRecipes:
+    """Test suite for the bulk seed import."""
+
+    def test_import_creates_recipes_and_links(self, session):
+        """Test that recipes, ingredients and recipe links are created."""
+        result = import_recipes(session, [
+            make_seed("http://a", ["pomidory", "cebula"]),
+            make_seed("http://b", ["pomidor", "sól"]),
+        ])
+
+        assert result == {"imported": 2, "updated": 0, "total_processed": 2}
+        recipes = session.exec(select(Recipe).order_by(Recipe.id)).all()
+        ingredients = {ing.normalized: ing.id for ing in session.exec(select(Ingredient))}
+        assert recipes[0].normalized_ingredient_ids == [ingredients["pomidor"], ingredients["cebula"]]
+        assert recipes[1].normalized_ingredient_ids == [ingredients["pomidor"], ingredients["sól"]]
+        assert recipes[0].tags == ["test"]
+
+        links = session.exec(select(RecipeIngredient).where(RecipeIngredient.recipe_id == recipes[0].id)).all()
+        assert {link.amount_text for link in links} == {"pomidory", "cebula"}
+
+    def test_import_skips_duplicate_urls(self, session):
+        """Test that unchanged stored URLs are skipped and a URL repeated in the input is stored once."""
+        import_recipes(session, [make_seed("http://a", ["sól"])])
+
+        result = import_recipes(session, [
+            make_seed("http://a", ["sól"]),
+            make_seed("http://b", ["sól"]),
+            make_seed("http://b", ["pieprz"]),
+        ])
+
+        assert result == {"imported": 1, "updated": 0, "total_processed": 3}
+        assert len(session.exec(select(Recipe)).all()) == 2
+        # The last occurrence of a URL wins
+        recipe_b = session.exec(select(Recipe).where(Recipe.url == "http://b")).one()
+        names = select(Ingredient.name).where(Ingredient.id.in_(recipe_b.normalized_ingredient_ids))
+        assert session.exec(names).all() == ["pieprz"]
+
+    def test_import_updates_changed_recipes(self, session):
+        """Test that a changed recipe at a stored URL is rewritten and relinked in place."""
+        import_recipes(session, [make_seed("http://a", ["pomidory", "sól"])])
+        recipe_id = session.exec(select(Recipe)).one().id
+        changed = make_seed("http://a", ["pomidory", "bazylia"])
+        changed.title = "Zupa pomidorowa"
+
+        result = import_recipes(session, [changed])
+
+        assert result == {"imported": 0, "updated": 1, "total_processed": 1}
+        session.expire_all()
+        recipe = session.exec(select(Recipe)).one()
+        assert (recipe.id, recipe.title) == (recipe_id, "Zupa pomidorowa")
+        links = session.exec(select(RecipeIngredient).where(RecipeIngredient.recipe_id == recipe_id)).all()
+        assert {link.amount_text for link in links} == {"pomidory", "bazylia"}
+        assert sorted(recipe.normalized_ingredient_ids) == sorted(link.ingredient_id for link in links)
+
+    @patch('app.services.seed_import.invalidate_ingredient_search_index')
+    @patch('app.services.seed_import.invalidate_recipe_index')
+    def test_update_invalidates_indexes(self, mock_invalidate, mock_invalidate_search, session):
+        """Test that updating a recipe drops both the matching and the ingredient search index."""
+        import_recipes(session, [make_seed("http://a", ["sól"])])
+        mock_invalidate.reset_mock()
+
+        import_recipes(session, [make_seed("http://a", ["pieprz"])])
+
+        mock_invalidate.assert_called_once()
+        mock_invalidate_search.assert_called_once()
+
+    def test_import_dedupes_ingredients_within_recipe(self, session):
+        """Test that names normalizing to the same ingredient are linked once."""
+        import_recipes(session, [make_seed("http://a", ["pomidory", "pomidora", "sól"])])
+
+        recipe = session.exec(select(Recipe)).one()
+        assert len(recipe.normalized_ingredient_ids) == 2
+        assert len(session.exec(select(RecipeIngredient)).all()) == 2
+
+    def test_import_commits_per_chunk(self, session):
+        """Test that a chunked import commits once per chunk."""
+        seeds = [make_seed(f"http://{i}", ["sól", f"składnik {i}"]) for i in range(10)]
+
+        with patch.object(session, "commit", wraps=session.commit) as mock_commit:
+            result = import_recipes(session, seeds, chunk_size=4)
+
+        assert result["imported"] == 10
+        assert mock_commit.call_count == 3
+        assert len(session.exec(select(Ingredient)).all()) == 11
+
+    @patch('app.services.seed_import.invalidate_recipe_index')
+    def test_import_invalidates_recipe_index(self, mock_invalidate, session):
+        """Test that the matching index is dropped only when recipes were added."""
+        import_recipes(session, [make_seed("http://a", ["sól"])])
+        import_recipes(session, [make_seed("http://a", ["sól"])])
+
+        mock_invalidate.assert_called_once()
@@ -0,0 +1,117 @@
+import msgpack
+import pytest
+from datetime import datetime
+
+from app.core.serialization import MSGPACK_MEDIA_TYPE, encode, negotiate
+from app.models.models import Ingredient, Recipe, RecipeIngredient, SpinHistory
+from app.models.schemas import SpinHistoryResponse
+
+MSGPACK = {"Accept": MSGPACK_MEDIA_TYPE}
+
+
+@pytest.fixture
+def catalogue(session):
+    session.add(Recipe(id=1, title="Żurek", source="test", url="http://1", meal_type="lunch", time_minutes=40,
+                       tags=["zupy"], steps_excerpt="Zagotować.", normalized_ingredient_ids=[1]))
+    session.add(Ingredient(id=1, name="zakwas", normalized="zakwas"))
+    session.add(RecipeIngredient(recipe_id=1, ingredient_id=1, amount_text="1"))
+    session.add(SpinHistory(id=1, recipe_id=1, meal_type="lunch", allow_one_extra=False,
+                            spun_at=datetime(2024, 3, 1, 12, 30, 15, 250)))
+    session.commit()
+    return session
+
+
+class TestNegotiate:
+    """Test suite for Accept header negotiation."""
+
+    def test_msgpack_when_listed(self):
+        """Test that msgpack is chosen when the client lists it, with or without parameters."""
+        assert negotiate("application/msgpack") == MSGPACK_MEDIA_TYPE
+        assert negotiate("application/json;q=0.5, Application/X-Msgpack; q=1") == MSGPACK_MEDIA_TYPE
+
+    def test_json_otherwise(self):
+        """Test that JSON is the default."""
+        assert negotiate(None) == "application/json"
+        assert negotiate("*/*") == "application/json"
+        assert negotiate("text/html, application/json") == "application/json"
+
+    def test_q_zero_refuses_msgpack(self):
+        """Test that q=0 marks msgpack as not acceptable."""
+        assert negotiate("application/msgpack;q=0") == "application/json"
+        assert negotiate("application/json, application/x-msgpack; q=0.0") == "application/json"
+
+    def test_higher_weight_wins(self):
+        """Test that the higher-weighted type is chosen, msgpack on a tie."""
+        assert negotiate("application/json;q=1, application/msgpack;q=0.1") == "application/json"
+        assert negotiate("*/*;q=0.8, application/msgpack;q=0.9") == MSGPACK_MEDIA_TYPE
+        assert negotiate("application/json, application/msgpack") == MSGPACK_MEDIA_TYPE
+        assert negotiate("application/msgpack;q=oops, application/json") == "application/json"
+
+
+class TestEncode:
+    """Test suite for model encoding."""
+
+    def test_dicts_encode_like_models(self):
+        """Test that model-shaped dicts and models give the bytes pydantic would."""
+        fields = dict(id=1, title="Żurek", source="s", url="u", meal_type="lunch", time_minutes=None,
+                      image_url=None, tags=["zupy"], steps_excerpt="x")
+        payload = dict(id=1, recipe=fields, meal_type="lunch", allow_one_extra=True,
+                       spun_at=datetime(2024, 3, 1, 12, 30))
+        model = SpinHistoryResponse(**payload)
+
+        assert encode([payload]) == encode([model]) == f"[{model.model_dump_json()}]".encode()
+        assert msgpack.unpackb(encode(payload, MSGPACK_MEDIA_TYPE)) == model.model_dump(mode="json")
+
+    def test_unknown_type(self):
+        """Test that unsupported values fail loudly."""
+        with pytest.raises(TypeError):
+            encode({"value": object()})
+
+
+class TestNegotiatedResponses:
+    """Test suite for JSON and msgpack API responses."""
+
+    def test_json_by_default(self, client, catalogue):
+        """Test that responses stay JSON, with the same datetime format as before."""
+        response = client.get("/api/history/")
+
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["vary"] == "Accept"
+        assert response.json()["items"][0]["spun_at"] == "2024-03-01T12:30:15.000250"
+
+    @pytest.mark.parametrize("path", ["/api/history/", "/api/recipes?ids=1", "/api/recipes/1",
+                                      "/api/ingredients/search?q=zak", "/api/ingredients/liked"])
+    def test_msgpack_matches_json(self, client, catalogue, path):
+        """Test that msgpack responses carry the same data as JSON ones."""
+        response = client.get(path, headers=MSGPACK)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+        assert msgpack.unpackb(response.content) == client.get(path).json()
+
+    def test_msgpack_for_plain_dicts(self, client):
+        """Test that endpoints returning dicts are negotiated through the default response class."""
+        response = client.delete("/api/history/", headers=MSGPACK)
+
+        assert msgpack.unpackb(response.content) == {"message": "Cleared 0 history entries"}
+
+    def test_refused_msgpack_gets_json(self, client, catalogue):
+        """Test that an endpoint answers JSON when the client refuses msgpack."""
+        response = client.get("/api/recipes/1", headers={"Accept": "application/json;q=1, application/msgpack;q=0"})
+
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["title"] == "Żurek"
+
+    def test_errors_stay_json(self, client):
+        """Test that error responses are JSON whatever the client accepts."""
+        response = client.get("/api/recipes/999", headers=MSGPACK)
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Recipe not found"}
+
+    def test_random_recipe(self, client, catalogue):
+        """Test the spin response, which is built before the spin is recorded."""
+        response = client.get("/api/recipes/random", params={"meal": "lunch", "hide_recent": False}, headers=MSGPACK)
+
+        body = msgpack.unpackb(response.content)
+        assert (body["id"], body["extra_ingredients_count"], body["tags"]) == (1, 1, ["zupy"])
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from sqlalchemy.util.concurrency import await_only, greenlet_spawn
+
+from app.services.shared_build import SharedBuild
+
+
+def start(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+class TestSharedBuild:
+    """Test suite for sharing one index build between concurrent callers."""
+
+    def test_waiters_share_the_running_build(self):
+        """Test that callers arriving during a build wait for it instead of building their own."""
+        builds = SharedBuild()
+        release = threading.Event()
+        calls, results = [], []
+
+        def build():
+            calls.append(1)
+            release.wait(5)
+            return object()
+
+        threads = [start(lambda: results.append(builds.get(1, build)))]
+        time.sleep(0.05)
+        threads += [start(lambda: results.append(builds.get(1, build))) for _ in range(3)]
+        time.sleep(0.05)
+        assert not results
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len(results) == 4 and len({id(result) for result in results}) == 1
+
+    def test_stale_result_served_during_build(self):
+        """Test that a caller with an expired index keeps it instead of waiting."""
+        builds = SharedBuild()
+        release = threading.Event()
+        thread = start(lambda: builds.get(1, lambda: release.wait(5) and "fresh"))
+        time.sleep(0.05)
+
+        assert builds.get(1, lambda: "private", stale="stale") == "stale"
+        release.set()
+        thread.join()
+
+    def test_new_generation_builds_again(self):
+        """Test that a build of an older generation is not joined."""
+        builds = SharedBuild()
+        release = threading.Event()
+        thread = start(lambda: builds.get(1, lambda: release.wait(5) and "old"))
+        time.sleep(0.05)
+
+        assert builds.get(2, lambda: "new") == "new"
+        release.set()
+        thread.join()
+
+    def test_failed_build_is_retried_by_a_waiter(self):
+        """Test that waiters build themselves when the running build fails."""
+        builds = SharedBuild()
+        release = threading.Event()
+        errors, results = [], []
+
+        def failing():
+            release.wait(5)
+            raise RuntimeError("database down")
+
+        def first():
+            try:
+                builds.get(1, failing)
+            except RuntimeError as error:
+                errors.append(error)
+
+        threads = [start(first)]
+        time.sleep(0.05)
+        threads.append(start(lambda: results.append(builds.get(1, lambda: "rebuilt"))))
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(errors) == 1
+        assert results == ["rebuilt"]
+
+    def test_event_loop_callers_await_the_build(self):
+        """Test that run_sync-style callers on the event loop wait without blocking it."""
+        builds = SharedBuild()
+        calls, ticks = [], []
+
+        def build():
+            calls.append(1)
+            await_only(asyncio.sleep(0.05))
+            return object()
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        async def main():
+            return await asyncio.gather(*(greenlet_spawn(builds.get, 1, build) for _ in range(3)), ticker())
+
+        *results, _ = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert len({id(result) for result in results}) == 1
+        assert len(ticks) == 5
@@ -0,0 +1,92 @@
+import random
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("scipy")
+
+from app.services.recipe_index import RecipeIndex, get_index_class
+from app.services.sparse_index import SparseRecipeIndex
+from app.core.settings import settings
+
+
+ROWS = [
+    (1, "dinner", [1, 2]),        # All liked
+    (2, "dinner", [1, 2, 3]),     # One extra ingredient
+    (3, "dinner", [1, 4]),        # Contains banned ingredient 4
+    (4, "dinner", [5, 6, 7]),     # All extra ingredients
+    (5, "dinner", [1, 2, 2]),     # Duplicate ingredient counted once
+    (6, "breakfast", [8]),
+    (7, "breakfast", None),       # No ingredients
+]
+
+
+@pytest.fixture
+def index():
+    return SparseRecipeIndex.build(ROWS)
+
+
+class TestSparseRecipeIndex:
+    """Test suite for the CSR matching engine."""
+
+    def test_build_partitions_by_meal_type(self, index):
+        """Test that each meal type gets its own incidence matrix."""
+        assert index.partitions["dinner"].matrix.shape == (5, 8)
+        assert index.partitions["breakfast"].recipe_ids.tolist() == [6, 7]
+        assert len(index) == 7
+
+    def test_matching_ids(self, index):
+        """Test perfect and one-extra matches with a banned ingredient."""
+        assert index.matching_ids("dinner", {1, 2}, {4}, max_extra=0) == [1, 5]
+        assert index.matching_ids("dinner", {1, 2}, {4}, max_extra=1) == [1, 2, 5]
+
+    def test_matching_ids_excludes_recent(self, index):
+        """Test that excluded recipe IDs are skipped."""
+        assert index.matching_ids("dinner", {1, 2}, {4}, max_extra=1, exclude_ids={2, 5}) == [1]
+
+    def test_matching_ids_unknown_meal_type(self, index):
+        """Test that an unknown meal type has no matches."""
+        assert index.matching_ids("supper", {1}, set(), max_extra=1) == []
+
+    def test_best_ids(self, index):
+        """Test that the fallback returns the recipes with the fewest extras."""
+        assert index.best_ids("dinner", {5, 6}, {1}) == [4]
+        assert index.best_ids("breakfast", set(), {8}) == [7]
+        assert index.best_ids("dinner", set(), {1, 5}) == []
+
+    def test_empty_catalogue(self):
+        """Test that an index without ingredients still answers queries."""
+        index = SparseRecipeIndex.build([(1, "lunch", [])])
+        assert index.matching_ids("lunch", set(), set(), max_extra=0) == [1]
+
+    def test_agrees_with_bitset_index(self):
+        """Test that sparse and bitset engines produce the same scores."""
+        rng = random.Random(7)
+        rows = [
+            (recipe_id, rng.choice(["breakfast", "dinner"]), rng.sample(range(1, 60), rng.randint(0, 8)))
+            for recipe_id in range(1, 500)
+        ]
+        sparse = SparseRecipeIndex.build(rows)
+        bitset = RecipeIndex.build(rows)
+
+        for _ in range(20):
+            liked_ids = set(rng.sample(range(1, 60), 30))
+            banned_ids = set(rng.sample(range(1, 60), 3))
+            for meal_type in ("breakfast", "dinner"):
+                assert sparse.score(meal_type, liked_ids, banned_ids) == bitset.score(meal_type, liked_ids, banned_ids)
+
+
+class TestIndexClassSetting:
+    """Test suite for choosing the matching engine."""
+
+    def test_sparse_setting(self):
+        with patch.object(settings, 'recipe_matcher', 'sparse'):
+            assert get_index_class() is SparseRecipeIndex
+
+    def test_bitset_setting(self):
+        with patch.object(settings, 'recipe_matcher', 'bitset'):
+            assert get_index_class() is RecipeIndex
+
+    def test_sparse_without_scipy_falls_back(self):
+        with patch.object(settings, 'recipe_matcher', 'sparse'), \
+                patch.dict('sys.modules', {'app.services.sparse_index': None}):
+            assert get_index_class() is RecipeIndex
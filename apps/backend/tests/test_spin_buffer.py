@@ -0,0 +1,183 @@
+import time
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+import pytest
+from sqlmodel import Session, select
+
+from app.core import metrics
+from app.core.settings import settings
+from app.models.models import Recipe, SpinHistory
+from app.services import spin_buffer
+from app.services.recipe_filter import get_recent_recipe_ids
+from app.services.spin_buffer import SpinHistoryBuffer, record_spin
+
+
+@pytest.fixture
+def recipes(session):
+    for i in range(1, 4):
+        session.add(Recipe(id=i, title=f"Recipe {i}", source="test", url=f"http://{i}",
+                           meal_type="dinner", steps_excerpt="Steps", normalized_ingredient_ids=[]))
+    session.commit()
+
+
+@pytest.fixture
+def test_engine(engine):
+    with patch('app.services.spin_buffer.get_engine', return_value=engine):
+        yield engine
+
+
+@pytest.fixture
+def buffered():
+    """Enable write-behind mode with a fresh process-wide buffer."""
+    spin_buffer._buffer = None
+    with patch.object(settings, 'spin_history_write_mode', 'buffered'), \
+            patch.object(settings, 'spin_buffer_max_records', 3):
+        yield
+    spin_buffer._buffer = None
+
+
+def stored_spins(engine):
+    with Session(engine) as session:
+        return session.exec(select(SpinHistory)).all()
+
+
+class TestSpinHistoryBuffer:
+    """Test suite for the write-behind buffer."""
+
+    def test_flush_writes_batch(self, test_engine, recipes):
+        """Test that queued spins are written in one flush."""
+        buffer = SpinHistoryBuffer(max_records=10, flush_interval=60)
+        buffer.add(1, "dinner", False, datetime.utcnow())
+        buffer.add(2, "dinner", True, datetime.utcnow())
+
+        assert stored_spins(test_engine) == []
+        assert buffer.flush() == 2
+        assert len(stored_spins(test_engine)) == 2
+        assert len(buffer) == 0
+
+    def test_full_buffer_flushes_without_thread(self, test_engine, recipes):
+        """Test that reaching the batch size flushes immediately when no flusher runs."""
+        buffer = SpinHistoryBuffer(max_records=2, flush_interval=60)
+        buffer.add(1, "dinner", False, datetime.utcnow())
+        buffer.add(2, "dinner", False, datetime.utcnow())
+
+        assert len(stored_spins(test_engine)) == 2
+
+    def test_background_flush_on_interval(self, test_engine, recipes):
+        """Test that the flusher thread writes spins after the interval."""
+        buffer = SpinHistoryBuffer(max_records=100, flush_interval=0.05)
+        buffer.start()
+        try:
+            buffer.add(1, "dinner", False, datetime.utcnow())
+            deadline = time.monotonic() + 2
+            while not stored_spins(test_engine) and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            buffer.stop()
+
+        assert len(stored_spins(test_engine)) == 1
+
+    def test_stop_flushes_pending(self, test_engine, recipes):
+        """Test that stopping writes everything still queued."""
+        buffer = SpinHistoryBuffer(max_records=100, flush_interval=60)
+        buffer.start()
+        buffer.add(1, "dinner", False, datetime.utcnow())
+        buffer.stop()
+
+        assert len(stored_spins(test_engine)) == 1
+
+    def test_failed_flush_requeues(self):
+        """Test that a failed write keeps the records for the next flush."""
+        buffer = SpinHistoryBuffer(max_records=100, flush_interval=60)
+        spun_at = datetime.utcnow()
+        buffer.add(1, "dinner", False, spun_at)
+
+        with patch('app.services.spin_buffer.get_engine', side_effect=RuntimeError("db down")):
+            with pytest.raises(RuntimeError):
+                buffer.flush()
+
+        assert buffer.pending_spins("dinner") == [(1, spun_at)]
+
+    def test_failed_flushes_are_bounded(self):
+        """Test that while flushes fail the queue keeps only the newest spins and counts the dropped ones."""
+        buffer = SpinHistoryBuffer(max_records=100, flush_interval=60, max_pending=3)
+        dropped = metrics.SPIN_BUFFER_DROPPED.value()
+
+        with patch('app.services.spin_buffer.get_engine', side_effect=RuntimeError("db down")):
+            for recipe_id in range(1, 6):
+                buffer.add(recipe_id, "dinner", False, datetime.utcnow())
+            with pytest.raises(RuntimeError):
+                buffer.flush()
+
+        assert len(buffer) == 3
+        assert [recipe_id for recipe_id, _ in buffer.pending_spins("dinner")] == [5, 4, 3]
+        assert metrics.SPIN_BUFFER_DROPPED.value() == dropped + 2
+
+    def test_pending_spins_newest_first(self):
+        """Test that pending spins are filtered by meal type, newest first."""
+        buffer = SpinHistoryBuffer(max_records=100, flush_interval=60)
+        start = datetime(2025, 1, 1, 12, 0)
+        for recipe_id, meal_type in ((1, "dinner"), (2, "lunch"), (3, "dinner")):
+            buffer.add(recipe_id, meal_type, False, start + timedelta(minutes=recipe_id))
+
+        assert buffer.pending_spins("dinner") == [(3, start + timedelta(minutes=3)), (1, start + timedelta(minutes=1))]
+
+
+class TestRecordSpin:
+    """Test suite for choosing between synchronous and buffered writes."""
+
+    def test_sync_mode_commits(self):
+        """Test that sync mode writes the spin before returning."""
+        mock_session = Mock(spec=Session)
+        spin_buffer._buffer = None
+
+        record_spin(mock_session, 1, "dinner", False)
+
+        mock_session.add.assert_called_once()
+        mock_session.commit.assert_called_once()
+
+    def test_buffered_mode_queues(self, buffered):
+        """Test that buffered mode does not touch the session."""
+        mock_session = Mock(spec=Session)
+
+        record_spin(mock_session, 1, "dinner", False)
+
+        mock_session.commit.assert_not_called()
+        assert [recipe_id for recipe_id, _ in spin_buffer.pending_recent_spins("dinner")] == [1]
+
+
+class TestRecencyWithBuffer:
+    """Test suite for recency filtering that sees unflushed spins."""
+
+    def test_recent_ids_include_pending(self, session, recipes, buffered):
+        """Test that queued spins count as recent before they are flushed."""
+        session.add(SpinHistory(recipe_id=1, meal_type="dinner", allow_one_extra=False,
+                                spun_at=datetime.utcnow() - timedelta(minutes=5)))
+        session.commit()
+        record_spin(session, 2, "dinner", False)
+
+        assert get_recent_recipe_ids(session, "dinner") == {1, 2}
+
+    def test_recent_ids_limit_counts_pending_first(self, session, recipes, buffered):
+        """Test that pending spins fill the recency window before stored ones."""
+        session.add(SpinHistory(recipe_id=1, meal_type="dinner", allow_one_extra=False,
+                                spun_at=datetime.utcnow() - timedelta(minutes=5)))
+        session.commit()
+        record_spin(session, 2, "dinner", False)
+        record_spin(session, 3, "dinner", False)
+
+        assert get_recent_recipe_ids(session, "dinner", limit=2) == {2, 3}
+
+    def test_spin_pending_and_stored_counts_once(self, session, recipes, buffered):
+        """Test that a spin committed by a flush but still listed as in flight fills one recency slot."""
+        now = datetime.utcnow()
+        session.add(SpinHistory(recipe_id=1, meal_type="dinner", allow_one_extra=False,
+                                spun_at=now - timedelta(minutes=5)))
+        session.add(SpinHistory(recipe_id=2, meal_type="dinner", allow_one_extra=False, spun_at=now))
+        session.commit()
+        record_spin(session, 3, "dinner", False)
+        buffer = spin_buffer.get_spin_buffer()
+        with buffer._lock:
+            buffer._in_flight = [{"recipe_id": 2, "meal_type": "dinner", "allow_one_extra": False, "spun_at": now}]
+
+        assert get_recent_recipe_ids(session, "dinner", limit=3) == {1, 2, 3}
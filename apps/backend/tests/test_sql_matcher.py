@@ -0,0 +1,127 @@
+import random
+import pytest
+from unittest.mock import patch
+
+from app.core.settings import settings
+from app.models.models import BannedIngredient, Ingredient, LikedIngredient, Recipe, RecipeIngredient
+from app.services.recipe_filter import filter_recipes, get_best_matching_recipe
+from app.services.recipe_index import RecipeIndex
+from app.services.sql_matcher import matching_recipe_ids, pick_recipe_id
+
+
+ROWS = [
+    (1, "dinner", [1, 2]),        # All liked
+    (2, "dinner", [1, 2, 3]),     # One extra ingredient
+    (3, "dinner", [1, 4]),        # Contains banned ingredient 4
+    (4, "dinner", [5, 6, 7]),     # All extra ingredients
+    (5, "breakfast", [8]),
+    (6, "breakfast", []),         # No ingredients
+]
+
+
+def load_rows(session, rows, ingredient_count=8):
+    for ingredient_id in range(1, ingredient_count + 1):
+        session.add(Ingredient(id=ingredient_id, name=f"i{ingredient_id}", normalized=f"i{ingredient_id}"))
+    for recipe_id, meal_type, ingredient_ids in rows:
+        session.add(Recipe(id=recipe_id, title=f"R{recipe_id}", source="test", url=f"http://{recipe_id}",
+                           meal_type=meal_type, steps_excerpt="s", normalized_ingredient_ids=ingredient_ids))
+        for ingredient_id in ingredient_ids:
+            session.add(RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id, amount_text=""))
+    session.commit()
+
+
+def set_preferences(session, user_id, liked_ids, banned_ids):
+    session.add_all([LikedIngredient(user_id=user_id, ingredient_id=i) for i in liked_ids])
+    session.add_all([BannedIngredient(user_id=user_id, ingredient_id=i) for i in banned_ids])
+    session.commit()
+
+
+@pytest.fixture
+def catalogue(session):
+    load_rows(session, ROWS)
+    set_preferences(session, "anna", liked_ids=[1, 2], banned_ids=[4])
+    return session
+
+
+def matching(session, meal_type, user_id, max_extra, exclude_ids=None):
+    return sorted(session.exec(matching_recipe_ids(meal_type, user_id, max_extra, exclude_ids)).all())
+
+
+class TestMatchingRecipeIds:
+    """Test suite for the GROUP BY/anti-join matcher."""
+
+    def test_perfect_and_one_extra(self, catalogue):
+        """Test extra-ingredient limits with a banned ingredient."""
+        assert matching(catalogue, "dinner", "anna", 0) == [1]
+        assert matching(catalogue, "dinner", "anna", 1) == [1, 2]
+
+    def test_excludes_recent(self, catalogue):
+        """Test that excluded recipe IDs are skipped."""
+        assert matching(catalogue, "dinner", "anna", 1, exclude_ids={2}) == [1]
+
+    def test_recipe_without_ingredients(self, catalogue):
+        """Test that a recipe without ingredients has no extras."""
+        assert matching(catalogue, "breakfast", "anna", 0) == [6]
+
+    def test_other_user_preferences(self, catalogue):
+        """Test that only the given user's liked/banned rows are used."""
+        assert matching(catalogue, "dinner", "piotr", 2) == [1, 3]
+
+    def test_agrees_with_bitset_index(self, session):
+        """Test that SQL and bitset matchers select the same recipes."""
+        rng = random.Random(7)
+        rows = [
+            (recipe_id, rng.choice(["breakfast", "dinner"]), rng.sample(range(1, 40), rng.randint(0, 6)))
+            for recipe_id in range(1, 200)
+        ]
+        load_rows(session, rows, ingredient_count=40)
+        bitset = RecipeIndex.build(rows)
+
+        for round_number in range(5):
+            user_id = f"user{round_number}"
+            liked_ids = set(rng.sample(range(1, 40), 25))
+            banned_ids = set(rng.sample(range(1, 40), 3))
+            set_preferences(session, user_id, liked_ids, banned_ids)
+            for meal_type in ("breakfast", "dinner"):
+                for max_extra in (0, 1):
+                    expected = sorted(bitset.matching_ids(meal_type, liked_ids, banned_ids, max_extra))
+                    assert matching(session, meal_type, user_id, max_extra) == expected
+
+
+class TestPickRecipeId:
+    """Test suite for picking one recipe in the database."""
+
+    def test_picks_only_matches(self, catalogue):
+        """Test that random picks come from the matching recipes."""
+        picks = {pick_recipe_id(catalogue, "dinner", "anna", max_extra=1) for _ in range(30)}
+        assert picks == {1, 2}
+
+    def test_falls_back_to_fewest_extras(self, catalogue):
+        """Test that without matches the recipe with the fewest extras is chosen."""
+        assert pick_recipe_id(catalogue, "dinner", "anna", max_extra=0, exclude_ids={1}) == 2
+
+    def test_never_picks_banned(self, catalogue):
+        """Test that the fallback still excludes banned recipes."""
+        set_preferences(catalogue, "ewa", liked_ids=[], banned_ids=[1, 5])
+        assert pick_recipe_id(catalogue, "dinner", "ewa", max_extra=0) is None
+
+
+class TestSqlMatcherSetting:
+    """Test suite for recipe_filter with RECIPE_MATCHER=sql."""
+
+    def test_filter_and_best(self, catalogue):
+        """Test that the public filter functions dispatch to the SQL matcher."""
+        with patch.object(settings, 'recipe_matcher', 'sql'):
+            recipes = filter_recipes(catalogue, "dinner", allow_one_extra=True, user_id="anna")
+            best = get_best_matching_recipe(catalogue, "dinner", allow_one_extra=False, user_id="anna")
+
+        assert sorted(recipe.id for recipe in recipes) == [1, 2]
+        assert best.id == 1
+
+    def test_uses_default_user(self, catalogue):
+        """Test that no user ID means DEFAULT_USER_ID's preferences."""
+        set_preferences(catalogue, settings.default_user_id, liked_ids=[5, 6, 7], banned_ids=[])
+        with patch.object(settings, 'recipe_matcher', 'sql'):
+            best = get_best_matching_recipe(catalogue, "dinner", allow_one_extra=False)
+
+        assert best.id == 4
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import event, inspect
+from sqlmodel import SQLModel, create_engine
+
+from app import main
+from app.core.settings import settings
+from app.db import create_db_and_tables
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Cumulative `python -X importtime` time of app.main; about 1s on a laptop
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+# Modules only needed by optional settings or on first request
+DEFERRED_MODULES = ["numpy", "scipy", "aiosqlite", "asyncpg", "sqlalchemy.dialects.postgresql"]
+
+PROBE = """
+import sys
+import app.main
+from app import db
+from app.services import normalization
+print(json.dumps({
+    "loaded": [name for name in DEFERRED if name in sys.modules],
+    "engine_created": db._engine is not None or db._async_engine is not None,
+    "synonyms_loaded": "SYNONYMS" in vars(normalization),
+}))
+"""
+
+
+def run_python(args, tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path}/data/app.db", DB_PATH=f"{tmp_path}/data/app.db")
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+                          check=True)
+
+
+class TestColdStart:
+    """Test suite for the work done when the app is imported."""
+
+    def test_import_time_budget(self, tmp_path):
+        """Test that importing app.main stays within the import-time budget."""
+        stderr = run_python(["-X", "importtime", "-c", "import app.main"], tmp_path).stderr
+        line = next(line for line in stderr.splitlines() if line.rstrip().endswith("| app.main"))
+        cumulative_seconds = int(line.split("|")[1]) / 1_000_000
+
+        assert cumulative_seconds < IMPORT_TIME_BUDGET_SECONDS, f"app.main import took {cumulative_seconds:.2f}s"
+
+    def test_no_database_or_heavy_modules_at_import(self, tmp_path):
+        """Test that import creates no engine, no files and loads no deferred modules."""
+        probe = f"import json\nDEFERRED = {DEFERRED_MODULES!r}\n{PROBE}"
+        result = json.loads(run_python(["-c", probe], tmp_path).stdout.strip().splitlines()[-1])
+
+        assert result == {"loaded": [], "engine_created": False, "synonyms_loaded": False}
+        assert not (tmp_path / "data").exists()
+
+
+class TestSchemaCheck:
+    """Test suite for the startup schema check."""
+
+    def test_skipped_by_setting(self):
+        """Test that DB_CHECK_SCHEMA=false skips the database entirely on startup."""
+        with patch.object(settings, 'db_check_schema', False), \
+                patch('app.main.get_engine') as mock_get_engine:
+            asyncio.run(main.startup_event())
+
+        mock_get_engine.assert_not_called()
+
+    def test_creates_missing_index_only(self, tmp_path):
+        """Test that an index missing from an existing table is created and nothing else runs DDL."""
+        engine = create_engine(f"sqlite:///{tmp_path}/schema.db")
+        SQLModel.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_likedingredient_ingredient_id_user_id")
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+        with engine.begin() as connection:
+            create_db_and_tables(connection)
+        ddl = [statement for statement in statements if statement.lstrip().startswith("CREATE")]
+
+        assert ddl == ["CREATE INDEX ix_likedingredient_ingredient_id_user_id ON likedingredient (ingredient_id, user_id)"]
+        assert "ix_likedingredient_ingredient_id_user_id" in {
+            index["name"] for index in inspect(engine).get_indexes("likedingredient")
+        }
+        engine.dispose()
@@ -1,6 +1,10 @@
 import json
 import os
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+# Bounded memo for repeated inputs (ingredient names repeat heavily)
+NORMALIZE_CACHE_SIZE = 8192
 
 def load_synonyms() -> Dict[str, List[str]]:
     current_dir = os.path.dirname(__file__)
@@ -10,14 +14,34 @@ def load_synonyms() -> Dict[str, List[str]]:
 
 SYNONYMS = load_synonyms()
 
-def normalize_ingredient(name: str) -> str:
-    """Normalize ingredient name to canonical form."""
+_lookup: Dict[str, str] = {}
+_lookup_source: Optional[Dict[str, List[str]]] = None
+
+def compile_synonyms(synonyms: Dict[str, List[str]]) -> Dict[str, str]:
+    """Compile base -> variants into a variant -> base map (first base wins)."""
+    lookup: Dict[str, str] = {}
+    for base, variants in synonyms.items():
+        for variant in variants:
+            lookup.setdefault(variant, base)
+        lookup.setdefault(base, base)
+    return lookup
+
+def _synonym_lookup() -> Dict[str, str]:
+    """Compiled map for the current SYNONYMS, recompiled if SYNONYMS is replaced."""
+    global _lookup, _lookup_source
+    if _lookup_source is not SYNONYMS:
+        _lookup = compile_synonyms(SYNONYMS)
+        _lookup_source = SYNONYMS
+        _normalize_cached.cache_clear()
+    return _lookup
+
+def _normalize(name: str, lookup: Dict[str, str]) -> str:
     normalized = name.lower().strip()
     
     # Check if this is a synonym and map to base form
-    for base, synonyms in SYNONYMS.items():
-        if normalized in synonyms or base == normalized:
-            return base
+    base = lookup.get(normalized)
+    if base is not None:
+        return base
     
     # Basic singularization (very simple Polish rules)
     if normalized.endswith('y') and len(normalized) > 2:
@@ -27,4 +51,25 @@ def normalize_ingredient(name: str) -> str:
     if normalized.endswith('ów') and len(normalized) > 3:
         return normalized[:-2]
     
-    return normalized
\ No newline at end of file
+    return normalized
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_cached(name: str) -> str:
+    return _normalize(name, _lookup)
+
+def normalize_ingredient(name: str) -> str:
+    """Normalize ingredient name to canonical form."""
+    _synonym_lookup()
+    return _normalize_cached(name)
+
+def normalize_many(names: Iterable[str]) -> List[str]:
+    """Normalize a batch of names, computing each distinct name once."""
+    lookup = _synonym_lookup()
+    seen: Dict[str, str] = {}
+    results = []
+    for name in names:
+        normalized = seen.get(name)
+        if normalized is None:
+            normalized = seen[name] = _normalize(name, lookup)
+        results.append(normalized)
+    return results
@@ -19,6 +19,10 @@ export interface Ingredient {
   normalized: string;
 }
 
+export interface RecipeWithIngredients extends Omit<Recipe, "normalized_ingredient_ids"> {
+  ingredients: Ingredient[];
+}
+
 export interface RecipeIngredient {
   recipe_id: number;
   ingredient_id: number;
@@ -31,4 +35,17 @@ export interface SpinHistoryEntry {
   meal_type: MealType;
   allow_one_extra: boolean;
   spun_at: string;
-}
\ No newline at end of file
+}
+
+export interface SpinHistoryItem {
+  id: number;
+  recipe: Omit<Recipe, "normalized_ingredient_ids">;
+  meal_type: MealType;
+  allow_one_extra: boolean;
+  spun_at: string;
+}
+
+export interface SpinHistoryPage {
+  items: SpinHistoryItem[];
+  next_cursor: string | null;
+}
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Parse-throughput benchmark for recipe extraction.
+
+Runs over a local corpus of saved HTML pages (*.html or *.html.gz, searched
+recursively, e.g. from `scrape.py --crawl ... --save-html DIR` or the crawl
+cache's out/http_cache/bodies) and compares:
+    full-tree   BeautifulSoup(html.parser) of the whole page, JSON-LD read from the tree
+    lxml-tree   the same with the lxml tree builder
+    extract     extract.extract_recipe: regex JSON-LD scan, strained lxml fallback
+
+Without a corpus directory a synthetic one is generated: pages padded with
+navigation, comments and footer markup, a share of them without JSON-LD so
+the fallback path is measured too.
+
+Usage:
+    python bench_extract.py [CORPUS_DIR] [--pages 300] [--no-json-ld-share 0.3] [--repeat 3] [--output FILE]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+from extract import extract_recipe, recipe_from_json_ld
+
+BOILERPLATE_LINKS = 150
+BOILERPLATE_COMMENTS = 40
+
+
+def full_tree(parser: str) -> Callable[[str, str], Dict]:
+    """The pre-extract.py approach: a full tree per page, JSON-LD via find_all."""
+    def extract(html: str, url: str):
+        soup = BeautifulSoup(html, parser)
+        for script in soup.find_all("script", type="application/ld+json"):
+            try:
+                data = json.loads(script.string or "")
+            except json.JSONDecodeError:
+                continue
+            items = data.get("@graph", [data]) if isinstance(data, dict) else data
+            for item in items:
+                if isinstance(item, dict) and item.get("@type") == "Recipe":
+                    return recipe_from_json_ld(item, url)
+        return None
+    return extract
+
+
+def synthetic_page(rng: random.Random, number: int, json_ld: bool) -> str:
+    ingredients = [f"{rng.randint(1, 500)} g składnik {rng.randint(1, 200)}" for _ in range(rng.randint(5, 14))]
+    steps = [f"Krok {i}: wymieszać i gotować {rng.randint(2, 40)} minut." for i in range(1, rng.randint(4, 9))]
+    nav = "".join(f'<li><a href="/przepis/{rng.randint(1, 10**6)}">Przepis {i}</a></li>'
+                  for i in range(BOILERPLATE_LINKS))
+    comments = "".join(f'<div class="comment"><p class="author">Gość {i}</p><p>{"Pyszne! " * rng.randint(5, 30)}</p></div>'
+                       for i in range(BOILERPLATE_COMMENTS))
+    head = ""
+    if json_ld:
+        head = '<script type="application/ld+json">' + json.dumps({
+            "@context": "https://schema.org", "@type": "Recipe", "name": f"Przepis {number}",
+            "recipeCategory": "Obiad", "totalTime": "PT45M", "recipeIngredient": ingredients,
+            "recipeInstructions": [{"@type": "HowToStep", "text": step} for step in steps],
+        }, ensure_ascii=False) + "</script>"
+    return (
+        f'<!DOCTYPE html><html><head><title>Przepis {number}</title>{head}'
+        f'<meta property="og:image" content="/img/{number}.jpg"><style>{"body{margin:0}" * 200}</style></head>'
+        f'<body><nav><ul>{nav}</ul></nav><article><h1>Przepis {number}</h1>'
+        f'<div class="recipe-ingredients"><ul>{"".join(f"<li>{item}</li>" for item in ingredients)}</ul></div>'
+        f'<div class="recipe-preparation"><ol>{"".join(f"<li>{step}</li>" for step in steps)}</ol></div>'
+        f'</article><section class="comments">{comments}</section>'
+        f'<footer>{"<p>Stopka</p>" * 100}</footer><script>{"var x=1;" * 500}</script></body></html>'
+    )
+
+
+def write_synthetic_corpus(out_dir: Path, pages: int, no_json_ld_share: float, seed: int = 42):
+    rng = random.Random(seed)
+    for number in range(pages):
+        html = synthetic_page(rng, number, json_ld=rng.random() >= no_json_ld_share)
+        (out_dir / f"page-{number:05d}.html").write_text(html, encoding="utf-8")
+
+
+def load_corpus(corpus_dir: Path) -> List[Tuple[str, str]]:
+    pages = []
+    for path in sorted(corpus_dir.rglob("*")):
+        if path.name.endswith(".html.gz"):
+            pages.append((f"https://corpus.local/{path.name}", gzip.decompress(path.read_bytes()).decode("utf-8", "replace")))
+        elif path.suffix == ".html":
+            pages.append((f"https://corpus.local/{path.name}", path.read_text(encoding="utf-8", errors="replace")))
+    return pages
+
+
+def measure(extract: Callable, pages: List[Tuple[str, str]], repeat: int) -> Dict:
+    """Best of `repeat` passes over the corpus."""
+    best = float("inf")
+    found = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = sum(extract(html, url) is not None for url, html in pages)
+        best = min(best, time.perf_counter() - start)
+    megabytes = sum(len(html.encode("utf-8")) for _, html in pages) / 1e6
+    return {
+        "seconds": round(best, 3),
+        "pages_per_second": round(len(pages) / best, 1),
+        "mb_per_second": round(megabytes / best, 2),
+        "recipes": found,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recipe extraction parse throughput")
+    parser.add_argument("corpus", nargs="?", help="Directory of saved .html / .html.gz pages")
+    parser.add_argument("--pages", type=int, default=300, help="Synthetic corpus size")
+    parser.add_argument("--no-json-ld-share", type=float, default=0.3, help="Synthetic pages without JSON-LD")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = Path(args.corpus) if args.corpus else Path(tmp)
+        if not args.corpus:
+            write_synthetic_corpus(corpus_dir, args.pages, args.no_json_ld_share)
+        pages = load_corpus(corpus_dir)
+    if not pages:
+        raise SystemExit(f"No .html pages in {args.corpus}")
+
+    size = sum(len(html.encode("utf-8")) for _, html in pages) / 1e6
+    print(f"Corpus: {len(pages)} pages, {size:.1f} MB ({args.corpus or 'synthetic'})")
+    results = {}
+    for name, extract in [("full-tree", full_tree("html.parser")), ("lxml-tree", full_tree("lxml")),
+                          ("extract", extract_recipe)]:
+        results[name] = measure(extract, pages, args.repeat)
+        result = results[name]
+        print(f"  {name:<10} {result['pages_per_second']:8.1f} pages/s  {result['mb_per_second']:7.2f} MB/s  "
+              f"{result['recipes']} recipes")
+    print(f"extract is {results['full-tree']['seconds'] / results['extract']['seconds']:.1f}x faster than full-tree")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"pages": len(pages), "mb": round(size, 2), "results": results}, indent=2))
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Recipe extraction from HTML pages.
+
+Most recipe sites embed a schema.org Recipe as JSON-LD, so pages are first
+scanned for <script type="application/ld+json"> blocks with a regular
+expression, without building a DOM. Only pages without a usable Recipe block
+are parsed, and then with lxml and a SoupStrainer that keeps just the title,
+ingredient and step regions (microdata itemprops or ingredient/step-like
+class names). Both paths return the SeedRecipe shape accepted by
+POST /api/import/seed/stream.
+"""
+
+import json
+import re
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+PARSER = "lxml"
+JSON_LD_PATTERN = re.compile(
+    r"<script\b[^>]*\btype\s*=\s*[\"']?application/ld\+json[\"']?[^>]*>(.*?)</script\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# recipeCategory / keywords -> meal type, first match wins
+MEAL_TYPE_KEYWORDS = [
+    ("breakfast", ["śniadani", "breakfast"]),
+    ("snack", ["przekąsk", "deser", "snack", "ciast"]),
+    ("dinner", ["kolacj", "dinner", "supper"]),
+    ("lunch", ["obiad", "lunch", "danie główne", "zup"]),
+]
+
+# Fallback regions: microdata properties and class/id fragments
+INGREDIENT_PROPS = ["recipeIngredient", "ingredients"]
+STEP_PROPS = ["recipeInstructions"]
+INGREDIENT_MARKERS = ["ingredient", "skladnik", "składnik"]
+STEP_MARKERS = ["instruction", "przygotowanie", "preparation", "method", "step", "krok"]
+REGION_PROPS = set(INGREDIENT_PROPS + STEP_PROPS + ["name", "recipeCategory", "totalTime", "image"])
+
+
+def _text(value) -> str:
+    if isinstance(value, list):
+        return " ".join(_text(item) for item in value)
+    if isinstance(value, dict):
+        return _text(value.get("text") or value.get("name") or "")
+    return " ".join(str(value or "").split())
+
+
+def _minutes(duration: Optional[str]) -> Optional[int]:
+    """ISO 8601 duration (PT1H30M) in minutes."""
+    match = re.fullmatch(r"P(?:T)?(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?", (duration or "").strip())
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes = (int(group or 0) for group in match.groups())
+    return hours * 60 + minutes
+
+
+def _unique(items: List[str]) -> List[str]:
+    return [item for item in dict.fromkeys(items) if item]
+
+
+def meal_type_for(*texts: str, default: str = "lunch") -> str:
+    """Meal type guessed from category/keyword text."""
+    text = " ".join(texts).lower()
+    for meal_type, keywords in MEAL_TYPE_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return meal_type
+    return default
+
+
+def json_ld_recipes(html: str) -> Iterator[Dict]:
+    """schema.org Recipe objects from the page's JSON-LD blocks, found without parsing the HTML."""
+    for match in JSON_LD_PATTERN.finditer(html):
+        block = match.group(1)
+        if "Recipe" not in block:
+            continue
+        try:
+            data = json.loads(block, strict=False)
+        except json.JSONDecodeError:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            item = stack.pop(0)
+            if not isinstance(item, dict):
+                continue
+            types = item.get("@type")
+            if "Recipe" in (types if isinstance(types, list) else [types]):
+                yield item
+            stack.extend(item.get("@graph", []))
+
+
+def recipe_from_json_ld(data: Dict, url: str) -> Optional[Dict]:
+    """SeedRecipe dict from a JSON-LD Recipe, or None without ingredients."""
+    ingredients = _unique([_text(ingredient) for ingredient in data.get("recipeIngredient") or []])
+    if not ingredients:
+        return None
+
+    image = data.get("image")
+    if isinstance(image, list):
+        image = image[0] if image else None
+    if isinstance(image, dict):
+        image = image.get("url")
+    keywords = _text(data.get("keywords"))
+    return {
+        "title": _text(data.get("name")),
+        "source": urlsplit(url).netloc,
+        "url": url,
+        "meal_type": meal_type_for(_text(data.get("recipeCategory")), keywords),
+        "time_minutes": _minutes(data.get("totalTime") or data.get("cookTime")),
+        "image_url": urljoin(url, image) if image else None,
+        "tags": [tag.strip() for tag in keywords.split(",") if tag.strip()][:10],
+        "steps_excerpt": _text(data.get("recipeInstructions") or data.get("description"))[:300],
+        "ingredients": ingredients,
+    }
+
+
+def _markers(attrs) -> str:
+    classes = attrs.get("class") or ""
+    if isinstance(classes, list):
+        classes = " ".join(classes)
+    return f"{classes} {attrs.get('id') or ''}".lower()
+
+
+def _is_region(name, attrs) -> bool:
+    """SoupStrainer filter: keep only the tags the fallback reads (subtrees included)."""
+    if name in ("h1", "title"):
+        return True
+    if name == "meta":
+        return attrs.get("property") == "og:image"
+    if attrs.get("itemprop") in REGION_PROPS:
+        return True
+    markers = _markers(attrs)
+    return any(marker in markers for marker in INGREDIENT_MARKERS + STEP_MARKERS)
+
+
+def _region_items(soup: BeautifulSoup, props: List[str], markers: List[str]) -> List[str]:
+    """Texts of microdata items, else of list items in the first region with a matching class/id."""
+    items = [tag.get_text(" ") for tag in soup.find_all(attrs={"itemprop": props})]
+    if not items:
+        for region in soup.find_all(lambda tag: any(marker in _markers(tag.attrs) for marker in markers)):
+            items = [item.get_text(" ") for item in region.find_all("li")] or [region.get_text(" ")]
+            if any(item.strip() for item in items):
+                break
+    return _unique([_text(item) for item in items])
+
+
+def recipe_from_markup(html: str, url: str) -> Optional[Dict]:
+    """SeedRecipe dict from microdata or ingredient/step-like regions, or None without ingredients."""
+    soup = BeautifulSoup(html, PARSER, parse_only=SoupStrainer(_is_region))
+    ingredients = _region_items(soup, INGREDIENT_PROPS, INGREDIENT_MARKERS)
+    if not ingredients:
+        return None
+
+    title = soup.find(attrs={"itemprop": "name"}) or soup.find("h1") or soup.find("title")
+    image = soup.find("meta", property="og:image")
+    category = soup.find(attrs={"itemprop": "recipeCategory"})
+    total_time = soup.find(attrs={"itemprop": "totalTime"})
+    title_text = _text(title.get_text(" ")) if title else ""
+    return {
+        "title": title_text,
+        "source": urlsplit(url).netloc,
+        "url": url,
+        "meal_type": meal_type_for(_text(category.get_text(" ")) if category else "", title_text),
+        "time_minutes": _minutes(total_time.get("content") or total_time.get("datetime")) if total_time else None,
+        "image_url": urljoin(url, image["content"]) if image and image.get("content") else None,
+        "tags": [],
+        "steps_excerpt": " ".join(_region_items(soup, STEP_PROPS, STEP_MARKERS))[:300],
+        "ingredients": ingredients,
+    }
+
+
+def extract_recipe(html: str, url: str) -> Optional[Dict]:
+    """SeedRecipe dict for a page: JSON-LD first, then the strained markup; None if not a recipe."""
+    for data in json_ld_recipes(html):
+        recipe = recipe_from_json_ld(data, url)
+        if recipe:
+            return recipe
+    return recipe_from_markup(html, url)
+
+
+def extract_links(html: str, base_url: str, follow: re.Pattern) -> List[str]:
+    """Same-host links whose path matches `follow`, without fragments."""
+    host = urlsplit(base_url).netloc
+    links = []
+    for anchor in BeautifulSoup(html, PARSER, parse_only=SoupStrainer("a", href=True)).find_all("a"):
+        link, _ = urldefrag(urljoin(base_url, anchor["href"]))
+        parts = urlsplit(link)
+        if parts.scheme in ("http", "https") and parts.netloc == host and follow.search(parts.path):
+            links.append(link)
+    return links
@@ -2,18 +2,36 @@
 """
 Expanded recipe generator for Amciu Day.
 Generates 500 Polish recipes with variations.
+
+Usage:
+    python generate_recipes.py [count]
+        One JSON document in out/recipes_expanded.json (small sets).
+    python generate_recipes.py count --ndjson [--seed 42] [--workers N] [--shard-size 100000] [--gzip]
+        Seeded catalogue for capacity testing: NDJSON shards written in
+        parallel to out/catalogue-<count>-<seed>/ plus manifest.json. The
+        same count, seed and shard size give byte-identical shards whatever
+        the number of workers. Extra ingredients follow a Zipf-like
+        popularity curve and every URL is unique.
 """
 
+import argparse
+import bisect
+import gzip
+import hashlib
+import itertools
 import json
+import os
 import random
 import sys
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Sequence, Tuple
 
 # Add shared package to path
 sys.path.append(str(Path(__file__).parent.parent.parent / "packages" / "shared"))
-from normalization import normalize_ingredient
+from normalization import normalize_many
 
 
 # Recipe templates with variations
@@ -209,9 +227,34 @@ SOURCES = [
 ]
 
 
-def generate_recipe(template: Dict, meal_type: str, recipe_id: int) -> Dict:
-    """Generate a single recipe from template."""
-    variation = random.choice(template["variations"])
+# Qualifiers that turn common ingredients into a long tail of rarer ones
+INGREDIENT_QUALIFIERS = [
+    "świeży", "suszony", "mrożony", "wędzony", "ekologiczny", "domowy",
+    "konserwowy", "prażony", "marynowany", "w proszku"
+]
+
+# Catalogue mode defaults
+DEFAULT_SEED = 42
+DEFAULT_SHARD_SIZE = 100_000
+DEFAULT_POOL_SIZE = 500
+ZIPF_EXPONENT = 1.1
+EXTRA_INGREDIENT_COUNTS = [0, 0, 1, 1, 2, 3]  # drawn uniformly per recipe
+
+
+def generate_recipe(
+    template: Dict,
+    meal_type: str,
+    recipe_id: int,
+    rng: random.Random = random,
+    extra_ingredients: Sequence[str] = (),
+    unique_url: bool = False
+) -> Dict:
+    """Generate a single recipe from template.
+    
+    `rng` defaults to the global random module; `extra_ingredients` are added
+    after the template ones; `unique_url` appends the recipe ID to the URL.
+    """
+    variation = rng.choice(template["variations"])
     
     # Build ingredients list
     ingredients = template["base_ingredients"].copy()
@@ -219,37 +262,163 @@ def generate_recipe(template: Dict, meal_type: str, recipe_id: int) -> Dict:
         ingredients.extend(template["variable_ingredients"][variation])
     
     # Sometimes add optional ingredients
-    if random.random() < 0.3:
-        ingredients.append(random.choice(OPTIONAL_INGREDIENTS))
+    if rng.random() < 0.3:
+        ingredients.append(rng.choice(OPTIONAL_INGREDIENTS))
+    ingredients.extend(extra_ingredients)
     
     # Generate cooking time
     time_min, time_max = template["time_range"]
-    cooking_time = random.randint(time_min, time_max)
+    cooking_time = rng.randint(time_min, time_max)
     
     # Create title and URL
     full_title = f"{template['base_title']} {variation}"
-    url_slug = full_title.lower().replace(" ", "-").replace("ą", "a").replace("ę", "e").replace("ł", "l").replace("ć", "c").replace("ś", "s").replace("ź", "z").replace("ż", "z").replace("ń", "n")
+    url_slug = slugify(full_title)
+    if unique_url:
+        url_slug = f"{url_slug}-{recipe_id}"
     
     recipe = {
         "title": full_title.title(),
-        "source": random.choice(SOURCES),
-        "url": f"https://{random.choice(SOURCES)}/przepis/{url_slug}",
+        "source": rng.choice(SOURCES),
+        "url": f"https://{rng.choice(SOURCES)}/przepis/{url_slug}",
         "meal_type": meal_type,
         "time_minutes": cooking_time,
         "image_url": None,
         "tags": template["tags"].copy(),
         "steps_excerpt": f"Przepis na {full_title.lower()}. Idealny na {meal_type}.",
-        "ingredients": list(set(ingredients))  # Remove duplicates
+        "ingredients": list(dict.fromkeys(ingredients))  # Remove duplicates, keep order
     }
     
     # Add some variety to tags
-    if random.random() < 0.4:
+    if rng.random() < 0.4:
         extra_tags = ["domowe", "szybkie", "łatwe", "smaczne", "rodzinne"]
-        recipe["tags"].append(random.choice(extra_tags))
+        recipe["tags"].append(rng.choice(extra_tags))
     
     return recipe
 
 
+def slugify(title: str) -> str:
+    """URL slug with Polish letters folded to ASCII."""
+    return title.lower().replace(" ", "-").replace("ą", "a").replace("ę", "e").replace("ł", "l").replace("ć", "c").replace("ś", "s").replace("ź", "z").replace("ż", "z").replace("ń", "n").replace("ó", "o")
+
+
+def ingredient_pool(size: int = DEFAULT_POOL_SIZE) -> List[str]:
+    """Ingredients ordered from most to least popular.
+    
+    Template ingredients come first, ranked by how often the templates use
+    them; qualified variants ("suszony koper") fill the long tail up to `size`.
+    """
+    counts = Counter()
+    for templates in RECIPE_TEMPLATES.values():
+        for template in templates:
+            counts.update(template["base_ingredients"] * len(template["variations"]))
+            for variable in template["variable_ingredients"].values():
+                counts.update(variable)
+    counts.update(OPTIONAL_INGREDIENTS)
+    pool = [name for name, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))]
+    
+    tail = (f"{name} {qualifier}" for qualifier in INGREDIENT_QUALIFIERS for name in list(pool))
+    pool.extend(itertools.islice(tail, max(0, size - len(pool))))
+    return pool[:size]
+
+
+class ZipfSampler:
+    """Draws items with probability proportional to 1 / rank ** exponent."""
+    
+    def __init__(self, items: Sequence[str], exponent: float = ZIPF_EXPONENT):
+        self.items = list(items)
+        self.cum_weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, len(self.items) + 1)))
+    
+    def sample(self, rng: random.Random, k: int) -> List[str]:
+        """Up to `k` distinct items (duplicate draws are dropped)."""
+        total = self.cum_weights[-1]
+        drawn = (self.items[bisect.bisect(self.cum_weights, rng.random() * total)] for _ in range(k))
+        return list(dict.fromkeys(drawn))
+
+
+def iter_catalogue(
+    seed: int,
+    first_id: int,
+    count: int,
+    shard_index: int = 0,
+    pool_size: int = DEFAULT_POOL_SIZE
+) -> Iterator[Dict]:
+    """Yield `count` recipes with IDs from `first_id`; deterministic per (seed, shard_index)."""
+    rng = random.Random(f"{seed}:{shard_index}")
+    sampler = ZipfSampler(ingredient_pool(pool_size))
+    meal_types = list(RECIPE_TEMPLATES.keys())
+    for recipe_id in range(first_id, first_id + count):
+        meal_type = meal_types[recipe_id % len(meal_types)]
+        template = rng.choice(RECIPE_TEMPLATES[meal_type])
+        extras = sampler.sample(rng, rng.choice(EXTRA_INGREDIENT_COUNTS))
+        recipe = generate_recipe(template, meal_type, recipe_id, rng, extras, unique_url=True)
+        recipe["normalized_ingredients"] = normalize_many(recipe["ingredients"])
+        yield recipe
+
+
+def write_shard(out_dir: str, seed: int, shard_index: int, first_id: int, count: int,
+                pool_size: int, compress: bool) -> Dict:
+    """Write one NDJSON shard; returns its manifest entry."""
+    name = f"recipes-{shard_index:05d}.ndjson" + (".gz" if compress else "")
+    path = Path(out_dir) / name
+    digest = hashlib.sha256()
+    ingredient_counts = Counter()
+    # mtime=0 keeps gzip output byte-identical between runs
+    opener = (lambda f: gzip.GzipFile(fileobj=f, mode="wb", mtime=0)) if compress else (lambda f: f)
+    with open(path, "wb") as raw, opener(raw) as f:
+        for recipe in iter_catalogue(seed, first_id, count, shard_index, pool_size):
+            line = (json.dumps(recipe, ensure_ascii=False) + "\n").encode("utf-8")
+            digest.update(line)
+            f.write(line)
+            ingredient_counts.update(recipe["ingredients"])
+    return {
+        "file": name,
+        "first_id": first_id,
+        "count": count,
+        "bytes": path.stat().st_size,
+        "sha256": digest.hexdigest(),  # of the uncompressed NDJSON
+        "ingredient_counts": ingredient_counts,
+    }
+
+
+def write_catalogue(
+    count: int,
+    out_dir: Path,
+    seed: int = DEFAULT_SEED,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    workers: Optional[int] = None,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    compress: bool = False
+) -> Dict:
+    """Generate `count` recipes as NDJSON shards across a process pool and write manifest.json."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shards = [
+        (str(out_dir), seed, index, first_id, min(shard_size, count - first_id + 1), pool_size, compress)
+        for index, first_id in enumerate(range(1, count + 1, shard_size))
+    ]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        entries = list(executor.map(write_shard, *zip(*shards))) if shards else []
+    
+    ingredient_counts = Counter()
+    for entry in entries:
+        ingredient_counts.update(entry.pop("ingredient_counts"))
+    manifest = {
+        "count": count,
+        "seed": seed,
+        "shard_size": shard_size,
+        "ingredient_pool_size": pool_size,
+        "zipf_exponent": ZIPF_EXPONENT,
+        "distinct_ingredients": len(ingredient_counts),
+        "top_ingredients": ingredient_counts.most_common(10),
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seconds": round(time.perf_counter() - started, 2),
+        "shards": entries,
+    }
+    with open(out_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
 def create_expanded_recipes(count: int = 500) -> List[Dict]:
     """Create expanded set of Polish recipes."""
     recipes = []
@@ -281,22 +450,43 @@ def create_expanded_recipes(count: int = 500) -> List[Dict]:
 def normalize_recipes(recipes: List[Dict]) -> List[Dict]:
     """Normalize ingredients in recipes."""
     for recipe in recipes:
-        normalized_ingredients = []
-        for ingredient in recipe.get('ingredients', []):
-            normalized = normalize_ingredient(ingredient)
-            normalized_ingredients.append(normalized)
-        
-        recipe['normalized_ingredients'] = normalized_ingredients
+        recipe['normalized_ingredients'] = normalize_many(recipe.get('ingredients', []))
     
     return recipes
 
 
+def main_catalogue(args: argparse.Namespace):
+    """Catalogue mode: sharded NDJSON plus manifest."""
+    out_dir = Path(args.out) if args.out else Path(__file__).parent / "out" / f"catalogue-{args.count}-{args.seed}"
+    print(f"Generating {args.count} recipes (seed {args.seed}) into {out_dir}...")
+    manifest = write_catalogue(args.count, out_dir, args.seed, args.shard_size, args.workers,
+                               args.pool_size, args.gzip)
+    print(f"Wrote {len(manifest['shards'])} shards in {manifest['seconds']}s "
+          f"({args.count / max(manifest['seconds'], 1e-9):.0f} recipes/s)")
+    print(f"Distinct ingredients: {manifest['distinct_ingredients']}")
+    print("Most common ingredients:")
+    for ingredient, count in manifest["top_ingredients"]:
+        print(f"  {ingredient}: {count} recipes")
+
+
 def main():
     """Main generation function."""
-    count = 500
-    if len(sys.argv) > 1:
-        count = int(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Generate Polish recipes for Amciu Day")
+    parser.add_argument("count", type=int, nargs="?", default=500, help="Number of recipes")
+    parser.add_argument("--ndjson", action="store_true", help="Seeded NDJSON shards + manifest (catalogue mode)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--workers", type=int, help="Processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="Distinct ingredients to draw from")
+    parser.add_argument("--gzip", action="store_true", help="Write .ndjson.gz shards")
+    parser.add_argument("--out", help="Output directory (default: out/catalogue-<count>-<seed>)")
+    args = parser.parse_args()
+    
+    if args.ndjson:
+        main_catalogue(args)
+        return
     
+    count = args.count
     print(f"Creating {count} Polish recipes for Amciu Day...")
     
     recipes = create_expanded_recipes(count)
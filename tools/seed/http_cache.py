@@ -0,0 +1,93 @@
+"""
+On-disk HTTP cache for incremental re-crawls.
+
+Page bodies are stored gzip-compressed under their SHA-256
+(bodies/ab/abcd....html.gz), so identical pages are stored once. index.json
+maps each URL to its body hash, the ETag/Last-Modified validators sent back
+as If-None-Match/If-Modified-Since on the next crawl, and the links found on
+the page. A page that answers 304, or 200 with the same body hash, is
+unchanged: it needs no parsing, since its links come from the index and its
+recipe was already written by an earlier crawl.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+
+class PageCache:
+    """Content-addressed page bodies plus a URL index of validators and links.
+
+    Bodies may be stored from worker threads; the index is only changed by
+    the crawl loop's thread.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.index_path = root / "index.json"
+        self.index: Dict[str, Dict] = {}
+        if self.index_path.exists():
+            self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+
+    def body_path(self, digest: str) -> Path:
+        return self.root / "bodies" / digest[:2] / f"{digest}.html.gz"
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for a URL fetched before."""
+        entry = self.index.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def digest(self, url: str) -> Optional[str]:
+        entry = self.index.get(url)
+        return entry["sha256"] if entry else None
+
+    def links(self, url: str) -> List[str]:
+        return self.index[url]["links"]
+
+    def store_body(self, body: bytes) -> str:
+        """Store a body under its SHA-256 unless already present; returns the hash."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.body_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{id(body)}.tmp")
+            with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                f.write(body)
+            os.replace(tmp, path)
+        return digest
+
+    def load(self, url: str) -> Optional[str]:
+        """Cached body of a URL, or None."""
+        digest = self.digest(url)
+        if digest is None or not self.body_path(digest).exists():
+            return None
+        return gzip.decompress(self.body_path(digest).read_bytes()).decode("utf-8", "replace")
+
+    def update(self, url: str, digest: str, headers: Mapping[str, str], links: List[str]):
+        """Record a fetched page; validators missing from `headers` (e.g. on a 304) are kept."""
+        previous = self.index.get(url, {})
+        self.index[url] = {
+            "sha256": digest,
+            "etag": headers.get("ETag") or previous.get("etag"),
+            "last_modified": headers.get("Last-Modified") or previous.get("last_modified"),
+            "links": links,
+            "checked_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def save(self):
+        """Write the index atomically."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.index_path)
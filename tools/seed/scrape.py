@@ -1,27 +1,53 @@
 #!/usr/bin/env python3
 """
 Scraping tool for Amciu Day recipes.
-Creates sample Polish recipes for development and testing.
+Creates sample Polish recipes for development and testing, or crawls recipe
+sites and writes NDJSON for POST /api/import/seed/stream.
+
+Usage:
+    python scrape.py
+        Sample recipes in out/recipes.json.
+    python scrape.py --crawl URL [URL ...] [--workers 8] [--delay 1.0] [--max-pages N]
+                     [--follow REGEX] [--output out/scraped.ndjson] [--state out/crawl_state.json]
+                     [--cache out/http_cache | --no-cache] [--save-html DIR]
+        Concurrent crawl from the seed URLs. Pages come from a bounded thread
+        pool with one keep-alive session per thread; requests to one host are
+        spaced by --delay seconds; failures are retried with backoff; robots.txt
+        is honoured. Recipes are extracted by extract.py. The crawl state
+        is checkpointed, so rerunning the same command resumes it; once a
+        crawl has finished, rerunning it is an incremental refresh: pages are
+        requested with the cached ETag/Last-Modified and only new or changed
+        recipes are written.
 """
 
+import argparse
+import hashlib
 import json
+import os
+import random
+import re
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from urllib import robotparser
+from urllib.parse import urlsplit
+
+import requests
+
+from extract import extract_links, extract_recipe
+from http_cache import PageCache
 
 # Add shared package to path
 sys.path.append(str(Path(__file__).parent.parent.parent / "packages" / "shared"))
 from normalization import normalize_ingredient
 
 
-def create_expanded_recipes(count: int = 500) -> List[Dict]:
-    """Create expanded set of Polish recipes."""
-    import random
-    
-    # Base recipe templates with variations
-    base_recipes = {
-        "breakfast": [
+def create_sample_recipes() -> List[Dict]:
+    """Create the built-in sample Polish recipes."""
+    recipes = [
         # Breakfast recipes
         {
             "title": "Naleśniki z serem",
@@ -268,8 +294,309 @@ def normalize_recipes(recipes: List[Dict]) -> List[Dict]:
     return recipes
 
 
+# --- Crawler -----------------------------------------------------------------
+
+USER_AGENT = "AmciuDaySeed/1.0 (recipe catalogue builder)"
+DEFAULT_FOLLOW = r"/przepis"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """At most one request start per `interval` seconds for each host, shared by all workers."""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+    
+    def wait(self, host: str):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class CrawlState:
+    """Crawl frontier and finished URLs, checkpointed to a JSON file so a crawl can resume.
+    
+    A state file whose crawl had finished (nothing pending) is not resumed:
+    the next crawl starts over from the seeds, as a refresh.
+    """
+    
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.pending: List[str] = []
+        self.seen: Set[str] = set()
+        self.done: Set[str] = set()
+        self.failed: Dict[str, str] = {}
+        data = json.loads(path.read_text(encoding="utf-8")) if path and path.exists() else None
+        if data and data["pending"]:
+            self.pending = data["pending"]
+            self.done = set(data["done"])
+            self.failed = data["failed"]
+            self.seen = self.done | set(self.failed) | set(self.pending)
+    
+    def add(self, url: str):
+        if url not in self.seen:
+            self.seen.add(url)
+            self.pending.append(url)
+    
+    def save(self, in_flight: Iterable[str] = ()):
+        """Write the state atomically; in-flight URLs are saved as pending."""
+        if not self.path:
+            return
+        data = {
+            "pending": list(in_flight) + self.pending,
+            "done": sorted(self.done),
+            "failed": self.failed,
+            "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class Fetcher:
+    """Thread-safe page fetcher: one pooled keep-alive session per worker thread,
+    per-host rate limiting, robots.txt and retries with exponential backoff."""
+    
+    def __init__(self, limiter: HostRateLimiter, retries: int = 3, backoff: float = 0.5,
+                 timeout: float = 15.0, pool_size: int = 10, respect_robots: bool = True):
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.respect_robots = respect_robots
+        self._local = threading.local()
+        # One future per origin: the first worker fetches robots.txt, the others for that origin wait on it
+        self._robots: Dict[str, Future] = {}
+        self._robots_lock = threading.Lock()
+    
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            self._local.session = session
+        return session
+    
+    def allowed(self, url: str) -> bool:
+        """Whether robots.txt of the URL's host allows fetching it (fetched once per host)."""
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._robots_lock:
+            future = self._robots.get(origin)
+            fetch = future is None
+            if fetch:
+                future = self._robots[origin] = Future()
+        
+        if fetch:
+            # Outside the lock: rate-limit waits and retries for this host must not hold up other hosts
+            parser = robotparser.RobotFileParser()
+            try:
+                response = self.get(f"{origin}/robots.txt")
+                parser.parse(response.text.splitlines() if response.status_code == 200 else [])
+            except requests.RequestException:
+                parser.parse([])
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            future.set_result(parser)
+        return future.result().can_fetch(USER_AGENT, url)
+    
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET with rate limiting; retries connection errors, 429 and 5xx with backoff."""
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(host)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+            time.sleep(delay * random.uniform(1.0, 1.5))
+        raise AssertionError("unreachable")
+
+
+def crawl(
+    seeds: List[str],
+    output: Path,
+    state_path: Optional[Path] = None,
+    workers: int = 8,
+    delay: float = 1.0,
+    max_pages: Optional[int] = None,
+    follow: str = DEFAULT_FOLLOW,
+    retries: int = 3,
+    backoff: float = 0.5,
+    respect_robots: bool = True,
+    checkpoint_every: int = 50,
+    progress_every: float = 5.0,
+    save_html: Optional[Path] = None,
+    cache_dir: Optional[Path] = None
+) -> Dict:
+    """Crawl from `seeds`, appending recipes to `output` (NDJSON); returns stats.
+    
+    Pages are fetched by `workers` threads; parsing results, the frontier and
+    the output file are handled by the calling thread only. The state is
+    checkpointed every `checkpoint_every` pages and at the end, so a rerun with
+    the same state file resumes where the last one stopped. With `save_html`,
+    fetched pages are also kept there as a corpus for bench_extract.py.
+    
+    With `cache_dir` (see http_cache.py) pages fetched by earlier crawls are
+    requested conditionally; pages that are not modified, or whose body hash
+    is unchanged, are neither parsed nor written again, so only new and
+    changed recipes reach `output`.
+    """
+    follow_pattern = re.compile(follow)
+    state = CrawlState(state_path)
+    for seed in seeds:
+        state.add(seed)
+    fetcher = Fetcher(HostRateLimiter(delay), retries, backoff, pool_size=workers, respect_robots=respect_robots)
+    cache = PageCache(cache_dir) if cache_dir else None
+    stats = {"pages": 0, "recipes": 0, "unchanged": 0, "errors": 0, "skipped": 0}
+    started = last_report = time.perf_counter()
+    
+    def fetch(url: str) -> Tuple[str, Optional[str], Optional[str], Mapping[str, str]]:
+        """(outcome, html, body hash, response headers); runs on a worker thread."""
+        if not fetcher.allowed(url):
+            return "robots", None, None, {}
+        conditional = cache.conditional_headers(url) if cache else {}
+        response = fetcher.get(url, conditional)
+        if response.status_code == 304 and conditional:
+            return "not modified", None, cache.digest(url), response.headers
+        if response.status_code != 200:
+            return f"HTTP {response.status_code}", None, None, {}
+        digest = cache.store_body(response.content) if cache else None
+        return "ok", response.text, digest, response.headers
+    
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if save_html:
+        save_html.mkdir(parents=True, exist_ok=True)
+    with open(output, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight: Dict = {}
+        while state.pending or in_flight:
+            # Keep at most `workers` pages in flight
+            while state.pending and len(in_flight) < workers and (
+                max_pages is None or stats["pages"] + len(in_flight) < max_pages
+            ):
+                url = state.pending.pop(0)
+                in_flight[executor.submit(fetch, url)] = url
+            if not in_flight:
+                break
+            
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                url = in_flight.pop(future)
+                try:
+                    outcome, html, digest, headers = future.result()
+                except requests.RequestException as e:
+                    outcome, html, digest, headers = type(e).__name__, None, None, {}
+                
+                if outcome == "robots":
+                    stats["skipped"] += 1
+                    state.done.add(url)
+                    continue
+                stats["pages"] += 1
+                if outcome == "not modified" or (outcome == "ok" and cache and digest == cache.digest(url)):
+                    # Parsed and written by an earlier crawl
+                    stats["unchanged"] += 1
+                    links = cache.links(url)
+                    cache.update(url, digest, headers, links)
+                elif html is None:
+                    stats["errors"] += 1
+                    state.failed[url] = outcome
+                    continue
+                else:
+                    if save_html:
+                        (save_html / f"{hashlib.sha1(url.encode()).hexdigest()}.html").write_text(html, encoding="utf-8")
+                    recipe = extract_recipe(html, url)
+                    if recipe:
+                        recipe["normalized_ingredients"] = [normalize_ingredient(name) for name in recipe["ingredients"]]
+                        out.write(json.dumps(recipe, ensure_ascii=False) + "\n")
+                        stats["recipes"] += 1
+                    links = extract_links(html, url, follow_pattern)
+                    if cache:
+                        cache.update(url, digest, headers, links)
+                for link in links:
+                    state.add(link)
+                state.done.add(url)
+                
+                if stats["pages"] % checkpoint_every == 0:
+                    out.flush()
+                    if cache:
+                        cache.save()
+                    state.save(in_flight.values())
+            
+            now = time.perf_counter()
+            if progress_every and now - last_report >= progress_every:
+                last_report = now
+                print(f"  {stats['pages']} pages, {stats['recipes']} recipes, {stats['unchanged']} unchanged, "
+                      f"{stats['errors']} errors, "
+                      f"{stats['pages'] / (now - started):.1f} pages/s, {len(state.pending)} queued")
+        
+        out.flush()
+        if cache:
+            cache.save()
+        state.save(in_flight.values())
+    
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    stats["pages_per_second"] = round(stats["pages"] / max(stats["seconds"], 1e-9), 2)
+    stats["queued"] = len(state.pending)
+    return stats
+
+
+def main_crawl(args: argparse.Namespace):
+    """Crawl mode."""
+    print(f"Crawling from {len(args.crawl)} seed URLs with {args.workers} workers...")
+    stats = crawl(
+        args.crawl, Path(args.output), Path(args.state), args.workers, args.delay, args.max_pages,
+        args.follow, args.retries, respect_robots=not args.ignore_robots,
+        save_html=Path(args.save_html) if args.save_html else None,
+        cache_dir=None if args.no_cache else Path(args.cache)
+    )
+    print(f"Fetched {stats['pages']} pages in {stats['seconds']}s ({stats['pages_per_second']} pages/s): "
+          f"{stats['recipes']} new or changed recipes, {stats['unchanged']} unchanged pages, {stats['errors']} errors, {stats['skipped']} disallowed by robots.txt, "
+          f"{stats['queued']} still queued")
+    print(f"Recipes appended to {args.output}")
+
+
 def main():
     """Main scraping function."""
+    out_dir = Path(__file__).parent / "out"
+    parser = argparse.ArgumentParser(description="Sample recipes or a concurrent recipe crawl")
+    parser.add_argument("--crawl", nargs="+", metavar="URL", help="Seed URLs to crawl")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent fetches")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds between requests to one host")
+    parser.add_argument("--max-pages", type=int, help="Stop after this many pages")
+    parser.add_argument("--follow", default=DEFAULT_FOLLOW, help="Follow same-host links whose path matches")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--ignore-robots", action="store_true")
+    parser.add_argument("--output", default=str(out_dir / "scraped.ndjson"))
+    parser.add_argument("--state", default=str(out_dir / "crawl_state.json"))
+    parser.add_argument("--cache", default=str(out_dir / "http_cache"), help="HTTP cache for incremental re-crawls")
+    parser.add_argument("--no-cache", action="store_true", help="Fetch and parse every page")
+    parser.add_argument("--save-html", metavar="DIR", help="Also save fetched pages (a bench_extract.py corpus)")
+    args = parser.parse_args()
+    
+    if args.crawl:
+        main_crawl(args)
+        return
+    
     print("Creating sample recipes for Amciu Day...")
     
     recipes = create_sample_recipes()
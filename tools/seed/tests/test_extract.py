@@ -0,0 +1,114 @@
+import json
+import random
+from unittest.mock import patch
+
+import extract
+from bench_extract import synthetic_page
+from extract import extract_recipe, json_ld_recipes, meal_type_for
+
+URL = "https://kuchnia.example/przepis/3"
+
+JSON_LD_PAGE = """<html><head>
+<script type="application/ld+json">{"@type": "Organization", "name": "Kuchnia"}</script>
+<script type='application/ld+json'>
+{"@context": "https://schema.org", "@graph": [{"@type": "WebPage"}, {
+  "@type": ["Recipe", "NewsArticle"], "name": "Placki  ziemniaczane", "recipeCategory": "Kolacja",
+  "keywords": "polska, domowe", "totalTime": "PT1H15M", "image": [{"url": "/img/3.jpg"}],
+  "recipeIngredient": ["2 jajka", "mąka pszenna", "2 jajka"],
+  "recipeInstructions": [{"@type": "HowToStep", "text": "Zetrzeć\tziemniaki."}, {"text": "Usmażyć."}]
+}]}
+</script></head><body><h1>Inny tytuł</h1></body></html>"""
+
+MICRODATA_PAGE = """<html><head><title>Sernik | Kuchnia</title>
+<meta property="og:image" content="https://cdn.example/sernik.jpg"></head><body>
+<nav><a href="/">Start</a><ul class="menu"><li>Obiady</li><li>Desery</li></ul></nav>
+<div itemscope itemtype="https://schema.org/Recipe">
+  <h1 itemprop="name">Sernik krakowski</h1>
+  <span itemprop="recipeCategory">Deser</span>
+  <time itemprop="totalTime" datetime="PT90M">1,5 h</time>
+  <ul><li itemprop="recipeIngredient">1 kg twarogu</li><li itemprop="recipeIngredient">5 jajek</li></ul>
+  <div itemprop="recipeInstructions">Wymieszać twaróg z jajkami. Piec.</div>
+</div>
+<section class="comments"><p>Pyszne!</p></section></body></html>"""
+
+CLASS_PAGE = """<html><head><title>Zupa</title></head><body>
+<h1>Zupa pomidorowa</h1>
+<div class="sidebar"><ul><li>Popularne</li></ul></div>
+<div class="recipe__ingredients"><h2>Składniki</h2><ul><li>1 l bulionu</li><li>3 pomidory</li></ul></div>
+<div id="przygotowanie"><ol><li>Zagotować bulion.</li><li>Dodać pomidory.</li></ol></div>
+</body></html>"""
+
+
+class TestJsonLd:
+    """Test suite for the JSON-LD fast path."""
+
+    def test_recipe_fields(self):
+        """Test that a JSON-LD Recipe inside @graph maps to seed recipe fields."""
+        recipe = extract_recipe(JSON_LD_PAGE, URL)
+
+        assert recipe == {
+            "title": "Placki ziemniaczane",
+            "source": "kuchnia.example",
+            "url": URL,
+            "meal_type": "dinner",
+            "time_minutes": 75,
+            "image_url": "https://kuchnia.example/img/3.jpg",
+            "tags": ["polska", "domowe"],
+            "steps_excerpt": "Zetrzeć ziemniaki. Usmażyć.",
+            "ingredients": ["2 jajka", "mąka pszenna"],
+        }
+
+    def test_no_tree_is_built(self):
+        """Test that pages with a usable JSON-LD Recipe are never parsed into a tree."""
+        with patch.object(extract, "BeautifulSoup") as soup:
+            assert extract_recipe(JSON_LD_PAGE, URL) is not None
+        soup.assert_not_called()
+
+    def test_invalid_blocks_are_skipped(self):
+        """Test that broken JSON and non-recipe blocks are ignored."""
+        html = ('<script type="application/ld+json">{"@type": "Recipe", </script>'
+                '<script type="application/ld+json">[{"@type": "Recipe", "name": "Ok"}]</script>')
+        assert [item["name"] for item in json_ld_recipes(html)] == ["Ok"]
+
+    def test_meal_type_keywords(self):
+        """Test category to meal type mapping and the default."""
+        assert meal_type_for("Śniadania") == "breakfast"
+        assert meal_type_for("Desery") == "snack"
+        assert meal_type_for("Inne") == "lunch"
+
+
+class TestMarkupFallback:
+    """Test suite for the strained lxml fallback."""
+
+    def test_microdata(self):
+        """Test extraction from schema.org microdata."""
+        recipe = extract_recipe(MICRODATA_PAGE, "https://kuchnia.example/sernik")
+
+        assert recipe["title"] == "Sernik krakowski"
+        assert recipe["meal_type"] == "snack"
+        assert recipe["time_minutes"] == 90
+        assert recipe["image_url"] == "https://cdn.example/sernik.jpg"
+        assert recipe["ingredients"] == ["1 kg twarogu", "5 jajek"]
+        assert recipe["steps_excerpt"] == "Wymieszać twaróg z jajkami. Piec."
+
+    def test_class_regions(self):
+        """Test extraction from ingredient and step regions found by class or id."""
+        recipe = extract_recipe(CLASS_PAGE, "https://kuchnia.example/zupa")
+
+        assert recipe["title"] == "Zupa pomidorowa"
+        assert recipe["ingredients"] == ["1 l bulionu", "3 pomidory"]
+        assert recipe["steps_excerpt"] == "Zagotować bulion. Dodać pomidory."
+        assert recipe["time_minutes"] is None
+
+    def test_page_without_recipe(self):
+        """Test that pages without a recipe are skipped."""
+        assert extract_recipe("<html><body><h1>Blog</h1><ul><li>Wpis</li></ul></body></html>", URL) is None
+
+    def test_output_is_a_seed_recipe(self):
+        """Test that both paths produce the same fields as the import schema."""
+        rng = random.Random(1)
+        for json_ld in (True, False):
+            recipe = extract_recipe(synthetic_page(rng, 1, json_ld), URL)
+            assert set(recipe) == {"title", "source", "url", "meal_type", "time_minutes", "image_url", "tags",
+                                   "steps_excerpt", "ingredients"}
+            assert json.loads(json.dumps(recipe, ensure_ascii=False)) == recipe
@@ -0,0 +1,73 @@
+import json
+import random
+from collections import Counter
+
+import generate_recipes
+from generate_recipes import ZipfSampler, ingredient_pool, iter_catalogue, write_catalogue
+
+
+def read_shards(out_dir, manifest):
+    return [json.loads(line) for shard in manifest["shards"] for line in open(out_dir / shard["file"], encoding="utf-8")]
+
+
+class TestCatalogue:
+    """Test suite for the sharded NDJSON catalogue mode."""
+
+    def test_same_output_for_any_worker_count(self, tmp_path):
+        """Test that shards are byte-identical with one or several workers."""
+        one = write_catalogue(250, tmp_path / "one", seed=7, shard_size=100, workers=1)
+        many = write_catalogue(250, tmp_path / "many", seed=7, shard_size=100, workers=3)
+
+        assert [shard["sha256"] for shard in one["shards"]] == [shard["sha256"] for shard in many["shards"]]
+        assert [shard["count"] for shard in one["shards"]] == [100, 100, 50]
+
+    def test_seed_changes_output(self):
+        """Test that a different seed gives a different catalogue."""
+        assert list(iter_catalogue(1, 1, 20)) != list(iter_catalogue(2, 1, 20))
+
+    def test_unique_urls_and_manifest(self, tmp_path):
+        """Test that every URL is unique and the manifest describes the shards."""
+        manifest = write_catalogue(300, tmp_path, seed=3, shard_size=128, workers=2)
+        recipes = read_shards(tmp_path, manifest)
+
+        assert len(recipes) == manifest["count"] == 300
+        assert len({recipe["url"] for recipe in recipes}) == 300
+        assert [shard["first_id"] for shard in manifest["shards"]] == [1, 129, 257]
+        assert json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))["seed"] == 3
+
+    def test_gzip_shards(self, tmp_path):
+        """Test that compressed shards are written and hashed like plain ones."""
+        plain = write_catalogue(50, tmp_path / "plain", seed=5, workers=1)
+        packed = write_catalogue(50, tmp_path / "packed", seed=5, workers=1, compress=True)
+
+        assert packed["shards"][0]["file"].endswith(".ndjson.gz")
+        assert packed["shards"][0]["sha256"] == plain["shards"][0]["sha256"]
+
+
+class TestIngredientPopularity:
+    """Test suite for Zipf-like ingredient draws."""
+
+    def test_pool_has_long_tail(self):
+        """Test that the pool starts with common ingredients and is padded to size."""
+        pool = ingredient_pool(300)
+
+        assert len(pool) == len(set(pool)) == 300
+        assert pool[0] == "sól"
+
+    def test_popular_items_drawn_more_often(self):
+        """Test that draw frequency falls with rank."""
+        sampler = ZipfSampler([f"i{rank}" for rank in range(100)])
+        rng = random.Random(0)
+        counts = Counter(item for _ in range(20_000) for item in sampler.sample(rng, 1))
+
+        assert counts["i0"] > counts["i9"] > counts["i99"]
+        assert counts["i0"] / counts["i9"] > 5
+
+    def test_legacy_mode_uses_global_random(self):
+        """Test that generate_recipe without rng still draws from the random module."""
+        template = generate_recipes.RECIPE_TEMPLATES["breakfast"][0]
+        random.seed(11)
+        first = generate_recipes.generate_recipe(template, "breakfast", 1)
+        random.seed(11)
+
+        assert generate_recipes.generate_recipe(template, "breakfast", 1) == first
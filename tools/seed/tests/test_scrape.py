@@ -0,0 +1,321 @@
+import gzip
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import scrape
+from http_cache import PageCache
+from scrape import HostRateLimiter, crawl
+
+RECIPE_COUNT = 12
+
+
+def recipe_page(number, category="Obiad", version=0):
+    data = {
+        "@context": "https://schema.org",
+        "@graph": [{"@type": "WebPage"}, {
+            "@type": "Recipe",
+            "name": f"Przepis {number}" + (f" v{version}" if version else ""),
+            "recipeCategory": category,
+            "keywords": "polska, domowe",
+            "totalTime": "PT1H15M",
+            "image": [{"url": f"/img/{number}.jpg"}],
+            "recipeIngredient": ["2 jajka", "mąka pszenna"],
+            "recipeInstructions": [{"@type": "HowToStep", "text": "Wymieszać."}, {"text": "Upiec."}],
+        }],
+    }
+    next_link = f'<a href="/przepis/{number + 1}#komentarze">dalej</a>' if number < RECIPE_COUNT else ""
+    return (f'<html><head><script type="application/ld+json">{json.dumps(data)}</script></head>'
+            f'<body>{next_link}<a href="/kontakt">kontakt</a></body></html>')
+
+
+class Site(BaseHTTPRequestHandler):
+    """Index linking to recipe 1, a chain of recipe pages, a flaky page and robots.txt.
+
+    The index sends Last-Modified and recipe pages an ETag, both honoured in
+    conditional requests; the flaky page sends no validators.
+    """
+
+    requests = []
+    failures_left = {}
+    versions = {}
+    not_modified = 0
+
+    def do_GET(self):
+        Site.requests.append((self.path, time.monotonic()))
+        if self.path == "/robots.txt":
+            return self.reply(200, "User-agent: *\nDisallow: /przepis/prywatny\n")
+        if self.path == "/":
+            links = '<a href="/przepis/1">1</a><a href="/przepis/prywatny">x</a><a href="/przepis/flaky">f</a>'
+            last_modified = "Mon, 05 Oct 2026 10:00:00 GMT"
+            if self.headers.get("If-Modified-Since") == last_modified:
+                return self.reply(304, "")
+            return self.reply(200, f"<html><body>{links}<a href='http://example.com/przepis/9'>obcy</a></body></html>",
+                              {"Last-Modified": last_modified})
+        if self.path == "/przepis/flaky":
+            if Site.failures_left.get(self.path, 0) > 0:
+                Site.failures_left[self.path] -= 1
+                return self.reply(503, "busy", {"Retry-After": "0"})
+            return self.reply(200, recipe_page(100, "Śniadanie"))
+        if self.path.startswith("/przepis/") and self.path.rsplit("/", 1)[1].isdigit():
+            version = Site.versions.get(self.path, 0)
+            etag = f'"{self.path}-{version}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self.reply(304, "")
+            return self.reply(200, recipe_page(int(self.path.rsplit("/", 1)[1]), version=version), {"ETag": etag})
+        self.reply(404, "not found")
+
+    def reply(self, status, body, headers=None):
+        if status == 304:
+            Site.not_modified += 1
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    Site.requests = []
+    Site.failures_left = {"/przepis/flaky": 2}
+    Site.versions = {}
+    Site.not_modified = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Site)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def read_ndjson(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestCrawl:
+    """Test suite for the concurrent crawler against a local site."""
+
+    def test_crawl_writes_ndjson(self, site, tmp_path):
+        """Test that linked recipe pages are crawled once each and written as NDJSON."""
+        output = tmp_path / "scraped.ndjson"
+        stats = crawl([f"{site}/"], output, tmp_path / "state.json", workers=4, delay=0, backoff=0.01)
+        recipes = read_ndjson(output)
+
+        assert stats["recipes"] == RECIPE_COUNT + 1
+        assert stats["errors"] == 0
+        assert stats["skipped"] == 1
+        assert len({recipe["url"] for recipe in recipes}) == RECIPE_COUNT + 1
+        assert all("#" not in recipe["url"] for recipe in recipes)
+        assert recipes[0]["normalized_ingredients"]
+        fetched = [path for path, _ in Site.requests]
+        assert "/przepis/prywatny" not in fetched
+        assert "/kontakt" not in fetched
+        assert fetched.count("/robots.txt") == 1
+
+    def test_retries_server_errors(self, site, tmp_path):
+        """Test that 503 responses are retried until the page loads."""
+        output = tmp_path / "scraped.ndjson"
+        crawl([f"{site}/przepis/flaky"], output, workers=1, delay=0, backoff=0.01, respect_robots=False)
+
+        assert [path for path, _ in Site.requests].count("/przepis/flaky") == 3
+        assert read_ndjson(output)[0]["meal_type"] == "breakfast"
+
+    def test_gives_up_after_retries(self, site, tmp_path):
+        """Test that a page still failing after the retries is recorded as failed."""
+        Site.failures_left["/przepis/flaky"] = 10
+        state = tmp_path / "state.json"
+        stats = crawl([f"{site}/przepis/flaky"], tmp_path / "out.ndjson", state, workers=1, delay=0,
+                      retries=1, backoff=0.01, respect_robots=False)
+
+        assert stats["errors"] == 1
+        assert json.loads(state.read_text(encoding="utf-8"))["failed"] == {f"{site}/przepis/flaky": "HTTP 503"}
+
+    def test_per_host_delay(self, site, tmp_path):
+        """Test that requests to one host are spaced by the delay even with many workers."""
+        Site.failures_left = {}
+        crawl([f"{site}/"], tmp_path / "out.ndjson", workers=8, delay=0.05, max_pages=5, respect_robots=False)
+        times = sorted(moment for _, moment in Site.requests)
+
+        assert len(times) == 5
+        assert min(b - a for a, b in zip(times, times[1:])) >= 0.04
+
+    def test_resume_from_checkpoint(self, site, tmp_path):
+        """Test that a stopped crawl resumes from its state file without refetching pages."""
+        output = tmp_path / "scraped.ndjson"
+        state = tmp_path / "state.json"
+        first = crawl([f"{site}/"], output, state, workers=1, delay=0, max_pages=4, checkpoint_every=1)
+        assert first["queued"] > 0
+        Site.requests = []
+
+        crawl([f"{site}/"], output, state, workers=2, delay=0, backoff=0.01)
+        recipes = read_ndjson(output)
+
+        assert len(recipes) == len({recipe["url"] for recipe in recipes}) == RECIPE_COUNT + 1
+        assert "/" not in [path for path, _ in Site.requests]
+
+
+class TestIncrementalCrawl:
+    """Test suite for re-crawls with the HTTP cache."""
+
+    def test_refresh_writes_only_changed_recipes(self, site, tmp_path):
+        """Test that a refresh sends conditional requests and parses only the changed page."""
+        output = tmp_path / "scraped.ndjson"
+        options = dict(state_path=tmp_path / "state.json", cache_dir=tmp_path / "cache", workers=4, delay=0,
+                       backoff=0.01)
+        crawl([f"{site}/"], output, **options)
+        Site.versions["/przepis/5"] = 1
+        Site.not_modified = 0
+
+        with patch("scrape.extract_recipe", wraps=scrape.extract_recipe) as extract:
+            stats = crawl([f"{site}/"], output, **options)
+        recipes = read_ndjson(output)
+
+        assert stats["pages"] == RECIPE_COUNT + 2
+        assert stats["recipes"] == 1
+        assert stats["unchanged"] == RECIPE_COUNT + 1
+        assert Site.not_modified == RECIPE_COUNT  # index and 11 recipes; flaky page matched by body hash
+        assert extract.call_count == 1
+        assert len(recipes) == RECIPE_COUNT + 2
+        assert recipes[-1]["title"] == "Przepis 5 v1"
+
+    def test_without_cache_every_page_is_parsed(self, site, tmp_path):
+        """Test that crawls without a cache send no validators."""
+        for _ in range(2):
+            stats = crawl([f"{site}/"], tmp_path / "out.ndjson", workers=4, delay=0, backoff=0.01)
+            assert stats["recipes"] == RECIPE_COUNT + 1
+        assert Site.not_modified == 0
+
+
+class TestCrawlAndImport:
+    """Test suite for re-crawls imported into the backend database."""
+
+    @pytest.fixture
+    def backend_session(self):
+        pytest.importorskip("sqlmodel")
+        sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "apps" / "backend"))
+        from sqlalchemy.pool import StaticPool
+        from sqlmodel import Session, SQLModel, create_engine
+        import app.models.models  # noqa: F401 (registers the tables)
+
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            yield session
+        engine.dispose()
+
+    def test_changed_page_updates_imported_recipe(self, site, tmp_path, backend_session):
+        """Test that a page changed between crawls is rewritten in the database on re-import."""
+        from sqlmodel import select
+        from app.models.models import Recipe
+        from app.services.ndjson_import import import_ndjson_lines, iter_file_lines
+
+        output = tmp_path / "scraped.ndjson"
+        options = dict(state_path=tmp_path / "state.json", cache_dir=tmp_path / "cache", workers=4, delay=0,
+                       backoff=0.01)
+        crawl([f"{site}/"], output, **options)
+        first = import_ndjson_lines(backend_session, iter_file_lines(str(output)))
+        changed = select(Recipe).where(Recipe.url == f"{site}/przepis/5")
+        recipe_id = backend_session.exec(changed).one().id
+
+        Site.versions["/przepis/5"] = 1
+        crawl([f"{site}/"], output, **options)
+        second = import_ndjson_lines(backend_session, iter_file_lines(str(output)))
+
+        assert (first["imported"], first["updated"]) == (RECIPE_COUNT + 1, 0)
+        assert (second["imported"], second["updated"]) == (0, 1)
+        backend_session.expire_all()
+        recipe = backend_session.exec(changed).one()
+        assert (recipe.id, recipe.title) == (recipe_id, "Przepis 5 v1")
+
+
+class TestPageCache:
+    """Test suite for the content-addressed page cache."""
+
+    def test_bodies_are_stored_once_compressed(self, tmp_path):
+        """Test that identical bodies share one gzip file and the index survives a reload."""
+        cache = PageCache(tmp_path)
+        body = "<html>Żurek</html>".encode("utf-8") * 50
+        for url in ("https://a/1", "https://a/2"):
+            cache.update(url, cache.store_body(body), {"ETag": '"x"'}, ["https://a/3"])
+        cache.save()
+
+        reloaded = PageCache(tmp_path)
+        files = list((tmp_path / "bodies").rglob("*.html.gz"))
+        assert len(files) == 1
+        assert gzip.decompress(files[0].read_bytes()) == body
+        assert reloaded.load("https://a/2") == body.decode("utf-8")
+        assert reloaded.conditional_headers("https://a/1") == {"If-None-Match": '"x"'}
+        assert reloaded.conditional_headers("https://a/9") == {}
+
+    def test_validators_kept_on_not_modified(self, tmp_path):
+        """Test that a 304 without validators keeps the stored ones."""
+        cache = PageCache(tmp_path)
+        cache.update("https://a/1", "d", {"ETag": '"1"', "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"}, [])
+        cache.update("https://a/1", "d", {}, [])
+
+        assert cache.conditional_headers("https://a/1") == {
+            "If-None-Match": '"1"', "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT"
+        }
+
+
+class TestRateLimiter:
+    """Test suite for the per-host rate limiter."""
+
+    def test_hosts_are_independent(self):
+        """Test that waiting on one host does not delay another."""
+        limiter = HostRateLimiter(0.2)
+        limiter.wait("a")
+        start = time.monotonic()
+        limiter.wait("b")
+        assert time.monotonic() - start < 0.1
+
+
+class TestRobots:
+    """Test suite for robots.txt handling in the fetcher."""
+
+    def test_slow_robots_does_not_block_other_hosts(self):
+        """Test that a host whose robots.txt hangs holds up only its own URLs, and robots.txt is fetched once."""
+        fetcher = scrape.Fetcher(HostRateLimiter(0))
+        release = threading.Event()
+        fetched = []
+
+        class Response:
+            status_code = 200
+            text = "User-agent: *\nDisallow: /private\n"
+
+        def get(url, headers=None):
+            fetched.append(url)
+            if "slow" in url:
+                release.wait(5)
+            return Response()
+
+        results = {}
+        with patch.object(fetcher, "get", side_effect=get):
+            slow = [threading.Thread(target=lambda i=i: results.update({i: fetcher.allowed(f"http://slow/{i}")}))
+                    for i in range(2)]
+            for thread in slow:
+                thread.start()
+            time.sleep(0.05)
+            start = time.monotonic()
+            assert fetcher.allowed("http://fast/ok") and not fetcher.allowed("http://fast/private")
+            assert time.monotonic() - start < 1
+            assert not results
+            release.set()
+            for thread in slow:
+                thread.join()
+
+        assert results == {0: True, 1: True}
+        assert sorted(fetched) == ["http://fast/robots.txt", "http://slow/robots.txt"]